@@ -1,43 +1,110 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI
+import re
 import time
+import uuid
 import logging
 
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.log import request_id_var
+from src.utils.metrics import record_http
+
 
 logger = logging.getLogger(__name__)
 
+# Added to every response unless the route already set them
+SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block")
+)
 
-def setup_middleware(app: FastAPI):
-    """Setup custom middleware for the application"""
+# Client-supplied request IDs are kept only when they look like one
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+def _route_template(scope: Scope, path: str) -> str:
+    """Request path with path parameters put back as placeholders, so metrics keep one series per route"""
+    if scope.get("route") is None:
+        return "unmatched"
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+def _request_id(scope: Scope) -> str:
+    """X-Request-ID sent by the client, or a new one"""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1")
+            if REQUEST_ID_PATTERN.fullmatch(candidate):
+                return candidate
+            break
+    return uuid.uuid4().hex
+
+
+class RequestMiddleware:
+    """
+    Timing, access logging, metrics, security headers and request IDs in one pure ASGI layer
     
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        """Log all incoming requests with timing"""
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
-        # Process request
-        response = await call_next(request)
+    Only the response start message is touched (to add headers); body
+    messages are passed through as they come, so streamed responses keep
+    their backpressure and no extra task is started per request.
+    
+    Response headers: X-Request-ID (the client's, when valid, or a new one),
+    X-Process-Time (seconds until the response started) and the security
+    headers. The request ID is also put on every log record written while
+    the request is served.
+    
+    Args:
+        app: Wrapped ASGI application
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Calculate processing time
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
+        start_time = time.perf_counter()
+        # Routing may rewrite the scope; keep what the client asked for
+        method, path = scope["method"], scope["path"]
+        request_id = _request_id(scope)
+        token = request_id_var.set(request_id)
+        status_code = 500
         
-        # Log response
-        logger.info(
-            f"Response: {request.method} {request.url.path} "
-            f"- Status: {response.status_code} - Time: {process_time:.3f}s"
-        )
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                present = {name.lower() for name, _ in headers}
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                headers.append((b"x-process-time", str(time.perf_counter() - start_time).encode("latin-1")))
+                headers.extend(header for header in SECURITY_HEADERS if header[0] not in present)
+                message = {**message, "headers": headers}
+            await send(message)
         
-        return response
-    
-    @app.middleware("http")
-    async def add_security_headers(request: Request, call_next):
-        """Add security headers to responses"""
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        return response
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Reached once the last body chunk is sent, or when the app failed
+            process_time = time.perf_counter() - start_time
+            record_http(method, _route_template(scope, path), status_code, process_time)
+            logger.info(
+                "Request",
+                extra={
+                    "method": method,
+                    "path": path,
+                    "status": status_code,
+                    "duration_ms": round(process_time * 1000, 1)
+                }
+            )
+            request_id_var.reset(token)
+
+
+def setup_middleware(app: FastAPI):
+    """Setup custom middleware for the application"""
+    app.add_middleware(RequestMiddleware)
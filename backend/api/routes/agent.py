@@ -1,19 +1,51 @@
-from fastapi import APIRouter, HTTPException, status, Header
+from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, AsyncGenerator, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncGenerator, List
 import json
 import asyncio
 from datetime import datetime
+import math
+import threading
 import uuid
 
-from src.graph.workflow import AgentWorkflow
+from config.settings import settings
+from src.utils.admission import AdmissionRejected, admission
+from src.utils.log import log_stats
+from src.utils.metrics import request_timing
+from src.utils.resilience import DeadlineExceeded
+
+if TYPE_CHECKING:
+    from src.graph.workflow import AgentWorkflow
 
 
 router = APIRouter()
 
-# Initialize workflow (singleton pattern)
-workflow = AgentWorkflow()
+# Shared workflow (singleton pattern), built by get_workflow()
+workflow: Optional["AgentWorkflow"] = None
+_workflow_lock = threading.Lock()
+
+
+def get_workflow() -> "AgentWorkflow":
+    """
+    Return the shared workflow, building it on first use
+    
+    main.py's lifespan hook calls this at startup, so the LLM clients, the
+    checkpointer and the compiled graph (and the langgraph/langchain imports
+    behind them) are not paid for at import time. Apps served without the
+    lifespan hook (tests, benchmarks) build it on their first request.
+    
+    Returns:
+        AgentWorkflow instance
+    """
+    global workflow
+    if workflow is None:
+        with _workflow_lock:
+            if workflow is None:
+                from src.graph.workflow import AgentWorkflow
+                
+                workflow = AgentWorkflow()
+    return workflow
 
 
 # Request/Response Models
@@ -22,13 +54,20 @@ class QuestionRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=2000, description="User question")
     thread_id: Optional[str] = Field(default=None, description="Conversation thread ID for memory")
     stream: bool = Field(default=False, description="Enable streaming response")
+    stream_tokens: bool = Field(default=False, description="Stream answer tokens and node_start events (SSE only)")
+    defer_validation: bool = Field(
+        default=False,
+        description="Return the answer before it is scored; the score follows as a 'validation' SSE event or via /state"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "question": "What is SWOT analysis?",
                 "thread_id": "user-123-session-1",
-                "stream": False
+                "stream": False,
+                "stream_tokens": False,
+                "defer_validation": False
             }
         }
 
@@ -42,6 +81,10 @@ class AgentResponse(BaseModel):
     reasoning: str
     timestamp: str
     thread_id: str
+    timings: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Milliseconds spent in total, per node and per LLM / search call (with token counts)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -52,11 +95,48 @@ class AgentResponse(BaseModel):
                 "classifier": "business",
                 "reasoning": "Question relates to business strategy",
                 "timestamp": "2025-12-25T12:00:00Z",
-                "thread_id": "user-123-session-1"
+                "thread_id": "user-123-session-1",
+                "timings": {
+                    "total_ms": 2140.5,
+                    "nodes": {"supervisor": {"count": 1, "ms": 310.2}},
+                    "calls": {"llm.supervisor": {"count": 1, "ms": 305.8, "input_tokens": 412, "output_tokens": 38}}
+                }
             }
         }
 
 
+class BatchQuestion(BaseModel):
+    """One question of a batch request"""
+    question: str = Field(..., min_length=1, max_length=2000, description="User question")
+    thread_id: Optional[str] = Field(default=None, description="Conversation thread ID for memory")
+
+
+class BatchRequest(BaseModel):
+    """Request model for batch question submission"""
+    questions: List[BatchQuestion] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_ITEMS,
+        description="Questions to answer; questions sharing a thread_id run in order"
+    )
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=256,
+        description="Threads processed at once (default BATCH_MAX_CONCURRENCY)"
+    )
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "questions": [
+                {"question": "What is SWOT analysis?"},
+                {"question": "What is a binary search tree?", "thread_id": "nightly-42"}
+            ],
+            "max_concurrency": 16
+        }
+    })
+
+
 class ConversationHistory(BaseModel):
     """Model for conversation history"""
     thread_id: str
@@ -71,6 +151,82 @@ class StreamChunk(BaseModel):
     timestamp: str
 
 
+# SSE helpers
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Event line"""
+    chunk = {
+        "event": event,
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def _validation_data(update: Dict[str, Any], thread_id: str) -> Dict[str, Any]:
+    """Build the payload of the trailing validation event"""
+    return {
+        "score": update.get("validator_score", ""),
+        "source": update.get("validation_source", ""),
+        "thread_id": thread_id
+    }
+
+
+def _node_complete_data(node_name: str, node_data: Optional[Dict[str, Any]], thread_id: str) -> Dict[str, Any]:
+    """
+    Build the node_complete payload
+    
+    `content` is the node's own output (analyst nodes store their answer
+    under their own name), so clients can append it without repeating the
+    answer. `answer` is sent only by the node that sets the final answer
+    (the validator, or a semantic cache hit).
+    """
+    node_data = node_data or {}
+    data = {
+        "node": node_name,
+        "content": str(node_data.get(node_name) or ""),
+        "classifier": node_data.get("classifier_response", ""),
+        "score": node_data.get("validator_score", ""),
+        "thread_id": thread_id
+    }
+    if node_data.get("final_data"):
+        data["answer"] = str(node_data["final_data"])
+    return data
+
+
+def _batch_line(result: Dict[str, Any]) -> str:
+    """Format one batch result as an NDJSON line"""
+    line = {
+        "index": result["index"],
+        "question": result["question"],
+        "thread_id": result["thread_id"]
+    }
+    if "error" in result:
+        line["error"] = result["error"]
+        if "retry_after" in result:
+            line["retry_after"] = result["retry_after"]
+    else:
+        values = result["values"]
+        line.update({
+            "answer": values.get("final_data", "No answer generated"),
+            "confidence_score": values.get("validator_score", "N/A"),
+            "classifier": values.get("classifier_response", "unknown"),
+            "reasoning": values.get("region_response", "No reasoning provided"),
+            "deduplicated": result.get("deduplicated", False)
+        })
+    line["timestamp"] = datetime.utcnow().isoformat() + "Z"
+    return json.dumps(line) + "\n"
+
+
+def _overloaded(error: AdmissionRejected) -> HTTPException:
+    """503 telling the client when to retry an admission rejection"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+
 # API Endpoints
 
 @router.post("/ask", response_model=AgentResponse, status_code=status.HTTP_200_OK)
@@ -80,7 +236,7 @@ async def ask_question(request: QuestionRequest):
     
     Args:
         request: Question request with question text and optional thread_id
-        
+    
     Returns:
         Complete agent response with answer and metadata
     """
@@ -91,15 +247,15 @@ async def ask_question(request: QuestionRequest):
                 detail="Question cannot be empty"
             )
         
+        # Fail fast while the LLM wait queue is full
+        admission.check("groq")
+        
         # Generate thread_id if not provided
         thread_id = request.thread_id or f"thread-{uuid.uuid4()}"
         
-        # Execute workflow with thread_id
-        result = await asyncio.to_thread(
-            workflow.invoke, 
-            request.question, 
-            thread_id
-        )
+        # Execute workflow with thread_id, collecting its timing breakdown
+        with request_timing() as timings:
+            result = await get_workflow().ainvoke(request.question, thread_id, defer_validation=request.defer_validation)
         
         # Extract response data
         response = AgentResponse(
@@ -109,11 +265,18 @@ async def ask_question(request: QuestionRequest):
             classifier=result.get("classifier_response", "unknown"),
             reasoning=result.get("region_response", "No reasoning provided"),
             timestamp=datetime.utcnow().isoformat() + "Z",
-            thread_id=thread_id
+            thread_id=thread_id,
+            timings=timings.breakdown() if settings.METRICS_ENABLED else None
         )
         
         return response
-        
+    
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -128,7 +291,7 @@ async def ask_question_stream(request: QuestionRequest):
     
     Args:
         request: Question request with question text and optional thread_id
-        
+    
     Returns:
         Server-Sent Events (SSE) stream of agent workflow
     """
@@ -139,42 +302,68 @@ async def ask_question_stream(request: QuestionRequest):
                 detail="Question cannot be empty"
             )
         
+        # Reject before the stream starts while the LLM wait queue is full
+        admission.check("groq")
+        
         # Generate thread_id if not provided
         thread_id = request.thread_id or f"thread-{uuid.uuid4()}"
         
         async def event_generator() -> AsyncGenerator[str, None]:
             """Generate SSE events from workflow stream"""
-            try:
-                # Send start event with thread_id
-                yield f"data: {json.dumps({'event': 'start', 'data': {'question': request.question, 'thread_id': thread_id}, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
+            with request_timing() as timings:
+                def completion() -> str:
+                    data = {"status": "finished", "thread_id": thread_id}
+                    if settings.METRICS_ENABLED:
+                        data["timings"] = timings.breakdown()
+                    return _sse_event("complete", data)
                 
-                # Stream workflow execution with thread_id
-                for output in workflow.stream(request.question, thread_id):
-                    for node_name, node_data in output.items():
-                        chunk = {
-                            "event": "node_complete",
-                            "data": {
-                                "node": node_name,
-                                "content": str(node_data.get("final_data", ""))[:500],
-                                "classifier": node_data.get("classifier_response", ""),
-                                "score": node_data.get("validator_score", ""),
-                                "thread_id": thread_id
-                            },
-                            "timestamp": datetime.utcnow().isoformat()
-                        }
-                        yield f"data: {json.dumps(chunk)}\n\n"
-                        await asyncio.sleep(0.01)
+                try:
+                    # Send start event with thread_id
+                    yield _sse_event("start", {"question": request.question, "thread_id": thread_id})
+                    
+                    # The answer is complete once the last node (or a cache hit) reports;
+                    # a deferred validation event may still follow
+                    last_nodes = (get_workflow().terminal_node, "semantic_cache")
+                    completed = False
+                    
+                    if request.stream_tokens:
+                        # Token-level stream: node_start, token and node_complete events
+                        async for event in get_workflow().astream_tokens(
+                            request.question, thread_id, defer_validation=request.defer_validation
+                        ):
+                            if event["event"] == "node_complete":
+                                yield _sse_event("node_complete", _node_complete_data(event["node"], event["update"], thread_id))
+                                if event["node"] in last_nodes:
+                                    completed = True
+                                    yield completion()
+                            elif event["event"] == "validation":
+                                yield _sse_event("validation", _validation_data(event, thread_id))
+                            else:
+                                data = {key: value for key, value in event.items() if key != "event"}
+                                yield _sse_event(event["event"], {**data, "thread_id": thread_id})
+                    else:
+                        # Stream workflow execution with thread_id; the async graph
+                        # stream keeps the event loop free while nodes await the LLM
+                        async for output in get_workflow().astream(
+                            request.question, thread_id, defer_validation=request.defer_validation
+                        ):
+                            for node_name, node_data in output.items():
+                                if node_name == "validation":
+                                    # Score of a deferred validation, after the answer
+                                    yield _sse_event("validation", _validation_data(node_data, thread_id))
+                                else:
+                                    yield _sse_event("node_complete", _node_complete_data(node_name, node_data, thread_id))
+                                    if node_name in last_nodes:
+                                        completed = True
+                                        yield completion()
+                    
+                    if not completed:
+                        yield completion()
                 
-                # Send completion event
-                yield f"data: {json.dumps({'event': 'complete', 'data': {'status': 'finished', 'thread_id': thread_id}, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
-                
-            except Exception as e:
-                error_chunk = {
-                    "event": "error",
-                    "data": {"message": str(e), "thread_id": thread_id},
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-                yield f"data: {json.dumps(error_chunk)}\n\n"
+                except AdmissionRejected as e:
+                    yield _sse_event("error", {"message": str(e), "retry_after": e.retry_after, "thread_id": thread_id})
+                except Exception as e:
+                    yield _sse_event("error", {"message": str(e), "thread_id": thread_id})
         
         return StreamingResponse(
             event_generator(),
@@ -185,7 +374,11 @@ async def ask_question_stream(request: QuestionRequest):
                 "X-Accel-Buffering": "no"
             }
         )
-        
+    
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -193,6 +386,67 @@ async def ask_question_stream(request: QuestionRequest):
         )
 
 
+@router.post("/ask/batch")
+async def ask_question_batch(request: BatchRequest):
+    """
+    Submit many questions at once (offline / bulk workloads)
+    
+    Identical questions are answered once, and the supervisor and validator
+    stages pack several questions into each LLM call.
+    
+    Args:
+        request: Questions with optional thread_ids, and the concurrency
+    
+    Returns:
+        NDJSON stream with one result line per question, in completion order
+    """
+    if any(not item.question.strip() for item in request.questions):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Question cannot be empty"
+        )
+    
+    try:
+        # Reject before the stream starts while the LLM wait queue is full
+        admission.check("groq")
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    
+    def error_line(index: int, error: Exception) -> str:
+        item = request.questions[index]
+        failed = {"index": index, "question": item.question, "thread_id": item.thread_id, "error": str(error)}
+        if isinstance(error, AdmissionRejected):
+            failed["retry_after"] = error.retry_after
+        return _batch_line(failed)
+    
+    async def line_generator() -> AsyncGenerator[str, None]:
+        """Generate one NDJSON line per question, an error line for those that failed"""
+        reported = set()
+        try:
+            async for result in get_workflow().abatch(
+                [item.question for item in request.questions],
+                [item.thread_id for item in request.questions],
+                max_concurrency=request.max_concurrency
+            ):
+                reported.add(result["index"])
+                try:
+                    line = _batch_line(result)
+                except Exception as e:
+                    line = error_line(result["index"], e)
+                yield line
+        except Exception as e:
+            # The batch stopped early; the questions it did not answer get its error
+            for index in range(len(request.questions)):
+                if index not in reported:
+                    yield error_line(index, e)
+    
+    return StreamingResponse(
+        line_generator(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history/{thread_id}", response_model=ConversationHistory)
 async def get_conversation_history(
     thread_id: str,
@@ -204,13 +458,13 @@ async def get_conversation_history(
     Args:
         thread_id: Conversation thread identifier
         limit: Maximum number of history items (default: 10)
-        
+    
     Returns:
         Conversation history with messages
     """
     try:
         history = await asyncio.to_thread(
-            workflow.get_state_history,
+            get_workflow().get_state_history,
             thread_id,
             limit
         )
@@ -230,7 +484,7 @@ async def get_conversation_history(
             messages=messages,
             total_interactions=len(messages)
         )
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -245,12 +499,12 @@ async def get_thread_state(thread_id: str):
     
     Args:
         thread_id: Conversation thread identifier
-        
+    
     Returns:
         Current thread state
     """
     try:
-        state = await asyncio.to_thread(workflow.get_state, thread_id)
+        state = await asyncio.to_thread(get_workflow().get_state, thread_id)
         
         if state is None:
             raise HTTPException(
@@ -263,7 +517,7 @@ async def get_thread_state(thread_id: str):
             "state": state.values if hasattr(state, 'values') else {},
             "next": state.next if hasattr(state, 'next') else []
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -273,9 +527,16 @@ async def get_thread_state(thread_id: str):
         )
 
 
+@router.get("/stats")
+async def get_stats():
+    """Get workflow runtime statistics (routing, speculation and cache counters)"""
+    return {**get_workflow().get_stats(), "logging": log_stats()}
+
+
 @router.get("/status")
 async def get_status():
     """Get API status and configuration"""
+    workflow = get_workflow()
     return {
         "status": "operational",
         "model": "llama-3.3-70b-versatile",
@@ -285,6 +546,9 @@ async def get_status():
             "synthesis": True,
             "validation": True,
             "memory": True,
-            "checkpointer": "MemorySaver"
+            "checkpointer": type(workflow.memory).__name__,
+            "workflow_mode": workflow.mode,
+            "validation_mode": workflow.validator.mode,
+            "semantic_cache": workflow.semantic_cache is not None
         }
     }
@@ -0,0 +1,269 @@
+"""
+Deterministic stand-ins for ChatGroq and Tavily used by the benchmarks
+
+The fakes honour both the sync and async LangChain interfaces, support token
+streaming and structured output, and sleep for a configurable latency so that
+the framework's own scheduling behaviour can be measured without API keys.
+"""
+import asyncio
+import math
+import os
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+# The real clients refuse to construct without keys; the fakes never use them
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from src.utils.schemas import (
+    BatchClassification,
+    BatchConfidenceScore,
+    BatchScore,
+    BatchSupervisorResponse,
+    ConfidenceScore,
+    SupervisorResponse
+)
+from src.utils.tools import SearchTools
+
+
+class Latency:
+    """
+    Latency distribution in seconds (seeded)
+
+    "normal" is clipped at zero; "lognormal" has the same mean and standard
+    deviation (jitter) but a long right tail, closer to real API latencies.
+    """
+
+    def __init__(self, mean: float = 0.0, jitter: float = 0.0, seed: int = 0, distribution: str = "normal"):
+        if distribution not in ("normal", "lognormal"):
+            raise ValueError(f"Unsupported latency distribution: {distribution}")
+        self.mean = mean
+        self.jitter = jitter
+        self.distribution = distribution
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if not self.jitter or self.mean <= 0:
+            return self.mean
+        if self.distribution == "lognormal":
+            sigma2 = math.log(1 + (self.jitter / self.mean) ** 2)
+            return self._random.lognormvariate(math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2))
+        return max(0.0, self._random.gauss(self.mean, self.jitter))
+
+
+def _last_question(messages: List[BaseMessage]) -> str:
+    """Extract the question text from the last human message"""
+    content = str(messages[-1].content) if messages else ""
+    match = re.search(r"question:\s*(.*)", content, flags=re.IGNORECASE)
+    return match.group(1).splitlines()[0] if match else content
+
+
+def _numbered_items(messages: List[BaseMessage]) -> Dict[int, str]:
+    """Extract the "[n] text" items of a batched prompt"""
+    content = str(messages[-1].content) if messages else ""
+    return {int(index): text for index, text in re.findall(r"^\[(\d+)\]\s*(.*)$", content, flags=re.MULTILINE)}
+
+
+def classify_by_keyword(question: str) -> str:
+    """Deterministic routing used by the fake supervisor"""
+    lowered = question.lower()
+    if any(word in lowered for word in ("code", "python", "api", "algorithm", "system")):
+        return "technical"
+    if any(word in lowered for word in ("study", "research", "hypothesis", "paper")):
+        return "research"
+    return "business"
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning canned answers after a simulated delay"""
+
+    latency: Any = None
+    token_delay: float = 0.0
+    answer_words: int = 60
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _answer(self, messages: List[BaseMessage]) -> str:
+        question = _last_question(messages)
+        filler = " ".join(f"detail{i}" for i in range(self.answer_words))
+        return f"Answer to '{question}': {filler}"
+
+    def _delay(self) -> float:
+        return self.latency.sample() if self.latency else 0.0
+
+    def _result(self, text: str) -> ChatResult:
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": 100,
+                "output_tokens": len(text.split()),
+                "total_tokens": 100 + len(text.split()),
+            },
+            response_metadata={"model_name": self._llm_type},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        time.sleep(self._delay())
+        return self._result(self._answer(messages))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        return self._result(self._answer(messages))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self._delay())
+        for token in re.split(r"(\s)", self._answer(messages)):
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        for token in re.split(r"(\s)", self._answer(messages)):
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        """Return a runnable producing the supervisor or validator schema (single or batched)"""
+
+        def build(messages: List[BaseMessage]):
+            question = _last_question(messages)
+            if schema is SupervisorResponse:
+                label = classify_by_keyword(question)
+                return SupervisorResponse(classifier=label, region=f"keyword match for {label}")
+            if schema is ConfidenceScore:
+                return ConfidenceScore(range="8")
+            if schema is BatchSupervisorResponse:
+                return BatchSupervisorResponse(items=[
+                    BatchClassification(
+                        index=index,
+                        classifier=classify_by_keyword(text),
+                        region=f"keyword match for {classify_by_keyword(text)}"
+                    )
+                    for index, text in _numbered_items(messages).items()
+                ])
+            if schema is BatchConfidenceScore:
+                return BatchConfidenceScore(items=[BatchScore(index=index, range="8") for index in _numbered_items(messages)])
+            raise TypeError(f"Unsupported schema: {schema}")
+
+        def invoke(messages, config=None):
+            self.calls += 1
+            time.sleep(self._delay())
+            return build(messages)
+
+        async def ainvoke(messages, config=None):
+            self.calls += 1
+            await asyncio.sleep(self._delay())
+            return build(messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+
+class FakeTavily:
+    """Stand-in for TavilySearchResults with simulated latency"""
+
+    def __init__(self, latency: Optional[Latency] = None):
+        self.latency = latency or Latency()
+        self.calls = 0
+
+    def _results(self, question: str) -> List[Dict[str, str]]:
+        return [
+            {"url": f"https://example.com/{i}", "content": f"Search result {i} for {question}"}
+            for i in range(4)
+        ]
+
+    def invoke(self, question: str):
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        return self._results(question)
+
+    async def ainvoke(self, question: str):
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        return self._results(question)
+
+
+def install_fakes(
+    workflow,
+    llm_latency: Optional[Latency] = None,
+    search_latency: Optional[Latency] = None,
+    token_delay: float = 0.0,
+    search_cache: bool = False,
+) -> Dict[str, Any]:
+    """
+    Swap every LLM and search client of an AgentWorkflow for fakes
+
+    Args:
+        workflow: AgentWorkflow instance to patch in place
+        llm_latency: Latency distribution for each LLM call
+        search_latency: Latency distribution for each web search
+        token_delay: Delay between streamed tokens in seconds
+        search_cache: Keep the SearchTools result cache enabled
+
+    Returns:
+        The installed fakes, keyed by role
+    """
+    llm = FakeChatModel(latency=llm_latency or Latency(), token_delay=token_delay)
+    tavily = FakeTavily(search_latency)
+    search = SearchTools(enable_cache=search_cache)
+    search.tavily = tavily
+
+    workflow.search_tools = search
+    workflow.supervisor.llm = llm.with_structured_output(SupervisorResponse)
+    workflow.supervisor.batch_llm = llm.with_structured_output(BatchSupervisorResponse)
+    workflow.validator.llm = llm.with_structured_output(ConfidenceScore)
+    workflow.validator.batch_llm = llm.with_structured_output(BatchConfidenceScore)
+    for agent in (workflow.business_agent, workflow.research_agent, workflow.technical_agent):
+        agent.llm = llm
+    for synthesis in (workflow.business_synthesis, workflow.research_synthesis, workflow.technical_synthesis):
+        synthesis.llm = llm
+        synthesis.search_tools = search
+    if workflow.history_compactor:
+        workflow.history_compactor.llm = llm
+
+    return {"llm": llm, "search": search, "tavily": tavily}
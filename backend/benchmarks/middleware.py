@@ -0,0 +1,169 @@
+"""
+Micro-benchmark of the HTTP middleware stack
+
+Serves /health and /api/v1/ask/stream (in process, through httpx's ASGI
+transport, with stubbed LLM and search clients at zero latency) from the
+same routes under three middleware stacks, and reports requests/sec and
+p50/p95 latency for each:
+
+- asgi: api/middleware.py's single pure ASGI RequestMiddleware
+- http: the former pair of @app.middleware("http") functions (timing and
+  logging, security headers), each a BaseHTTPMiddleware layer
+- none: no custom middleware, as a floor
+
+Usage (from backend/):
+    python -m benchmarks.middleware --requests 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI, Request
+
+from benchmarks.fakes import Latency, install_fakes
+from benchmarks.run import percentile, reset_admission
+
+
+STACKS = ("asgi", "http", "none")
+
+ROUTES = ("health", "stream")
+
+logger = logging.getLogger("api.middleware")
+
+
+def add_base_http_middleware(app: FastAPI):
+    """The two BaseHTTPMiddleware layers RequestMiddleware replaced"""
+    from api.middleware import SECURITY_HEADERS
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time"] = str(process_time)
+        logger.info(
+            "Request",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round(process_time * 1000, 1)
+            }
+        )
+        return response
+
+    @app.middleware("http")
+    async def add_security_headers(request: Request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS:
+            response.headers[name.decode()] = value.decode()
+        return response
+
+
+def build_app(stack: str) -> FastAPI:
+    """Health and agent routes behind the given middleware stack"""
+    from api.middleware import setup_middleware
+    from api.routes.agent import router
+    from main import health_check
+
+    app = FastAPI()
+    if stack == "asgi":
+        setup_middleware(app)
+    elif stack == "http":
+        add_base_http_middleware(app)
+    app.get("/health")(health_check)
+    app.include_router(router, prefix="/api/v1")
+    return app
+
+
+async def _request(client: httpx.AsyncClient, route: str, index: int):
+    if route == "health":
+        response = await client.get("/health")
+    else:
+        payload = {"question": f"What is SWOT analysis? ({index})", "thread_id": f"mw-{index}"}
+        response = await client.post("/api/v1/ask/stream", json=payload)
+    response.raise_for_status()
+
+
+async def measure(app: FastAPI, route: str, requests: int, concurrency: int) -> Dict[str, float]:
+    """
+    Send requests to one route from concurrency workers
+
+    Args:
+        app: Application under test
+        route: "health" or "stream"
+        requests: Requests to send (after a short warm-up)
+        concurrency: Requests in flight at once
+
+    Returns:
+        Throughput and latency summary
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for index in range(min(20, requests)):
+            await _request(client, route, -index - 1)
+
+        latencies: List[float] = []
+        counter = iter(range(requests))
+
+        async def worker():
+            for index in counter:
+                start = time.perf_counter()
+                await _request(client, route, index)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    return {
+        "requests_per_s": round(requests / wall, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+    }
+
+
+async def run(stacks: List[str], routes: List[str], requests: int, concurrency: int) -> Dict[str, Dict]:
+    from api.routes import agent as agent_routes
+
+    # Lift the provider rate limits; the stubbed calls cost nothing
+    reset_admission(False)
+    install_fakes(agent_routes.get_workflow(), Latency(), Latency())
+    results: Dict[str, Dict] = {}
+    for route in routes:
+        # The stream route runs the whole (stubbed) graph; fewer requests keep it short
+        count = requests if route == "health" else max(concurrency, requests // 10)
+        for stack in stacks:
+            results[f"{route}/{stack}"] = await measure(build_app(stack), route, count, concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stacks", default=",".join(STACKS), help="Comma-separated subset of asgi, http, none")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="Comma-separated subset of health, stream")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per /health run (a tenth for stream)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    stacks = [stack for stack in args.stacks.split(",") if stack]
+    routes = [route for route in args.routes.split(",") if route]
+
+    # Agents and the access log write a record per request; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run(stacks, routes, args.requests, args.concurrency))
+
+    print(json.dumps(results, indent=2))
+    print(f"{'route/stack':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['requests_per_s']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
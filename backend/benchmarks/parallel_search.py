@@ -0,0 +1,74 @@
+"""
+Benchmark: serial vs parallel web search
+
+Runs the same questions through AgentWorkflow with the Tavily search inside the
+synthesis node (serial) and as a parallel branch next to the domain agent, using
+stubbed LLM and search clients with configurable delays.
+
+Usage (from backend/):
+    python -m benchmarks.parallel_search --llm-latency 0.3 --search-latency 0.4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+
+from benchmarks.fakes import Latency, install_fakes
+from src.graph.workflow import AgentWorkflow
+
+
+QUESTIONS = [
+    "What is SWOT analysis?",
+    "How do I design a REST API in Python?",
+    "What is a good research hypothesis?",
+]
+
+
+async def measure(parallel_search: bool, args) -> list:
+    """Return per-request end-to-end latencies in seconds"""
+    workflow = AgentWorkflow(parallel_search=parallel_search)
+    install_fakes(
+        workflow,
+        Latency(args.llm_latency, args.jitter, seed=1),
+        Latency(args.search_latency, args.jitter, seed=2),
+    )
+
+    latencies = []
+    for i in range(args.requests):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        start = time.perf_counter()
+        await workflow.ainvoke(question, thread_id=f"bench-{i}")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--search-latency", type=float, default=0.4)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial = asyncio.run(measure(False, args))
+        parallel = asyncio.run(measure(True, args))
+
+    serial_mean = statistics.mean(serial)
+    parallel_mean = statistics.mean(parallel)
+    print(json.dumps({
+        "requests": args.requests,
+        "llm_latency_s": args.llm_latency,
+        "search_latency_s": args.search_latency,
+        "serial_mean_s": round(serial_mean, 3),
+        "parallel_mean_s": round(parallel_mean, 3),
+        "saved_ms_per_request": round((serial_mean - parallel_mean) * 1000, 1),
+        "saved_pct": round(100 * (serial_mean - parallel_mean) / serial_mean, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+End-to-end benchmark suite with stubbed LLM and search backends
+
+Drives AgentWorkflow.invoke, AgentWorkflow.stream and the FastAPI /ask and
+/ask/stream routes (in process, through httpx's ASGI transport) at
+increasing concurrency, with the fake Groq and Tavily clients from
+benchmarks/fakes.py. Reports per target and concurrency level:
+
+- throughput and p50/p95/p99 latency (plus time to first event for stream)
+- per-node time, from LangChain callbacks on the graph nodes
+
+and, once per run, memory growth per conversation thread and checkpoint
+size per thread and per turn.
+
+Results are saved as JSON; pass an earlier file to --compare to print the
+change in throughput and latency.
+
+Usage (from backend/):
+    python -m benchmarks.run --concurrency 1,8,32 --output baseline.json
+    python -m benchmarks.run --concurrency 1,8,32 --output after.json --compare baseline.json
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from benchmarks.fakes import Latency, install_fakes
+from benchmarks.parallel_search import QUESTIONS
+from src.graph.workflow import AgentWorkflow
+from src.utils.admission import admission, build_admission_controller
+
+
+TARGETS = ("invoke", "stream", "api_ask", "api_stream")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation between ranks"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "p50": round(percentile(seconds, 50) * 1000, 2),
+        "p95": round(percentile(seconds, 95) * 1000, 2),
+        "p99": round(percentile(seconds, 99) * 1000, 2),
+        "mean": round(sum(seconds) / len(seconds) * 1000, 2) if seconds else 0.0,
+        "max": round(max(seconds, default=0.0) * 1000, 2),
+    }
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the wall time of every graph node run"""
+
+    # Called on the event loop / worker thread directly, not via an executor
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[Any, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        # A node run is the chain named after the node it belongs to
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._starts[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id):
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            with self._lock:
+                self._samples[node].append(time.perf_counter() - start)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def collect(self) -> Dict[str, Dict[str, float]]:
+        """Per-node summary since the last collect"""
+        with self._lock:
+            samples, self._samples = self._samples, defaultdict(list)
+        return {
+            node: {"count": len(values), **summarize(values), "total_s": round(sum(values), 3)}
+            for node, values in sorted(samples.items())
+        }
+
+
+# Attached to every LangChain run in the process (all threads see the default)
+node_timer = NodeTimer()
+register_configure_hook(ContextVar("benchmark_node_timer", default=node_timer), True)
+
+
+def reset_admission(rate_limits: bool):
+    """
+    Give every level fresh provider limiters
+
+    The fake calls cost nothing, so the Groq/Tavily requests- and
+    tokens-per-minute buckets are lifted unless --rate-limits is set;
+    the concurrency limits stay.
+    """
+    fresh = build_admission_controller()
+    if not rate_limits:
+        for limiter in fresh.limiters.values():
+            limiter.requests = limiter.tokens = None
+    admission.limiters = fresh.limiters
+
+
+def build_workflow(args) -> AgentWorkflow:
+    """Fresh workflow (own checkpointer and counters) with fake clients"""
+    reset_admission(args.rate_limits)
+    workflow = AgentWorkflow(mode=args.mode)
+    install_fakes(
+        workflow,
+        Latency(args.llm_latency, args.llm_jitter, seed=1, distribution=args.distribution),
+        Latency(args.search_latency, args.search_jitter, seed=2, distribution=args.distribution),
+        token_delay=args.token_delay,
+        search_cache=args.search_cache,
+    )
+    return workflow
+
+
+def question(index: int) -> str:
+    # Unique per request so that coalescing and caches do not skew the numbers
+    return f"{QUESTIONS[index % len(QUESTIONS)]} (request {index})"
+
+
+def run_sync(workflow: AgentWorkflow, target: str, concurrency: int, requests: int) -> Tuple[float, List[Dict]]:
+    """Run workflow.invoke / workflow.stream from a thread pool"""
+
+    def one(index: int) -> Dict:
+        start = time.perf_counter()
+        first = None
+        thread_id = f"bench-{concurrency}-{index}"
+        try:
+            if target == "invoke":
+                workflow.invoke(question(index), thread_id)
+            else:
+                for _ in workflow.stream(question(index), thread_id):
+                    if first is None:
+                        first = time.perf_counter() - start
+            return {"latency": time.perf_counter() - start, "first_event": first}
+        except Exception as e:
+            return {"latency": time.perf_counter() - start, "error": str(e)}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests)))
+    return time.perf_counter() - start, samples
+
+
+async def run_api(workflow: AgentWorkflow, target: str, concurrency: int, requests: int) -> Tuple[float, List[Dict]]:
+    """Call the FastAPI routes with at most `concurrency` requests in flight"""
+    from api.routes import agent as agent_routes
+    from main import app
+
+    agent_routes.workflow = workflow
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(client: httpx.AsyncClient, index: int) -> Dict:
+        payload = {"question": question(index), "thread_id": f"bench-{concurrency}-{index}"}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if target == "api_ask":
+                    response = await client.post("/api/v1/ask", json=payload)
+                    response.raise_for_status()
+                else:
+                    # The ASGI transport hands over the body once the stream
+                    # has ended, so there is no time to first event here
+                    async with client.stream("POST", "/api/v1/ask/stream", json=payload) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if line.startswith("data: ") and json.loads(line[6:])["event"] == "error":
+                                raise RuntimeError(line)
+                return {"latency": time.perf_counter() - start}
+            except Exception as e:
+                return {"latency": time.perf_counter() - start, "error": str(e)}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(one(client, i) for i in range(requests)))
+        return time.perf_counter() - start, list(samples)
+
+
+def measure_level(target: str, concurrency: int, args) -> Dict:
+    """Benchmark one target at one concurrency level"""
+    workflow = build_workflow(args)
+    requests = max(args.requests, concurrency)
+    node_timer.collect()
+    if target in ("invoke", "stream"):
+        wall, samples = run_sync(workflow, target, concurrency, requests)
+    else:
+        wall, samples = asyncio.run(run_api(workflow, target, concurrency, requests))
+
+    ok = [sample for sample in samples if "error" not in sample]
+    result = {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(samples) - len(ok),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 2) if wall else 0.0,
+        "latency_ms": summarize([sample["latency"] for sample in ok]),
+        "nodes": node_timer.collect(),
+    }
+    first_events = [sample["first_event"] for sample in ok if sample.get("first_event") is not None]
+    if first_events:
+        result["first_event_ms"] = summarize(first_events)
+    if result["errors"]:
+        result["first_error"] = next(sample["error"] for sample in samples if "error" in sample)
+    return result
+
+
+def checkpoint_bytes(workflow: AgentWorkflow, thread_id: str) -> int:
+    """Serialized size of a thread's latest checkpoint"""
+    saved = workflow.memory.get_tuple({"configurable": {"thread_id": thread_id}})
+    if saved is None:
+        return 0
+    return len(workflow.memory.serde.dumps_typed(saved.checkpoint)[1])
+
+
+def measure_memory(args) -> Dict:
+    """
+    Memory growth per new thread, and checkpoint size per thread and turn
+
+    Threads are answered one at a time so that only retained memory
+    (checkpoints, caches, counters) is counted, not in-flight requests.
+    """
+    workflow = build_workflow(args)
+    for index in range(3):
+        workflow.invoke(question(index), f"warmup-{index}")
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(args.memory_threads):
+        workflow.invoke(question(index), f"memory-{index}")
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    first_turn = [checkpoint_bytes(workflow, f"memory-{index}") for index in range(args.memory_threads)]
+    by_turn = []
+    for turn in range(args.turns):
+        workflow.invoke(question(turn), "memory-turns")
+        by_turn.append(checkpoint_bytes(workflow, "memory-turns"))
+
+    stored = list(workflow.memory.list(None))
+    return {
+        "threads": args.memory_threads,
+        "bytes_per_thread": round((after - before) / max(1, args.memory_threads)),
+        "checkpoint": {
+            "first_turn_bytes": round(sum(first_turn) / max(1, len(first_turn))),
+            "bytes_by_turn": by_turn,
+            "stored_checkpoints": len(stored),
+            "stored_bytes": sum(len(workflow.memory.serde.dumps_typed(item.checkpoint)[1]) for item in stored),
+        },
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def change(new: float, old: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{100 * (new - old) / old:+.1f}%"
+
+
+def compare(report: Dict, baseline: Dict) -> List[str]:
+    """Lines describing the change from a baseline report"""
+    old_levels = {(level["target"], level["concurrency"]): level for level in baseline.get("results", [])}
+    lines = [f"Compared with {baseline['meta'].get('git_revision') or 'baseline'} ({baseline['meta']['timestamp']})"]
+    for level in report["results"]:
+        old = old_levels.get((level["target"], level["concurrency"]))
+        if old is None:
+            continue
+        lines.append(
+            f"  {level['target']:<10} c={level['concurrency']:<4} "
+            f"throughput {change(level['throughput_rps'], old['throughput_rps']):>8}  "
+            f"p50 {change(level['latency_ms']['p50'], old['latency_ms']['p50']):>8}  "
+            f"p95 {change(level['latency_ms']['p95'], old['latency_ms']['p95']):>8}  "
+            f"p99 {change(level['latency_ms']['p99'], old['latency_ms']['p99']):>8}"
+        )
+    if "memory" in report and "memory" in baseline:
+        lines.append(
+            f"  memory per thread {change(report['memory']['bytes_per_thread'], baseline['memory']['bytes_per_thread'])}, "
+            f"checkpoint {change(report['memory']['checkpoint']['first_turn_bytes'], baseline['memory']['checkpoint']['first_turn_bytes'])}"
+        )
+    return lines
+
+
+def table(report: Dict) -> List[str]:
+    lines = [f"{'target':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"]
+    for level in report["results"]:
+        latency = level["latency_ms"]
+        lines.append(
+            f"{level['target']:<10} {level['concurrency']:>5} {level['throughput_rps']:>9} "
+            f"{latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9} {level['errors']:>7}"
+        )
+    if "memory" in report:
+        memory = report["memory"]
+        lines.append(
+            f"memory: {memory['bytes_per_thread']} B per thread; "
+            f"checkpoint bytes by turn: {memory['checkpoint']['bytes_by_turn']}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS), help=f"Comma-separated subset of {', '.join(TARGETS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per level (at least the concurrency)")
+    parser.add_argument("--mode", choices=("standard", "speculative"), default=None)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--search-jitter", type=float, default=0.0)
+    parser.add_argument("--distribution", choices=("normal", "lognormal"), default="normal")
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--search-cache", action="store_true", help="Keep the search result cache enabled")
+    parser.add_argument("--rate-limits", action="store_true", help="Apply the configured provider rate limits")
+    parser.add_argument("--memory-threads", type=int, default=50, help="Threads for the memory measurement (0 skips it)")
+    parser.add_argument("--turns", type=int, default=5, help="Turns on one thread for checkpoint growth")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "results": [],
+    }
+    # Agents print banners on every node; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for target in targets:
+            for concurrency in levels:
+                report["results"].append(measure_level(target, concurrency, args))
+        if args.memory_threads > 0:
+            report["memory"] = measure_memory(args)
+
+    print("\n".join(table(report)))
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            print("\n".join(compare(report, json.load(handle))))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Saved {args.output}")
+    if any(level["errors"] for level in report["results"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
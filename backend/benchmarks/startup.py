@@ -0,0 +1,143 @@
+"""
+Cold-start benchmark: import time and time to ready
+
+Each run starts a fresh interpreter, so nothing is cached in sys.modules:
+
+- import: `python -X importtime -c "import main"`; reports the total and
+  the self time summed per top-level package (fastapi, langchain_core, ...)
+- startup: imports main, then runs the app's lifespan hook (settings
+  validation, workflow construction, optional warm-up) as uvicorn would,
+  timing both phases
+
+API keys default to dummy values; nothing is sent unless WARMUP_CONNECTIONS
+is set.
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --module api.routes.agent --top 20
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:  self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+STARTUP_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def lifespan():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(lifespan())
+print(json.dumps({"import_s": imported - start, "lifespan_s": ready - imported}))
+"""
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "bench")
+    env.setdefault("TAVILY_API_KEY", "bench")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    # Keep the JSON report on stdout free of log records
+    env.setdefault("LOG_LEVEL", "ERROR")
+    return env
+
+
+def _python(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=_environment(), capture_output=True, text=True, check=True
+    )
+
+
+def parse_importtime(output: str, module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Total import time of a module and self time per top-level package
+
+    Args:
+        output: stderr of `python -X importtime`
+        module: Module imported by the command
+
+    Returns:
+        (total seconds, {package: self seconds})
+    """
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        packages[name.split(".")[0]] += int(self_us) / 1e6
+        if name == module and len(indent) == 1:
+            total = int(cumulative_us) / 1e6
+    return total, dict(packages)
+
+
+def measure_import(module: str, runs: int) -> Dict:
+    """Median import time of a module over fresh interpreters"""
+    totals: List[float] = []
+    packages: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        total, per_package = parse_importtime(_python(["-X", "importtime", "-c", f"import {module}"]).stderr, module)
+        totals.append(total)
+        for name, seconds in per_package.items():
+            packages[name].append(seconds)
+    return {
+        "total_s": round(statistics.median(totals), 4),
+        "packages_s": {name: round(statistics.median(values), 4) for name, values in packages.items()},
+    }
+
+
+def measure_startup(runs: int) -> Dict[str, float]:
+    """Median import and lifespan time of main over fresh interpreters"""
+    samples = [json.loads(_python(["-c", STARTUP_SCRIPT]).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    import_s = statistics.median(sample["import_s"] for sample in samples)
+    lifespan_s = statistics.median(sample["lifespan_s"] for sample in samples)
+    return {
+        "import_s": round(import_s, 4),
+        "lifespan_s": round(lifespan_s, 4),
+        "ready_s": round(import_s + lifespan_s, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Module to import for the importtime breakdown")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement (median reported)")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list in the breakdown")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {"import": measure_import(args.module, args.runs), "startup": measure_startup(args.runs)}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    imports = results["import"]
+    print(f"import {args.module}: {imports['total_s'] * 1000:.1f} ms (median of {args.runs})")
+    print(f"{'package':<28}{'self ms':>10}")
+    ranked = sorted(imports["packages_s"].items(), key=lambda item: item[1], reverse=True)
+    for name, seconds in ranked[:args.top]:
+        print(f"{name:<28}{seconds * 1000:>10.1f}")
+    startup = results["startup"]
+    print(
+        f"\nstartup: import {startup['import_s'] * 1000:.1f} ms + lifespan {startup['lifespan_s'] * 1000:.1f} ms"
+        f" = ready in {startup['ready_s'] * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load test for /api/v1/ask/stream
+
+Opens N concurrent SSE streams against the FastAPI app (in process, through
+httpx's ASGI transport) with stubbed LLM and search clients, and checks that
+the streams overlap instead of serializing on the event loop.
+
+Usage (from backend/):
+    python -m benchmarks.stream_load --streams 20 --llm-latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.fakes import Latency, install_fakes
+
+
+async def _consume_stream(client: httpx.AsyncClient, index: int) -> float:
+    """Run one streaming request to completion and return its duration"""
+    start = time.perf_counter()
+    payload = {"question": f"What is SWOT analysis? ({index})", "thread_id": f"load-{index}"}
+    async with client.stream("POST", "/api/v1/ask/stream", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("data: ") and json.loads(line[6:])["event"] == "error":
+                raise RuntimeError(line)
+    return time.perf_counter() - start
+
+
+async def run(streams: int, llm_latency: float, search_latency: float) -> dict:
+    """
+    Measure one stream alone, then N streams concurrently
+
+    Args:
+        streams: Number of concurrent streams
+        llm_latency: Simulated seconds per LLM call
+        search_latency: Simulated seconds per web search
+
+    Returns:
+        Timing summary
+    """
+    from api.routes import agent as agent_routes
+    from main import app
+
+    install_fakes(agent_routes.get_workflow(), Latency(llm_latency), Latency(search_latency))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        single = await _consume_stream(client, -1)
+
+        start = time.perf_counter()
+        durations = await asyncio.gather(*(_consume_stream(client, i) for i in range(streams)))
+        wall = time.perf_counter() - start
+
+    return {
+        "streams": streams,
+        "single_stream_s": round(single, 3),
+        "concurrent_wall_s": round(wall, 3),
+        "slowest_stream_s": round(max(durations), 3),
+        "serial_estimate_s": round(single * streams, 3),
+        # 1.0 means fully parallel, N means fully serialized
+        "serialization_factor": round(wall / single, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--max-factor", type=float, default=2.0,
+                        help="Fail if concurrent wall time exceeds this multiple of one stream")
+    args = parser.parse_args()
+
+    # Agents print banners on every node; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(run(args.streams, args.llm_latency, args.search_latency))
+
+    print(json.dumps(result, indent=2))
+    if result["serialization_factor"] > args.max_factor:
+        print(f"FAIL: {args.streams} streams serialized (factor {result['serialization_factor']})")
+        sys.exit(1)
+    print(f"OK: {args.streams} concurrent streams overlapped")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,170 @@ class Settings:
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "")
     MODEL_NAME: str = "llama-3.3-70b-versatile"
+    
+    # Shared LLM HTTP connection pool (see src/utils/llm_clients.py)
+    LLM_POOL_MAX_CONNECTIONS: int = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+    LLM_POOL_MAX_KEEPALIVE: int = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+    LLM_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_READ_TIMEOUT: float = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+    # Retries inside the Groq SDK; retries are done by src/utils/resilience.py
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "0"))
+    # Used only when the optional `h2` package is installed
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "true").lower() == "true"
     TAVILY_MAX_RESULTS: int = 4
     
+    # Tavily search result cache (in-process LRU + TTL, optional SQLite tier)
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_TTL_SECONDS: int = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "900"))
+    SEARCH_CACHE_MAX_BYTES: int = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Set to a file path to keep results across restarts and share them between workers
+    SEARCH_CACHE_DISK_PATH: str = os.getenv("SEARCH_CACHE_DISK_PATH", "")
+    
     # Agent configuration
     CONFIDENCE_THRESHOLD: int = 7
     
+    # Workflow configuration
+    # Run the Tavily search as a parallel branch next to the domain agent
+    PARALLEL_WEB_SEARCH: bool = os.getenv("PARALLEL_WEB_SEARCH", "true").lower() == "true"
+    # "standard" routes first, "speculative" runs all domain agents alongside
+    # the supervisor and keeps only the classified one
+    WORKFLOW_MODE: str = os.getenv("WORKFLOW_MODE", "standard")
+    
+    # Local fast-path classifier in front of the LLM supervisor
+    # (trained with `python -m src.routers.local_classifier train`)
+    LOCAL_CLASSIFIER_PATH: str = os.getenv("LOCAL_CLASSIFIER_PATH", "")
+    LOCAL_CLASSIFIER_THRESHOLD: float = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
+    # JSONL file receiving (question, classifier_response) pairs from the LLM supervisor
+    CLASSIFIER_LOG_PATH: str = os.getenv("CLASSIFIER_LOG_PATH", "")
+    # Size at which the log is rotated, and rotated files kept
+    CLASSIFIER_LOG_MAX_BYTES: int = int(os.getenv("CLASSIFIER_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+    CLASSIFIER_LOG_BACKUPS: int = int(os.getenv("CLASSIFIER_LOG_BACKUPS", "5"))
+    
+    # Semantic answer cache consulted before the graph runs
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    # Similarity needed for a hit with SEMANTIC_CACHE_EMBEDDING_MODEL set
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    # Similarity needed with the hashed n-gram fallback, which is lexical:
+    # "prices increasing" vs "prices decreasing" scores above 0.95, so only
+    # near-verbatim repeats may hit
+    SEMANTIC_CACHE_HASHED_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_HASHED_THRESHOLD", "0.99"))
+    SEMANTIC_CACHE_TTL_SECONDS: int = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+    # Optional sentence-transformers model; empty uses the hashed n-gram embedding
+    SEMANTIC_CACHE_EMBEDDING_MODEL: str = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "")
+    # Only serve/store answers for the first question of a thread, whose
+    # answer does not depend on earlier conversation
+    SEMANTIC_CACHE_FIRST_TURN_ONLY: bool = os.getenv("SEMANTIC_CACHE_FIRST_TURN_ONLY", "true").lower() == "true"
+    # Set to a file path to share cached answers between workers
+    SEMANTIC_CACHE_DISK_PATH: str = os.getenv("SEMANTIC_CACHE_DISK_PATH", "")
+    
+    # Identical questions (same normalized text and conversation history)
+    # arriving while one is being answered share that run
+    COALESCE_REQUESTS: bool = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+    
+    # Conversation checkpoints: "memory" (per process, lost on restart) or
+    # "sqlite" (durable, shared by all workers on one host)
+    CHECKPOINTER_BACKEND: str = os.getenv("CHECKPOINTER_BACKEND", "memory")
+    CHECKPOINT_DB_PATH: str = os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.sqlite")
+    # Retention for the sqlite backend: the last checkpoint of each of a
+    # thread's newest N turns is kept, intermediate ones are dropped once the
+    # next turn starts (0 keeps every turn)
+    CHECKPOINT_MAX_TURNS_PER_THREAD: int = int(os.getenv("CHECKPOINT_MAX_TURNS_PER_THREAD", "50"))
+    CHECKPOINT_THREAD_TTL_SECONDS: int = int(os.getenv("CHECKPOINT_THREAD_TTL_SECONDS", str(7 * 24 * 3600)))
+    
+    # Conversation history compaction: once a thread's messages exceed
+    # HISTORY_MAX_TOKENS, everything but the newest HISTORY_WINDOW_TOKENS is
+    # folded into one rolling summary message and pruned from the state
+    HISTORY_COMPACTION_ENABLED: bool = os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true"
+    HISTORY_MAX_TOKENS: int = int(os.getenv("HISTORY_MAX_TOKENS", "4000"))
+    HISTORY_WINDOW_TOKENS: int = int(os.getenv("HISTORY_WINDOW_TOKENS", "2000"))
+    HISTORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+    # Seconds startup waits for the optional tiktoken encoding (downloaded on
+    # first use); token counts use a local estimate until it is loaded
+    TOKENIZER_LOAD_TIMEOUT: float = float(os.getenv("TOKENIZER_LOAD_TIMEOUT", "10"))
+    
+    # Per-node prompt token budgets (system prompt + summary + history +
+    # context + question); the lowest-value parts are cut first
+    PROMPT_BUDGET_SUPERVISOR: int = int(os.getenv("PROMPT_BUDGET_SUPERVISOR", "1500"))
+    PROMPT_BUDGET_AGENT: int = int(os.getenv("PROMPT_BUDGET_AGENT", "3000"))
+    PROMPT_BUDGET_SYNTHESIS: int = int(os.getenv("PROMPT_BUDGET_SYNTHESIS", "4000"))
+    PROMPT_BUDGET_VALIDATOR: int = int(os.getenv("PROMPT_BUDGET_VALIDATOR", "3000"))
+    
+    # Answer validation: "llm" (every answer), "sampled" (LLM for
+    # VALIDATION_SAMPLE_RATE of answers, local heuristic for the rest),
+    # "heuristic" (local only) or "async" (LLM score attached after returning)
+    VALIDATION_MODE: str = os.getenv("VALIDATION_MODE", "llm")
+    VALIDATION_SAMPLE_RATE: float = float(os.getenv("VALIDATION_SAMPLE_RATE", "0.1"))
+    
+    # Admission control in front of Groq and Tavily calls (see
+    # src/utils/admission.py); a rate of 0 disables that limit
+    GROQ_MAX_CONCURRENCY: int = int(os.getenv("GROQ_MAX_CONCURRENCY", "32"))
+    GROQ_REQUESTS_PER_MINUTE: int = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "1000"))
+    GROQ_TOKENS_PER_MINUTE: int = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "300000"))
+    TAVILY_MAX_CONCURRENCY: int = int(os.getenv("TAVILY_MAX_CONCURRENCY", "8"))
+    TAVILY_REQUESTS_PER_MINUTE: int = int(os.getenv("TAVILY_REQUESTS_PER_MINUTE", "100"))
+    # Calls waiting for a slot beyond ADMISSION_MAX_QUEUE, or for longer than
+    # ADMISSION_QUEUE_TIMEOUT seconds, are rejected (HTTP 503 + Retry-After)
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "15"))
+    # Completion tokens charged to the tokens/minute budget per LLM call
+    LLM_EXPECTED_COMPLETION_TOKENS: int = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "600"))
+    
+    # Deadlines (seconds): a whole workflow run, and each provider call of a
+    # node type, whichever ends first
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "90"))
+    NODE_TIMEOUT_SUPERVISOR: float = float(os.getenv("NODE_TIMEOUT_SUPERVISOR", "15"))
+    NODE_TIMEOUT_AGENT: float = float(os.getenv("NODE_TIMEOUT_AGENT", "45"))
+    NODE_TIMEOUT_SYNTHESIS: float = float(os.getenv("NODE_TIMEOUT_SYNTHESIS", "45"))
+    NODE_TIMEOUT_VALIDATOR: float = float(os.getenv("NODE_TIMEOUT_VALIDATOR", "15"))
+    NODE_TIMEOUT_SUMMARY: float = float(os.getenv("NODE_TIMEOUT_SUMMARY", "30"))
+    NODE_TIMEOUT_SEARCH: float = float(os.getenv("NODE_TIMEOUT_SEARCH", "15"))
+    # Retries of transient provider errors with decorrelated jitter backoff
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", "0.25"))
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "4"))
+    # Hedged requests: a duplicate is sent once a call outlives the node's
+    # HEDGE_QUANTILE latency, for at most HEDGE_MAX_RATIO of calls
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_NODES: str = os.getenv("HEDGE_NODES", "supervisor,validator,search")
+    HEDGE_QUANTILE: float = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MAX_RATIO: float = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+    
+    # Prometheus metrics at /metrics and per-request timing breakdowns
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Structured logging (see src/utils/log.py): level of the application
+    # loggers, "json" or "text" records, share of records below WARNING that
+    # are kept, and records buffered for the writer thread before new ones
+    # are dropped
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    
+    # Batch endpoint: questions answered at once per batch, questions packed
+    # into one supervisor / validator LLM call, and how long a partial pack
+    # waits for more questions before it is sent
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+    BATCH_CLASSIFY_SIZE: int = int(os.getenv("BATCH_CLASSIFY_SIZE", "16"))
+    BATCH_SCORE_SIZE: int = int(os.getenv("BATCH_SCORE_SIZE", "8"))
+    BATCH_LINGER_SECONDS: float = float(os.getenv("BATCH_LINGER_SECONDS", "0.05"))
+    
+    # Production server (serve.py): worker processes (0 = one per available
+    # core) and bind address. Workers split the Groq/Tavily admission limits
+    # between them, so the host as a whole stays within the provider quotas
+    WORKERS: int = int(os.getenv("WORKERS", "0"))
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", "8000"))
+    
+    # Startup: the workflow is built in main.py's lifespan hook; with
+    # WARMUP_CONNECTIONS > 0 that many Groq connections are also opened
+    # there (and the Tavily client loaded) before the first request
+    WARMUP_CONNECTIONS: int = int(os.getenv("WARMUP_CONNECTIONS", "0"))
+    
     @classmethod
     def validate(cls):
         """Validate required settings"""
@@ -21,5 +180,13 @@ class Settings:
             raise ValueError("GROQ_API_KEY not found in environment")
         if not cls.TAVILY_API_KEY:
             raise ValueError("TAVILY_API_KEY not found in environment")
+        if cls.WORKFLOW_MODE not in ("standard", "speculative"):
+            raise ValueError(f"Unsupported WORKFLOW_MODE: {cls.WORKFLOW_MODE}")
+        if cls.VALIDATION_MODE not in ("llm", "sampled", "heuristic", "async"):
+            raise ValueError(f"Unsupported VALIDATION_MODE: {cls.VALIDATION_MODE}")
+        if cls.CHECKPOINTER_BACKEND not in ("memory", "sqlite"):
+            raise ValueError(f"Unsupported CHECKPOINTER_BACKEND: {cls.CHECKPOINTER_BACKEND}")
+        if cls.WORKERS > 1 and cls.CHECKPOINTER_BACKEND == "memory":
+            raise ValueError("CHECKPOINTER_BACKEND=memory keeps threads per process; use sqlite with WORKERS > 1")
 
 settings = Settings()
@@ -1,24 +1,69 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
 
 from config.settings import settings
-from api.routes.agent import router as agent_router
+from api.routes.agent import router as agent_router, get_workflow
 from api.middleware import setup_middleware
+from src.utils.llm_clients import llm_registry
+from src.utils.metrics import metrics
+from src.utils.log import setup_logging, shutdown_logging
+from src.utils.tokens import load_encoding
+
+
+# Hand log records to a background writer thread
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(workflow):
+    """Pre-open Groq connections and load the Tavily client before serving"""
+    start = time.perf_counter()
+    # Tavily requests open their own connections; loading the client is the slow part
+    loading = asyncio.to_thread(lambda: workflow.search_tools.tavily)
+    opened, _ = await asyncio.gather(llm_registry.warm_up(settings.WARMUP_CONNECTIONS), loading)
+    logger.info(
+        "Warm-up finished",
+        extra={"connections": opened, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+    )
+
+
+async def load_tokenizer():
+    """Load the tiktoken encoding off the event loop; counts are estimated until it is ready"""
+    try:
+        await asyncio.wait_for(asyncio.to_thread(load_encoding), settings.TOKENIZER_LOAD_TIMEOUT)
+    except asyncio.TimeoutError:
+        # The download keeps going in its thread and is used once it lands
+        logger.warning("tiktoken encoding still loading; estimating token counts meanwhile")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown"""
     # Startup
-    print("🚀 Starting FastAPI LangGraph Agent System...")
+    logger.info("Starting FastAPI LangGraph Agent System")
     settings.validate()
-    print("✅ Settings validated")
+    logger.info("Settings validated")
+    # Build agents, clients and graph here rather than at import time
+    start = time.perf_counter()
+    workflow = await asyncio.to_thread(get_workflow)
+    logger.info("Workflow ready", extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)})
+    await load_tokenizer()
+    if settings.WARMUP_CONNECTIONS > 0:
+        await warm_up(workflow)
     yield
     # Shutdown
-    print("👋 Shutting down FastAPI LangGraph Agent System...")
+    logger.info("Shutting down FastAPI LangGraph Agent System")
+    # Let background validations attach their scores before the pools close
+    await workflow.wait_for_validations()
+    await asyncio.to_thread(workflow.close_validation_pool)
+    await llm_registry.aclose()
+    shutdown_logging()
 
 
 # Initialize FastAPI app
@@ -65,6 +110,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics: node, LLM, search, cache and HTTP latencies, tokens and errors"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
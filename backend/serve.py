@@ -0,0 +1,107 @@
+"""
+Production entry point: several uvicorn worker processes on one host
+
+Any worker can serve any thread_id, because conversation state and caches
+live in local SQLite files shared by all workers instead of in process:
+
+- checkpoints: CHECKPOINTER_BACKEND=sqlite (CHECKPOINT_DB_PATH)
+- Tavily results: SEARCH_CACHE_DISK_PATH
+- semantic answer cache: SEMANTIC_CACHE_DISK_PATH
+
+These default to files under data/ unless set in the environment or .env.
+The parent process validates the settings and creates the stores once,
+then starts the workers. The workflow is not preloaded in the parent:
+uvicorn spawns each worker as a fresh interpreter, so nothing built here
+would be inherited. Each worker builds its own workflow in the app's
+lifespan startup, before it accepts connections.
+
+Usage (from backend/):
+    python serve.py                 # one worker per available core
+    python serve.py --workers 4
+"""
+import argparse
+import logging
+import os
+
+from dotenv import load_dotenv
+
+
+# Shared stores used when the environment does not choose one
+SHARED_STATE_DEFAULTS = {
+    "CHECKPOINTER_BACKEND": "sqlite",
+    "SEARCH_CACHE_DISK_PATH": "data/search_cache.sqlite",
+    "SEMANTIC_CACHE_DISK_PATH": "data/semantic_cache.sqlite"
+}
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects affinity masks / cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def configure_environment(workers: int):
+    """
+    Set the shared-state defaults and the worker count for the workers
+
+    Workers are spawned as fresh interpreters and read their settings from
+    the environment, so this runs before config.settings is imported.
+
+    Args:
+        workers: Number of worker processes (0 = one per available core)
+    """
+    # .env values win over the defaults below
+    load_dotenv()
+    for name, value in SHARED_STATE_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+    os.environ["WORKERS"] = str(workers or int(os.getenv("WORKERS", "0")) or available_cores())
+
+
+def prepare_shared_state():
+    """Validate settings and create the shared stores before any worker starts"""
+    from config.settings import settings
+    from src.utils.cache import DiskCache
+    from src.utils.checkpointer import build_checkpointer
+    from src.utils.semantic_cache import SemanticCacheStore
+
+    settings.validate()
+    build_checkpointer()
+    if settings.SEARCH_CACHE_ENABLED and settings.SEARCH_CACHE_DISK_PATH:
+        DiskCache(settings.SEARCH_CACHE_DISK_PATH, settings.SEARCH_CACHE_TTL_SECONDS).purge_expired()
+    if settings.SEMANTIC_CACHE_ENABLED and settings.SEMANTIC_CACHE_DISK_PATH:
+        SemanticCacheStore(settings.SEMANTIC_CACHE_DISK_PATH, settings.SEMANTIC_CACHE_TTL_SECONDS).purge_expired()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: WORKERS, else one per core)")
+    parser.add_argument("--host", default=None, help="Bind address (default: HOST)")
+    parser.add_argument("--port", type=int, default=None, help="Port (default: PORT)")
+    args = parser.parse_args()
+
+    configure_environment(args.workers)
+    prepare_shared_state()
+
+    import uvicorn
+    from config.settings import settings
+    from src.utils.log import setup_logging
+
+    setup_logging()
+    logging.getLogger(__name__).info(
+        "Starting workers",
+        extra={"workers": settings.WORKERS, "checkpointer": settings.CHECKPOINTER_BACKEND}
+    )
+    uvicorn.run(
+        "main:app",
+        host=args.host or settings.HOST,
+        port=args.port or settings.PORT,
+        workers=settings.WORKERS,
+        log_level=settings.LOG_LEVEL.lower(),
+        # Uvicorn's own access log would duplicate api/middleware.py's
+        access_log=False
+    )
+
+
+if __name__ == "__main__":
+    main()
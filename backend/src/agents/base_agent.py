@@ -1,9 +1,16 @@
+import logging
 from abc import ABC, abstractmethod
 from typing import Dict, List
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
+from langchain_core.messages import BaseMessage
 from config.settings import settings
+from src.utils.llm_clients import get_chat_model
+from src.utils.streaming import ANSWER_STREAM_TAG
+from src.utils.history import conversation_view
+from src.utils.prompt_assembly import PromptAssembler
+from src.utils.resilience import aresilient_invoke, resilient_invoke
+
+
+logger = logging.getLogger(__name__)
 
 
 class BaseAgent(ABC):
@@ -11,7 +18,8 @@ class BaseAgent(ABC):
     
     def __init__(self, model_name: str = settings.MODEL_NAME):
         self.model_name = model_name
-        self.llm = ChatGroq(model=model_name)
+        self.llm = get_chat_model(model_name)
+        self.assembler = PromptAssembler(settings.PROMPT_BUDGET_AGENT)
     
     @abstractmethod
     def get_prompt(self) -> str:
@@ -23,6 +31,28 @@ class BaseAgent(ABC):
         """Process the state and return updated state"""
         pass
     
+    @abstractmethod
+    async def aprocess(self, state: Dict) -> Dict:
+        """Async variant of process using the non-blocking LLM client"""
+        pass
+    
+    def build_messages(self, prompt: str, question: str, conversation_history: List[BaseMessage] = None) -> List[BaseMessage]:
+        """
+        Build the message list sent to the LLM
+        
+        Args:
+            prompt: System prompt template
+            question: User question
+            conversation_history: Previous messages in conversation
+            
+        Returns:
+            Ordered list of messages
+        """
+        # Fit summary, question/answer history and question into the agent's
+        # token budget (drafts and validator scores are left out)
+        summary, conversation_history = conversation_view(conversation_history, question)
+        return self.assembler.assemble(prompt, f"question: {question}", conversation_history, summary)
+    
     def invoke_llm(self, prompt: str, question: str, conversation_history: List[BaseMessage] = None) -> str:
         """
         Common method to invoke LLM with prompt and conversation history
@@ -35,25 +65,31 @@ class BaseAgent(ABC):
         Returns:
             LLM response content
         """
-        # Build message list with history
-        messages = [SystemMessage(content=prompt)]
+        messages = self.build_messages(prompt, question, conversation_history)
         
-        # Add conversation history if available (last 10 messages to avoid token limits)
-        if conversation_history:
-            # Take last 10 messages to keep context manageable
-            recent_history = conversation_history[-10:] if len(conversation_history) > 10 else conversation_history
-            messages.extend(recent_history)
+        # Tagged so token-streaming clients receive this call's output
+        response = resilient_invoke("agent", self.llm, messages, config={"tags": [ANSWER_STREAM_TAG]})
         
-        # Add current question
-        messages.append(HumanMessage(content=f"question: {question}"))
+        return response.content
+    
+    async def ainvoke_llm(self, prompt: str, question: str, conversation_history: List[BaseMessage] = None) -> str:
+        """
+        Async variant of invoke_llm using the non-blocking Groq client
+        
+        Args:
+            prompt: System prompt template
+            question: User question
+            conversation_history: Previous messages in conversation
+            
+        Returns:
+            LLM response content
+        """
+        messages = self.build_messages(prompt, question, conversation_history)
         
-        response = self.llm.invoke(messages)
+        response = await aresilient_invoke("agent", self.llm, messages, config={"tags": [ANSWER_STREAM_TAG]})
         
         return response.content
     
     def log_workflow(self, agent_name: str, content: str):
         """Log workflow information"""
-        print(f"\n{'='*50}")
-        print(f"[{agent_name}] Workflow")
-        print(f"{'='*50}")
-        print(f"{content[:200]}..." if len(content) > 200 else content)
+        logger.info("Agent answer", extra={"agent": agent_name, "chars": len(content), "preview": content[:200]})
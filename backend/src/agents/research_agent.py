@@ -3,6 +3,7 @@ from langchain_core.messages import AIMessage
 from src.agents.base_agent import BaseAgent
 from src.utils.state import AgentState
 from config.prompts import PromptTemplates
+from src.utils.history import DRAFT, tag_message
 
 
 class ResearchAgent(BaseAgent):
@@ -33,7 +34,34 @@ class ResearchAgent(BaseAgent):
         
         return {
             "research_generate": response_content,
-            "messages": [AIMessage(content=response_content)],  # Append to messages
+            "messages": [tag_message(AIMessage(content=response_content), DRAFT)],  # Append to messages
+            "next": "research_analyst",
+            "question": question
+        }
+    
+    async def aprocess(self, state: AgentState) -> Dict:
+        """
+        Async variant of process using the non-blocking LLM client
+        
+        Args:
+            state: Current agent state
+            
+        Returns:
+            Updated state with research response
+        """
+        question = state.get("question", "No content")
+        prompt = self.get_prompt()
+        
+        # Get conversation history from state
+        conversation_history = state.get("messages", [])
+        
+        # Invoke LLM with history
+        response_content = await self.ainvoke_llm(prompt, question, conversation_history)
+        self.log_workflow("Research Agent", response_content)
+        
+        return {
+            "research_generate": response_content,
+            "messages": [tag_message(AIMessage(content=response_content), DRAFT)],  # Append to messages
             "next": "research_analyst",
             "question": question
         }
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Groups single requests into batched calls
+    
+    Callers submit one item each and await its result; items are sent
+    together once max_size of them are waiting or the oldest has waited
+    linger seconds, whichever comes first. Used by AgentWorkflow.abatch to
+    pack several supervisor or validator requests into one LLM call.
+    
+    Args:
+        func: Coroutine function mapping a list of items to a list of
+            results in the same order
+        max_size: Most items per call
+        linger: Seconds a partial batch waits for more items
+    """
+    
+    def __init__(
+        self,
+        func: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int,
+        linger: float
+    ):
+        self.func = func
+        self.max_size = max(1, max_size)
+        self.linger = linger
+        self.calls = 0
+        self.items = 0
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+    
+    async def submit(self, item: Any) -> Any:
+        """
+        Add an item to the next batch and wait for its result
+        
+        Args:
+            item: Request item passed to func
+        
+        Returns:
+            The item's result
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger, self.flush)
+        return await future
+    
+    def flush(self):
+        """Send the waiting items now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        self.calls += 1
+        self.items += len(batch)
+        try:
+            results = await self.func([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def close(self):
+        """Drop waiting items and cancel calls in flight"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in list(self._tasks):
+            task.cancel()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "items": self.items}
@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage
+
+from src.utils.history import conversation_view
+from src.utils.tools import normalize_query
+
+
+def coalesce_key(question: str, messages: List[BaseMessage], defer_validation: bool = False) -> str:
+    """
+    Key under which identical in-flight questions share one workflow run
+    
+    Two requests coalesce when they ask the same (normalized) question on top
+    of the same conversation, i.e. the same summary and question/answer
+    history, so the shared answer is the one each would have received.
+    
+    Args:
+        question: User question
+        messages: Contents of the requester's state["messages"]
+        defer_validation: Whether the answer is returned before scoring
+    
+    Returns:
+        Hex digest key
+    """
+    summary, history = conversation_view(messages, question)
+    digest = hashlib.sha1(summary.encode())
+    for message in history:
+        digest.update(f"\x00{message.type}\x00{message.content}".encode())
+    return f"{normalize_query(question)}|{int(defer_validation)}|{digest.hexdigest()}"
+
+
+class Flight:
+    """
+    One shared async workflow run
+    
+    The run publishes its stream events into a replayable log, so
+    subscribers that attach late still see every event, then the final
+    thread state. When the last subscriber leaves before the end, the run
+    is cancelled.
+    """
+    
+    def __init__(self, config: Dict):
+        self.config = config
+        self.events: List[Dict[str, Any]] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        # Background validation task of the run, when its score is pending
+        self.validation: Optional[asyncio.Task] = None
+        self.task: Optional[asyncio.Task] = None
+        self._subscribers = 0
+        self._wake = asyncio.Event()
+    
+    @property
+    def thread_id(self) -> str:
+        return self.config["configurable"]["thread_id"]
+    
+    def _notify(self):
+        wake, self._wake = self._wake, asyncio.Event()
+        wake.set()
+    
+    def publish(self, event: Dict[str, Any]):
+        """Append a stream event and wake subscribers"""
+        self.events.append(event)
+        self._notify()
+    
+    def finish(self, result: Optional[Dict] = None, error: Optional[BaseException] = None):
+        """Record the final thread state (or the failure) and wake subscribers"""
+        self.result = result
+        self.error = error
+        self.done = True
+        self._notify()
+    
+    def _attach(self):
+        self._subscribers += 1
+    
+    def _detach(self):
+        self._subscribers -= 1
+        if self._subscribers == 0 and not self.done and self.task is not None:
+            # Nobody is waiting for the answer any more
+            self.task.cancel()
+    
+    def _outcome(self) -> Dict:
+        if self.error is not None:
+            raise self.error
+        return self.result
+    
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every event of the run, from the first one, until it finishes"""
+        self._attach()
+        try:
+            index = 0
+            while True:
+                wake = self._wake
+                while index < len(self.events):
+                    yield self.events[index]
+                    index += 1
+                if self.done:
+                    return
+                await wake.wait()
+        finally:
+            self._detach()
+    
+    async def wait(self) -> Dict:
+        """
+        Wait for the run to finish
+        
+        Returns:
+            Final state of the thread the run executed on
+        
+        Raises:
+            The exception the run failed with
+        """
+        self._attach()
+        try:
+            while not self.done:
+                await self._wake.wait()
+        finally:
+            self._detach()
+        return self._outcome()
+
+
+class SyncFlight:
+    """One shared synchronous workflow run"""
+    
+    def __init__(self, config: Dict):
+        self.config = config
+        self.future: Future = Future()
+        # Background validation future of the run, when its score is pending
+        self.validation: Optional[Future] = None
+    
+    @property
+    def thread_id(self) -> str:
+        return self.config["configurable"]["thread_id"]
+
+
+class RunCoalescer:
+    """
+    Registry of in-flight workflow runs by coalesce key
+    
+    The first request for a key leads and starts the run; concurrent
+    requests with the same key follow it. Async flights are shared by the
+    callers of one event loop, sync flights by the callers of all threads.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, Any] = {}
+        self.runs = 0
+        self.coalesced = 0
+    
+    def _join(self, key: Any, factory) -> Tuple[Any, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = factory()
+            self.runs += 1
+            return flight, True
+    
+    def join(self, key: str, config: Dict) -> Tuple[Flight, bool]:
+        """
+        Attach to the async run for key, creating it if there is none
+        
+        Args:
+            key: Coalesce key
+            config: Thread config of the caller (used when it leads)
+        
+        Returns:
+            Tuple of (flight, whether the caller leads the run)
+        """
+        return self._join((id(asyncio.get_running_loop()), key), lambda: Flight(config))
+    
+    def join_sync(self, key: str, config: Dict) -> Tuple[SyncFlight, bool]:
+        """Sync variant of join"""
+        return self._join(key, lambda: SyncFlight(config))
+    
+    def leave(self, key: str, flight: Any):
+        """Stop routing new requests to a finished run"""
+        if isinstance(flight, Flight):
+            key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"runs": self.runs, "coalesced": self.coalesced, "in_flight": len(self._flights)}
@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackManager, UsageMetadataCallbackHandler
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.agents.base_agent import BaseAgent
+from src.routers.supervisor import SupervisorAgent
+from src.utils.state import AgentState
+from src.utils.deadline import REQUEST_DEADLINE_KEY, request_deadline
+from src.utils.streaming import SPECULATIVE_BRANCH_KEY
+from src.utils.tokens import count_message_tokens
+
+
+class SpeculationStats:
+    """Thread-safe counters describing the cost and benefit of speculation"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.cancelled_branches = 0
+        self.discarded_branches = 0
+        self.wasted_tokens = 0
+        self.saved_ms = 0.0
+    
+    def record_run(self, saved_ms: float):
+        with self._lock:
+            self.runs += 1
+            self.saved_ms += max(saved_ms, 0.0)
+    
+    def record_cancelled(self, estimated_tokens: int):
+        with self._lock:
+            self.cancelled_branches += 1
+            self.wasted_tokens += estimated_tokens
+    
+    def record_discarded(self, tokens: int):
+        with self._lock:
+            self.discarded_branches += 1
+            self.wasted_tokens += tokens
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as a plain dict"""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "cancelled_branches": self.cancelled_branches,
+                "discarded_branches": self.discarded_branches,
+                "wasted_tokens": self.wasted_tokens,
+                "saved_ms_total": round(self.saved_ms, 1),
+                "saved_ms_avg": round(self.saved_ms / self.runs, 1) if self.runs else 0.0
+            }
+
+
+def _total_tokens(handler: UsageMetadataCallbackHandler) -> int:
+    """Sum the tokens recorded by a usage callback across models"""
+    return sum(usage.get("total_tokens", 0) for usage in handler.usage_metadata.values())
+
+
+def _estimate_prompt_tokens(agent: BaseAgent, state: AgentState) -> int:
+    """
+    Input-token estimate for a branch cancelled before it reported usage
+    (providers bill the prompt even if the response is abandoned)
+    
+    Used by both run and arun, so the sync and async paths report the same
+    waste for the same cancellation.
+    """
+    messages = agent.build_messages(agent.get_prompt(), state["question"], state.get("messages", []))
+    return count_message_tokens(messages)
+
+
+class SpeculativeDispatcher:
+    """
+    Runs the supervisor and all domain agents concurrently
+    
+    Once the classification arrives the winning agent's output is kept and the
+    other branches are cancelled (async) or discarded (sync). Each branch runs
+    under the node's config plus its own usage handler, so its usage can be
+    attributed to the branch; its tokens are marked with the branch name and
+    only the winner's are forwarded to streaming clients (see
+    SpeculativeTokens).
+    """
+    
+    def __init__(
+        self,
+        supervisor: SupervisorAgent,
+        agents: Dict[str, BaseAgent],
+        search: Optional[Tuple[Callable, Callable]] = None,
+        max_workers: int = 16
+    ):
+        self.supervisor = supervisor
+        self.agents = agents
+        # Optional (sync, async) search node functions to run in the same fan-out
+        self.search = search
+        self.stats = SpeculationStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+    
+    @staticmethod
+    def _branch_config(name: str, handler: UsageMetadataCallbackHandler, deadline: Optional[float]) -> Dict:
+        """
+        Extend the node's runnable config for one branch
+        
+        Thread id, node metadata, tags and stream handlers are kept, so logs,
+        metrics and the token stream still see the branch as part of the node.
+        """
+        parent = var_child_runnable_config.get() or {}
+        callbacks = parent.get("callbacks")
+        if isinstance(callbacks, BaseCallbackManager):
+            callbacks = callbacks.copy()
+            callbacks.add_handler(handler)
+        else:
+            callbacks = [*(callbacks or []), handler]
+        return {
+            **parent,
+            "callbacks": callbacks,
+            "metadata": {**(parent.get("metadata") or {}), SPECULATIVE_BRANCH_KEY: name},
+            "configurable": {**(parent.get("configurable") or {}), REQUEST_DEADLINE_KEY: deadline}
+        }
+    
+    @classmethod
+    def _isolated(
+        cls, name: str, func: Callable, state: AgentState, deadline: Optional[float] = None
+    ) -> Tuple[Dict, UsageMetadataCallbackHandler, float]:
+        """
+        Run a sync branch with its own usage handler (keeping the run deadline)
+        
+        Submit it through copy_context().run, so the config set here stays in
+        the copy instead of leaking into the pool thread's next task and the
+        request's context variables (request id, timings) reach the branch.
+        """
+        handler = UsageMetadataCallbackHandler()
+        var_child_runnable_config.set(cls._branch_config(name, handler, deadline))
+        start = time.perf_counter()
+        result = func(state)
+        return result, handler, (time.perf_counter() - start) * 1000
+    
+    @classmethod
+    async def _aisolated(
+        cls, name: str, func: Callable, state: AgentState, deadline: Optional[float] = None
+    ) -> Tuple[Dict, UsageMetadataCallbackHandler, float]:
+        """Run an async branch with its own usage handler (tasks copy the context)"""
+        handler = UsageMetadataCallbackHandler()
+        var_child_runnable_config.set(cls._branch_config(name, handler, deadline))
+        start = time.perf_counter()
+        result = await func(state)
+        return result, handler, (time.perf_counter() - start) * 1000
+    
+    def _merge(self, classification: Dict, winner: Dict, search: Optional[Dict]) -> Dict:
+        """Combine supervisor, winning agent and search updates into one state update"""
+        update = {**winner, **classification, **(search or {})}
+        update["messages"] = list(classification["messages"]) + list(winner["messages"])
+        return update
+    
+    def run(self, state: AgentState) -> Dict:
+        """
+        Speculatively execute all domain agents alongside classification (sync)
+        
+        Args:
+            state: Current agent state
+        
+        Returns:
+            Merged update with classification, winning agent output and search results
+        """
+        start = time.perf_counter()
+        branches: Dict[str, Future] = {
+            name: self._executor.submit(
+                copy_context().run, self._isolated, name, agent.process, state, request_deadline()
+            )
+            for name, agent in self.agents.items()
+        }
+        search_future = self._executor.submit(copy_context().run, self.search[0], state) if self.search else None
+        
+        try:
+            classify_start = time.perf_counter()
+            classification = self.supervisor.classify(state)
+            classify_ms = (time.perf_counter() - classify_start) * 1000
+            route = self.supervisor.route({**state, **classification})
+            if route not in branches:
+                raise ValueError(f"Unknown route from supervisor: {route}")
+        except BaseException:
+            # Queued branches never start; running ones finish and are dropped
+            for future in branches.values():
+                future.cancel()
+            if search_future:
+                search_future.cancel()
+            raise
+        
+        for name, future in branches.items():
+            if name == route:
+                continue
+            if future.cancel():
+                self.stats.record_cancelled(_estimate_prompt_tokens(self.agents[name], state))
+            else:
+                # Already running; account for its tokens once it finishes
+                future.add_done_callback(
+                    lambda done: self.stats.record_discarded(
+                        _total_tokens(done.result()[1]) if not done.exception() else 0
+                    )
+                )
+        
+        try:
+            winner, _, winner_ms = branches[route].result()
+        except BaseException:
+            if search_future:
+                search_future.cancel()
+            raise
+        search_update = search_future.result() if search_future else None
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats.record_run(classify_ms + winner_ms - elapsed_ms)
+        return self._merge(classification, winner, search_update)
+    
+    async def arun(self, state: AgentState) -> Dict:
+        """
+        Speculatively execute all domain agents alongside classification (async)
+        
+        Args:
+            state: Current agent state
+        
+        Returns:
+            Merged update with classification, winning agent output and search results
+        """
+        start = time.perf_counter()
+        branches: Dict[str, asyncio.Task] = {
+            name: asyncio.create_task(self._aisolated(name, agent.aprocess, state, request_deadline()))
+            for name, agent in self.agents.items()
+        }
+        search_task = asyncio.create_task(self.search[1](state)) if self.search else None
+        
+        try:
+            classify_start = time.perf_counter()
+            classification = await self.supervisor.aclassify(state)
+            classify_ms = (time.perf_counter() - classify_start) * 1000
+            route = self.supervisor.route({**state, **classification})
+            if route not in branches:
+                raise ValueError(f"Unknown route from supervisor: {route}")
+        except BaseException:
+            for task in branches.values():
+                task.cancel()
+            if search_task:
+                search_task.cancel()
+            raise
+        
+        for name, task in branches.items():
+            if name == route:
+                continue
+            if task.done() and not task.cancelled() and not task.exception():
+                self.stats.record_discarded(_total_tokens(task.result()[1]))
+            else:
+                task.cancel()
+                self.stats.record_cancelled(_estimate_prompt_tokens(self.agents[name], state))
+        
+        try:
+            winner, _, winner_ms = await branches[route]
+        except BaseException:
+            if search_task:
+                search_task.cancel()
+                # Retrieve the outcome so a failed search is not reported as unhandled
+                await asyncio.gather(search_task, return_exceptions=True)
+            raise
+        search_update = await search_task if search_task else None
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats.record_run(classify_ms + winner_ms - elapsed_ms)
+        return self._merge(classification, winner, search_update)
@@ -1,39 +1,153 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from langgraph.graph import StateGraph, END
-from typing import Dict, Optional
+from langchain_core.runnables import RunnableLambda
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from langchain_core.messages import AIMessage, HumanMessage
+from config.settings import settings
 from src.utils.state import AgentState
-from src.routers.supervisor import SupervisorAgent
+from src.utils.schemas import ConfidenceScore, SupervisorResponse
+from src.routers.supervisor import ROUTING_HINT_KEY, SupervisorAgent
+from src.routers.local_classifier import HashedNgramClassifier
 from src.agents.business_agent import BusinessAgent
 from src.agents.research_agent import ResearchAgent
 from src.agents.technical_agent import TechnicalAgent
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from src.synthesis.synthesis_agents import (
     BusinessSynthesis,
     ResearchSynthesis,
     TechnicalSynthesis
 )
-from src.validators.validator import ValidatorAgent
+from src.validators.validator import PENDING_SCORE, ValidatorAgent
+from src.graph.speculative import SpeculativeDispatcher
+from src.graph.coalescing import Flight, RunCoalescer, SyncFlight, coalesce_key
+from src.graph.batching import MicroBatcher
+from src.utils.streaming import TOKEN_STREAM_MODES, SpeculativeTokens, iter_stream_events
+from src.utils.tools import search_tools
+from src.utils.semantic_cache import SemanticCache, build_semantic_cache
+from src.utils.llm_clients import llm_registry
+from src.utils.checkpointer import build_checkpointer
+from src.utils.admission import AdmissionRejected, admission
+from src.utils.resilience import resilience
+from src.utils.deadline import REQUEST_DEADLINE_KEY
+from src.utils.metrics import instrument_node, record_cache
+from src.utils.history import ANSWER, QUESTION, SCORE, HistoryCompactor, tag_message
+
+
+logger = logging.getLogger(__name__)
+
+
+# State keys served from the semantic cache
+CACHED_KEYS = ("final_data", "validator_score", "classifier_response", "region_response")
 
 
 class AgentWorkflow:
     """Main workflow orchestrator for the agent system"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        parallel_search: Optional[bool] = None,
+        mode: Optional[str] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None
+    ):
+        # Run web search alongside the domain agent instead of inside synthesis
+        self.parallel_search = settings.PARALLEL_WEB_SEARCH if parallel_search is None else parallel_search
+        self.search_tools = search_tools
+        self.mode = mode or settings.WORKFLOW_MODE
+        if self.mode not in ("standard", "speculative"):
+            raise ValueError(f"Unsupported workflow mode: {self.mode}")
+        
         # Initialize all agents
-        self.supervisor = SupervisorAgent()
+        self.supervisor = SupervisorAgent(fast_classifier=self._load_fast_classifier())
         self.business_agent = BusinessAgent()
         self.research_agent = ResearchAgent()
         self.technical_agent = TechnicalAgent()
-        self.business_synthesis = BusinessSynthesis()
-        self.research_synthesis = ResearchSynthesis()
-        self.technical_synthesis = TechnicalSynthesis()
+        self.business_synthesis = BusinessSynthesis(prefetched_search=self.parallel_search)
+        self.research_synthesis = ResearchSynthesis(prefetched_search=self.parallel_search)
+        self.technical_synthesis = TechnicalSynthesis(prefetched_search=self.parallel_search)
         self.validator = ValidatorAgent()
         
-        # Initialize memory saver
-        self.memory = MemorySaver()
+        # Keeps the stored conversation within a token budget
+        self.history_compactor = HistoryCompactor() if settings.HISTORY_COMPACTION_ENABLED else None
+        
+        # Speculative mode runs every domain agent alongside the supervisor
+        self.speculative = None
+        if self.mode == "speculative":
+            self.speculative = SpeculativeDispatcher(
+                self.supervisor,
+                {
+                    "business": self.business_agent,
+                    "research": self.research_agent,
+                    "technical": self.technical_agent
+                },
+                search=(self._web_search, self._aweb_search) if self.parallel_search else None
+            )
+        
+        # Semantic answer cache consulted before the graph runs
+        self.semantic_cache = semantic_cache or build_semantic_cache()
+        
+        # Background LLM validation of answers returned with a pending score
+        self._validation_executor: Optional[ThreadPoolExecutor] = None
+        self._validation_tasks = set()
+        
+        # Identical concurrent questions share one graph run
+        self.coalescer = RunCoalescer() if settings.COALESCE_REQUESTS else None
+        self.batch_counts = {"batches": 0, "questions": 0, "runs": 0, "deduplicated": 0}
+        
+        # Initialize checkpointer (in-memory or SQLite, see CHECKPOINTER_BACKEND)
+        self.memory = checkpointer or build_checkpointer()
         
         # Build graph
         self.app = self._build_graph()
     
+    @staticmethod
+    def _load_fast_classifier() -> Optional[HashedNgramClassifier]:
+        """Load the local routing classifier if one is configured"""
+        path = settings.LOCAL_CLASSIFIER_PATH
+        if not path:
+            return None
+        if not os.path.exists(path):
+            logger.warning("Local classifier not found; using LLM supervisor only", extra={"path": path})
+            return None
+        return HashedNgramClassifier.load(path)
+    
+    @staticmethod
+    def _node(name: str, func: Callable, afunc: Callable) -> RunnableLambda:
+        """
+        Wrap a node so the graph uses the sync or async implementation
+        depending on whether it is invoked or awaited, and records its
+        latency and errors (see src/utils/metrics.py)
+        
+        Args:
+            name: Node name in the graph
+            func: Synchronous node implementation
+            afunc: Asynchronous node implementation
+        
+        Returns:
+            Runnable exposing both implementations
+        """
+        func, afunc = instrument_node(name, func, afunc)
+        return RunnableLambda(func, afunc=afunc)
+    
+    def _web_search(self, state: AgentState) -> Dict:
+        """Search branch run in parallel with the domain agent"""
+        result = self.search_tools.search(state["question"])
+        return {"web_search_content": str(result) if result is not None else None}
+    
+    async def _aweb_search(self, state: AgentState) -> Dict:
+        """Async variant of the parallel search branch"""
+        result = await self.search_tools.asearch(state["question"])
+        return {"web_search_content": str(result) if result is not None else None}
+    
+    def _route_with_search(self, state: AgentState) -> List[str]:
+        """Fan out to the classified domain agent and the web search branch"""
+        return [self.supervisor.route(state), "web_search"]
+    
     def _build_graph(self):
         """
         Construct the LangGraph workflow
@@ -43,75 +157,841 @@ class AgentWorkflow:
         """
         graph = StateGraph(AgentState)
         
-        # Add nodes
-        graph.add_node("supervisor", self.supervisor.classify)
-        graph.add_node("business", self.business_agent.process)
-        graph.add_node("research", self.research_agent.process)
-        graph.add_node("technical", self.technical_agent.process)
-        graph.add_node("business_analyst", self.business_synthesis.process)
-        graph.add_node("research_analyst", self.research_synthesis.process)
-        graph.add_node("technical_analyst", self.technical_synthesis.process)
-        graph.add_node("validator", self.validator.validate)
+        # Add nodes shared by both modes
+        graph.add_node("business_analyst", self._node("business_analyst", self.business_synthesis.process, self.business_synthesis.aprocess))
+        graph.add_node("research_analyst", self._node("research_analyst", self.research_synthesis.process, self.research_synthesis.aprocess))
+        graph.add_node("technical_analyst", self._node("technical_analyst", self.technical_synthesis.process, self.technical_synthesis.aprocess))
+        graph.add_node("validator", self._node("validator", self.validator.validate, self.validator.avalidate))
+        
+        if self.speculative:
+            # Classification, all domain agents and web search in one fan-out node
+            graph.add_node("speculate", self._node("speculate", self.speculative.run, self.speculative.arun))
+            graph.set_entry_point("speculate")
+            graph.add_conditional_edges(
+                "speculate",
+                self.supervisor.route,
+                {
+                    "business": "business_analyst",
+                    "research": "research_analyst",
+                    "technical": "technical_analyst"
+                }
+            )
+        else:
+            self._add_routed_agents(graph)
+        
+        # All analysts feed the validator
+        graph.add_edge("business_analyst", "validator")
+        graph.add_edge("research_analyst", "validator")
+        graph.add_edge("technical_analyst", "validator")
+        
+        if self.history_compactor:
+            # Compact the conversation after the answer has been validated
+            graph.add_node("compact_history", self._node("compact_history", self.history_compactor.compact, self.history_compactor.acompact))
+            graph.add_edge("validator", "compact_history")
+            graph.add_edge("compact_history", END)
+        else:
+            # End at validator
+            graph.add_edge("validator", END)
+        
+        return graph.compile(checkpointer=self.memory)
+    
+    @property
+    def terminal_node(self) -> str:
+        """Name of the last node before END"""
+        return "compact_history" if self.history_compactor else "validator"
+    
+    def _add_routed_agents(self, graph: StateGraph):
+        """
+        Add the supervisor and domain agent nodes of the standard mode
+        
+        Args:
+            graph: Graph under construction
+        """
+        graph.add_node("supervisor", self._node("supervisor", self.supervisor.classify, self.supervisor.aclassify))
+        graph.add_node("business", self._node("business", self.business_agent.process, self.business_agent.aprocess))
+        graph.add_node("research", self._node("research", self.research_agent.process, self.research_agent.aprocess))
+        graph.add_node("technical", self._node("technical", self.technical_agent.process, self.technical_agent.aprocess))
         
         # Set entry point
         graph.set_entry_point("supervisor")
         
-        # Add conditional edges from supervisor
-        graph.add_conditional_edges(
-            "supervisor",
-            self.supervisor.route,
-            {
-                "business": "business",
-                "research": "research",
-                "technical": "technical"
+        if self.parallel_search:
+            graph.add_node("web_search", self._node("web_search", self._web_search, self._aweb_search))
+            
+            # Supervisor fans out to the domain agent and web search together
+            graph.add_conditional_edges(
+                "supervisor",
+                self._route_with_search,
+                ["business", "research", "technical", "web_search"]
+            )
+            
+            # Each analyst joins its domain agent with the search branch
+            graph.add_edge(["business", "web_search"], "business_analyst")
+            graph.add_edge(["research", "web_search"], "research_analyst")
+            graph.add_edge(["technical", "web_search"], "technical_analyst")
+        else:
+            # Add conditional edges from supervisor
+            graph.add_conditional_edges(
+                "supervisor",
+                self.supervisor.route,
+                {
+                    "business": "business",
+                    "research": "research",
+                    "technical": "technical"
+                }
+            )
+            
+            # Add edges for each domain path
+            graph.add_edge("business", "business_analyst")
+            graph.add_edge("research", "research_analyst")
+            graph.add_edge("technical", "technical_analyst")
+    
+    def _cached_update(self, question: str, cached: Dict) -> Dict:
+        """Build the thread update recording a cache-served turn"""
+        return {
+            "question": question,
+            **{key: cached.get(key, "") for key in CACHED_KEYS},
+            "messages": [
+                tag_message(HumanMessage(content=question), QUESTION),
+                tag_message(AIMessage(content=cached.get("final_data", "")), ANSWER)
+            ]
+        }
+    
+    def _shared_update(self, question: str, values: Dict) -> Dict:
+        """Build the thread update recording a turn answered by a shared run"""
+        update = self._cached_update(question, values)
+        update["validation_source"] = values.get("validation_source", "")
+        return update
+    
+    @staticmethod
+    def _score_update(values: Dict) -> Dict:
+        """Build the update copying a thread's validation score to another thread"""
+        return {
+            "validator_score": values.get("validator_score", ""),
+            "validation_source": values.get("validation_source", ""),
+            "messages": tag_message(AIMessage(content=str(values.get("validator_score", ""))), SCORE)
+        }
+    
+    @staticmethod
+    def _config(thread_id: str, defer_validation: bool = False) -> Dict:
+        """Build the run config of a thread, with the deadline of this run"""
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                REQUEST_DEADLINE_KEY: time.monotonic() + settings.REQUEST_TIMEOUT_SECONDS
             }
-        )
+        }
+        if defer_validation:
+            config["configurable"]["defer_validation"] = True
+        return config
+    
+    def _cache_check(self, question: str, config: Dict) -> Tuple[Optional[Dict], bool]:
+        """
+        Consult the semantic cache before running the graph
         
-        # Add edges for business path
-        graph.add_edge("business", "business_analyst")
-        graph.add_edge("business_analyst", "validator")
+        Args:
+            question: User question
+            config: Thread config
         
-        # Add edges for research path
-        graph.add_edge("research", "research_analyst")
-        graph.add_edge("research_analyst", "validator")
+        Returns:
+            Tuple of (thread state after a cache hit or None, whether this
+            turn's answer may be stored in the cache)
+        """
+        if self.semantic_cache is None:
+            return None, False
+        if settings.SEMANTIC_CACHE_FIRST_TURN_ONLY and self.app.get_state(config).values.get("messages"):
+            return None, False
         
-        # Add edges for technical path
-        graph.add_edge("technical", "technical_analyst")
-        graph.add_edge("technical_analyst", "validator")
+        cached = self.semantic_cache.lookup(question)
+        record_cache("semantic", cached is not None)
+        if cached is None:
+            return None, True
         
-        # End at validator
-        graph.add_edge("validator", END)
+        # Record the turn in the thread so history and follow-ups still work
+        self.app.update_state(config, self._cached_update(question, cached), as_node=self.terminal_node)
+        return self.app.get_state(config).values, False
+    
+    async def _acache_check(self, question: str, config: Dict) -> Tuple[Optional[Dict], bool]:
+        """Async variant of _cache_check"""
+        if self.semantic_cache is None:
+            return None, False
+        if settings.SEMANTIC_CACHE_FIRST_TURN_ONLY and (await self.app.aget_state(config)).values.get("messages"):
+            return None, False
         
-        return graph.compile(checkpointer=self.memory)
+        cached = await self.semantic_cache.alookup(question)
+        record_cache("semantic", cached is not None)
+        if cached is None:
+            return None, True
+        
+        await self.app.aupdate_state(config, self._cached_update(question, cached), as_node=self.terminal_node)
+        return (await self.app.aget_state(config)).values, False
+    
+    def _cache_store(self, question: str, values: Dict):
+        """Offer a finished turn to the semantic cache (it keeps only high scores)"""
+        if values.get("final_data"):
+            self.semantic_cache.store(question, {key: values.get(key, "") for key in CACHED_KEYS})
+    
+    async def _acache_store(self, question: str, values: Dict):
+        """Async variant of _cache_store"""
+        if values.get("final_data"):
+            await self.semantic_cache.astore(question, {key: values.get(key, "") for key in CACHED_KEYS})
+    
+    def _validation_pool(self) -> ThreadPoolExecutor:
+        """Executor running background validations of sync runs"""
+        if self._validation_executor is None:
+            self._validation_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="validation")
+        return self._validation_executor
+    
+    def close_validation_pool(self):
+        """Let the background validations of sync runs finish, then stop their threads"""
+        if self._validation_executor is not None:
+            self._validation_executor.shutdown(wait=True)
+            self._validation_executor = None
+    
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        """Keep a reference to a background task so it is not garbage collected"""
+        self._validation_tasks.add(task)
+        task.add_done_callback(self._validation_tasks.discard)
+        return task
+    
+    def _after_run(self, question: str, config: Dict, values: Dict, cacheable: bool) -> Optional[Future]:
+        """
+        Finish a turn: start its background validation if the score is
+        pending, otherwise offer it to the semantic cache
+        
+        Args:
+            question: User question
+            config: Thread config
+            values: Thread state after the run
+            cacheable: Whether the answer may be stored in the semantic cache
+        
+        Returns:
+            Future of the background validation, if one was started
+        """
+        if values.get("validation_source") == PENDING_SCORE:
+            return self._validation_pool().submit(
+                self._finish_validation, question, config, values.get("final_data", ""), cacheable
+            )
+        if cacheable:
+            self._cache_store(question, values)
+        return None
+    
+    async def _aafter_run(self, question: str, config: Dict, values: Dict, cacheable: bool) -> Optional[asyncio.Task]:
+        """Async variant of _after_run; returns the background validation task, if any"""
+        if values.get("validation_source") == PENDING_SCORE:
+            return self._track(
+                asyncio.create_task(self._afinish_validation(question, config, values.get("final_data", ""), cacheable))
+            )
+        if cacheable:
+            await self._acache_store(question, values)
+        return None
+    
+    def _attach_score(self, question: str, config: Dict, result: str, update: Dict, cacheable: bool):
+        """Write a background score into the thread unless a newer turn has started"""
+        values = self.app.get_state(config).values
+        if values.get("validation_source") != PENDING_SCORE or values.get("final_data") != result:
+            return
+        self.app.update_state(config, update, as_node=self.terminal_node)
+        if cacheable:
+            self._cache_store(question, self.app.get_state(config).values)
+    
+    async def _aattach_score(self, question: str, config: Dict, result: str, update: Dict, cacheable: bool):
+        """Async variant of _attach_score"""
+        values = (await self.app.aget_state(config)).values
+        if values.get("validation_source") != PENDING_SCORE or values.get("final_data") != result:
+            return
+        await self.app.aupdate_state(config, update, as_node=self.terminal_node)
+        if cacheable:
+            await self._acache_store(question, (await self.app.aget_state(config)).values)
+    
+    def _finish_validation(self, question: str, config: Dict, result: str, cacheable: bool):
+        """Score a returned answer with the LLM and attach the score to its turn"""
+        try:
+            update = self.validator.build_update(question, result, self.validator.score(question, result))
+        except Exception as e:
+            logger.warning("Background validation failed, using heuristic score", extra={"error": str(e)})
+            values = self.app.get_state(config).values
+            update = self.validator.build_update(
+                question, result, self.validator.heuristic_score(question, result, values), "heuristic"
+            )
+        self._attach_score(question, config, result, update, cacheable)
+    
+    async def _afinish_validation(self, question: str, config: Dict, result: str, cacheable: bool):
+        """Async variant of _finish_validation"""
+        try:
+            update = self.validator.build_update(question, result, await self.validator.ascore(question, result))
+        except Exception as e:
+            logger.warning("Background validation failed, using heuristic score", extra={"error": str(e)})
+            values = (await self.app.aget_state(config)).values
+            update = self.validator.build_update(
+                question, result, self.validator.heuristic_score(question, result, values), "heuristic"
+            )
+        await self._aattach_score(question, config, result, update, cacheable)
+    
+    async def _await_validation(self, task: asyncio.Task, config: Dict) -> Dict:
+        """
+        Wait for a background validation and return the attached score
+        
+        Args:
+            task: Task returned by _aafter_run
+            config: Thread config
+        
+        Returns:
+            validator_score and validation_source of the thread
+        """
+        # Shield so a disconnecting client does not cancel the validation
+        await asyncio.shield(task)
+        values = (await self.app.aget_state(config)).values
+        return {
+            "validator_score": values.get("validator_score", ""),
+            "validation_source": values.get("validation_source", "")
+        }
+    
+    # Request coalescing
+    
+    def _join(self, question: str, config: Dict, defer_validation: bool) -> Tuple[Optional[str], SyncFlight, bool]:
+        """
+        Lead or follow the sync run answering this question
+        
+        Returns:
+            Tuple of (coalesce key or None when disabled, flight, whether the caller leads)
+        """
+        if self.coalescer is None:
+            return None, SyncFlight(config), True
+        key = coalesce_key(question, self.app.get_state(config).values.get("messages", []), defer_validation)
+        flight, leader = self.coalescer.join_sync(key, config)
+        return key, flight, leader
+    
+    def _land(self, key: Optional[str], flight: SyncFlight, values: Optional[Dict] = None, error: Optional[BaseException] = None):
+        """Hand a sync run's outcome to its followers"""
+        if error is not None:
+            if not isinstance(error, Exception):
+                # The leading stream was closed; followers get a normal error
+                error = RuntimeError("Shared workflow run was abandoned")
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(values)
+        if key is not None:
+            self.coalescer.leave(key, flight)
     
-    def invoke(self, question: str, thread_id: str = "default") -> Dict:
+    def _follow(self, question: str, config: Dict, flight: SyncFlight) -> Dict:
+        """
+        Wait for a shared sync run and record its answer in the caller's thread
+        
+        Args:
+            question: User question
+            config: Follower's thread config
+            flight: Run led by another request
+        
+        Returns:
+            Follower's thread state
+        """
+        values = flight.future.result()
+        if config["configurable"]["thread_id"] == flight.thread_id:
+            return values
+        self.app.update_state(config, self._shared_update(question, values), as_node=self.terminal_node)
+        if flight.validation is not None:
+            # Copy the score once the leader's background validation is done
+            flight.validation.add_done_callback(
+                lambda _: self._validation_pool().submit(self._follow_validation, question, config, flight)
+            )
+        return self.app.get_state(config).values
+    
+    def _follow_validation(self, question: str, config: Dict, flight: SyncFlight):
+        """Attach the shared run's background score to a follower's thread"""
+        values = self.app.get_state(flight.config).values
+        self._attach_score(question, config, flight.future.result().get("final_data", ""), self._score_update(values), False)
+    
+    async def _ajoin(
+        self,
+        question: str,
+        config: Dict,
+        defer_validation: bool,
+        cacheable: bool,
+        tokens: bool = False
+    ) -> Tuple[Flight, bool]:
+        """
+        Lead or follow the async run answering this question
+        
+        The run executes in its own task so that a disconnecting client does
+        not cancel it for the others.
+        
+        Args:
+            question: User question
+            config: Caller's thread config
+            defer_validation: Whether the answer is returned before scoring
+            cacheable: Whether the answer may be stored in the semantic cache
+            tokens: Publish node_start and token events besides node updates
+                (only when the caller leads the run)
+        
+        Returns:
+            Tuple of (flight, whether the caller leads)
+        """
+        key = None
+        if self.coalescer is None:
+            flight, leader = Flight(config), True
+        else:
+            messages = (await self.app.aget_state(config)).values.get("messages", [])
+            key = coalesce_key(question, messages, defer_validation)
+            flight, leader = self.coalescer.join(key, config)
+        if leader:
+            flight.task = asyncio.create_task(self._arun_flight(key, flight, question, cacheable, tokens))
+        return flight, leader
+    
+    async def _arun_flight(self, key: Optional[str], flight: Flight, question: str, cacheable: bool, tokens: bool):
+        """
+        Execute a run on the leader's thread and publish it to the flight
+        
+        Node updates are always published so stream subscribers can attach
+        to any run; token streaming is only turned on when the leader asked
+        for it, since it switches the LLM calls to streaming requests.
+        """
+        config = flight.config
+        try:
+            if tokens:
+                # Speculative branches stream together; only the winner's tokens are sent
+                held = SpeculativeTokens(self.supervisor.route)
+                async for mode, chunk in self.app.astream(
+                    {"question": question},
+                    config=config,
+                    stream_mode=TOKEN_STREAM_MODES
+                ):
+                    for event in iter_stream_events(mode, chunk):
+                        for released in held.filter(event):
+                            flight.publish(released)
+            else:
+                async for output in self.app.astream({"question": question}, config=config):
+                    for node_name, node_data in output.items():
+                        flight.publish({"event": "node_complete", "node": node_name, "update": node_data or {}})
+            values = (await self.app.aget_state(config)).values
+            flight.validation = await self._aafter_run(question, config, values, cacheable)
+            flight.finish(values)
+        except BaseException as e:
+            flight.finish(error=e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            if key is not None:
+                self.coalescer.leave(key, flight)
+    
+    async def _afollow(self, question: str, config: Dict, flight: Flight, leader: bool) -> Tuple[Dict, Optional[asyncio.Task]]:
+        """
+        Wait for a run and, for followers, record its answer in their own thread
+        
+        Args:
+            question: User question
+            config: Caller's thread config
+            flight: Run answering the question
+            leader: Whether the caller started the run
+        
+        Returns:
+            Tuple of (caller's thread state, background validation task or None)
+        """
+        values = await flight.wait()
+        if leader or config["configurable"]["thread_id"] == flight.thread_id:
+            return values, flight.validation
+        await self.app.aupdate_state(config, self._shared_update(question, values), as_node=self.terminal_node)
+        task = None
+        if flight.validation is not None:
+            task = self._track(asyncio.create_task(self._afollow_validation(question, config, flight)))
+        return (await self.app.aget_state(config)).values, task
+    
+    async def _afollow_validation(self, question: str, config: Dict, flight: Flight):
+        """Async variant of _follow_validation"""
+        await asyncio.shield(flight.validation)
+        values = (await self.app.aget_state(flight.config)).values
+        await self._aattach_score(question, config, flight.result.get("final_data", ""), self._score_update(values), False)
+    
+    async def wait_for_validations(self):
+        """Wait until every background validation started on this loop has finished"""
+        if self._validation_tasks:
+            await asyncio.gather(*self._validation_tasks, return_exceptions=True)
+    
+    def invoke(self, question: str, thread_id: str = "default", defer_validation: bool = False) -> Dict:
         """
         Execute workflow with a question
         
         Args:
             question: User question to process
             thread_id: Unique identifier for conversation thread
-            
+            defer_validation: Return before the answer is scored; the score
+                is attached to the thread in the background
+        
         Returns:
             Final state after workflow execution
         """
-        config = {"configurable": {"thread_id": thread_id}}
-        return self.app.invoke({"question": question}, config=config)
+        config = self._config(thread_id, defer_validation)
+        cached, cacheable = self._cache_check(question, config)
+        if cached is not None:
+            return cached
+        
+        key, flight, leader = self._join(question, config, defer_validation)
+        if not leader:
+            return self._follow(question, config, flight)
+        try:
+            result = self.app.invoke({"question": question}, config=config)
+            flight.validation = self._after_run(question, config, result, cacheable)
+        except BaseException as e:
+            self._land(key, flight, error=e)
+            raise
+        self._land(key, flight, result)
+        return result
     
-    def stream(self, question: str, thread_id: str = "default"):
+    def stream(self, question: str, thread_id: str = "default", defer_validation: bool = False):
         """
         Stream workflow execution
         
         Args:
             question: User question to process
             thread_id: Unique identifier for conversation thread
-            
+            defer_validation: Stream the answer before it is scored
+        
+        Yields:
+            State updates during execution
+        """
+        config = self._config(thread_id, defer_validation)
+        cached, cacheable = self._cache_check(question, config)
+        if cached is not None:
+            yield {"semantic_cache": cached}
+            return
+        
+        key, flight, leader = self._join(question, config, defer_validation)
+        if not leader:
+            yield {"coalesced": self._follow(question, config, flight)}
+            return
+        try:
+            for output in self.app.stream({"question": question}, config=config):
+                yield output
+            values = self.app.get_state(config).values
+            flight.validation = self._after_run(question, config, values, cacheable)
+        except BaseException as e:
+            self._land(key, flight, error=e)
+            raise
+        self._land(key, flight, values)
+    
+    async def ainvoke(self, question: str, thread_id: str = "default", defer_validation: bool = False) -> Dict:
+        """
+        Execute workflow with a question without blocking the event loop
+        
+        Args:
+            question: User question to process
+            thread_id: Unique identifier for conversation thread
+            defer_validation: Return before the answer is scored; the score
+                is attached to the thread in the background
+        
+        Returns:
+            Final state after workflow execution
+        """
+        config = self._config(thread_id, defer_validation)
+        cached, cacheable = await self._acache_check(question, config)
+        if cached is not None:
+            return cached
+        
+        flight, leader = await self._ajoin(question, config, defer_validation, cacheable)
+        values, _ = await self._afollow(question, config, flight, leader)
+        return values
+    
+    async def astream(self, question: str, thread_id: str = "default", defer_validation: bool = False) -> AsyncIterator[Dict]:
+        """
+        Stream workflow execution without blocking the event loop
+        
+        Args:
+            question: User question to process
+            thread_id: Unique identifier for conversation thread
+            defer_validation: Stream the answer before it is scored
+        
         Yields:
             State updates during execution
         """
-        config = {"configurable": {"thread_id": thread_id}}
-        for output in self.app.stream({"question": question}, config=config):
-            yield output
+        config = self._config(thread_id, defer_validation)
+        cached, cacheable = await self._acache_check(question, config)
+        if cached is not None:
+            yield {"semantic_cache": cached}
+            return
+        
+        flight, leader = await self._ajoin(question, config, defer_validation, cacheable)
+        async for event in flight.subscribe():
+            if event["event"] == "node_complete":
+                yield {event["node"]: event["update"]}
+        _, task = await self._afollow(question, config, flight, leader)
+        if task is not None:
+            yield {"validation": await self._await_validation(task, config)}
+    
+    async def astream_tokens(self, question: str, thread_id: str = "default", defer_validation: bool = False) -> AsyncIterator[Dict]:
+        """
+        Stream workflow execution at token granularity
+        
+        Args:
+            question: User question to process
+            thread_id: Unique identifier for conversation thread
+            defer_validation: Stream the answer before it is scored
+        
+        Yields:
+            Events of type "node_start", "token" (answer tokens from the domain
+            agent and synthesis LLM calls), "node_complete" (node state update)
+            and, when scoring was deferred, a trailing "validation" event
+        """
+        config = self._config(thread_id, defer_validation)
+        cached, cacheable = await self._acache_check(question, config)
+        if cached is not None:
+            yield {"event": "node_complete", "node": "semantic_cache", "update": cached}
+            return
+        
+        flight, leader = await self._ajoin(question, config, defer_validation, cacheable, tokens=True)
+        async for event in flight.subscribe():
+            yield event
+        _, task = await self._afollow(question, config, flight, leader)
+        if task is not None:
+            yield {"event": "validation", **await self._await_validation(task, config)}
+    
+    # Batch execution
+    
+    async def _aclassify_pack(self, questions: List[str]) -> List[Optional[SupervisorResponse]]:
+        """Classify a pack of first-turn questions; on failure each run classifies itself"""
+        try:
+            return await self.supervisor.aclassify_batch(questions)
+        except Exception as e:
+            logger.warning("Batched classification failed, classifying per question", extra={"error": str(e)})
+            return [None] * len(questions)
+    
+    async def _ascore_pack(self, pairs: List[Tuple[str, str]]) -> List[Optional[ConfidenceScore]]:
+        """Score a pack of answers; on failure each answer is scored heuristically"""
+        try:
+            return await self.validator.ascore_batch(pairs)
+        except Exception as e:
+            logger.warning("Batched validation failed, using heuristic scores", extra={"error": str(e)})
+            return [None] * len(pairs)
+    
+    async def _abatch_run(
+        self,
+        question: str,
+        config: Dict,
+        first_turn: bool,
+        cacheable: bool,
+        classify: MicroBatcher,
+        score: Optional[MicroBatcher]
+    ) -> Dict:
+        """
+        Run the graph for one batch question, with its supervisor and
+        validator LLM calls packed together with other questions'
+        
+        Returns:
+            Thread state after the turn, with its score attached
+        """
+        if first_turn:
+            response = await classify.submit(question)
+            if response is not None:
+                config["configurable"][ROUTING_HINT_KEY] = {"classifier": response.classifier, "region": response.region}
+        
+        self.batch_counts["runs"] += 1
+        values = await self.app.ainvoke({"question": question}, config=config)
+        if values.get("validation_source") != PENDING_SCORE:
+            if cacheable:
+                await self._acache_store(question, values)
+            return values
+        
+        result = values.get("final_data", "")
+        response = await score.submit((question, result))
+        if response is not None:
+            update = self.validator.build_update(question, result, response)
+        else:
+            update = self.validator.build_update(
+                question, result, self.validator.heuristic_score(question, result, values), "heuristic"
+            )
+        await self._aattach_score(question, config, result, update, cacheable)
+        return (await self.app.aget_state(config)).values
+    
+    async def _abatch_item(
+        self,
+        question: str,
+        thread_id: str,
+        leaders: Dict[str, asyncio.Future],
+        classify: MicroBatcher,
+        score: Optional[MicroBatcher]
+    ) -> Dict:
+        """
+        Answer one batch question, or copy the answer of an identical one
+        
+        Args:
+            question: User question
+            thread_id: Thread of the question
+            leaders: Runs of this batch by coalesce key
+            classify: Supervisor micro-batcher of this batch
+            score: Validator micro-batcher, None when the validation mode
+                does not score every answer with the LLM
+        
+        Returns:
+            {"values": thread state} plus "deduplicated" when another
+            question's run answered it
+        """
+        config = self._config(thread_id, defer_validation=score is not None)
+        cached, cacheable = await self._acache_check(question, config)
+        if cached is not None:
+            return {"values": cached}
+        
+        messages = (await self.app.aget_state(config)).values.get("messages", [])
+        key = coalesce_key(question, messages, score is not None)
+        leader = leaders.get(key)
+        if leader is not None:
+            values = await asyncio.shield(leader)
+            await self.app.aupdate_state(config, self._shared_update(question, values), as_node=self.terminal_node)
+            self.batch_counts["deduplicated"] += 1
+            return {"values": (await self.app.aget_state(config)).values, "deduplicated": True}
+        
+        leader = leaders[key] = asyncio.get_running_loop().create_future()
+        # Followers may be gone when the run fails; do not warn about it
+        leader.add_done_callback(lambda future: future.cancelled() or future.exception())
+        try:
+            values = await self._abatch_run(question, config, not messages, cacheable, classify, score)
+        except Exception as e:
+            leader.set_exception(e)
+            raise
+        except BaseException:
+            leader.cancel()
+            raise
+        leader.set_result(values)
+        return {"values": values}
+    
+    async def abatch(
+        self,
+        questions: List[str],
+        thread_ids: Optional[List[Optional[str]]] = None,
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer many questions, yielding each result as soon as it is ready
+        
+        Throughput-oriented: identical questions (same normalized text and
+        conversation) are answered once, first-turn questions are classified
+        several per supervisor call and answers are scored several per
+        validator call. Questions sharing a thread run one after the other,
+        in the given order.
+        
+        Args:
+            questions: User questions
+            thread_ids: Thread of each question; missing or None entries get
+                a new thread
+            max_concurrency: Threads processed at once (default BATCH_MAX_CONCURRENCY)
+        
+        Yields:
+            Results in completion order: dicts with the question's index,
+            question and thread_id, plus either "values" (thread state after
+            the turn, and "deduplicated" when another question's run answered
+            it) or "error" ("retry_after" too when admission rejected it)
+        """
+        thread_ids = list(thread_ids or [])
+        thread_ids += [None] * (len(questions) - len(thread_ids))
+        lanes: Dict[str, List[int]] = {}
+        for index, thread_id in enumerate(thread_ids[:len(questions)]):
+            lanes.setdefault(thread_id or f"thread-{uuid.uuid4()}", []).append(index)
+        self.batch_counts["batches"] += 1
+        self.batch_counts["questions"] += len(questions)
+        
+        classify = MicroBatcher(self._aclassify_pack, settings.BATCH_CLASSIFY_SIZE, settings.BATCH_LINGER_SECONDS)
+        score = None
+        if self.validator.mode in ("llm", "async"):
+            score = MicroBatcher(self._ascore_pack, settings.BATCH_SCORE_SIZE, settings.BATCH_LINGER_SECONDS)
+        leaders: Dict[str, asyncio.Future] = {}
+        results: asyncio.Queue = asyncio.Queue()
+        pending_lanes = iter(lanes.items())
+        
+        async def worker():
+            # Workers share the lane iterator; a lane's questions run in order
+            for thread_id, indexes in pending_lanes:
+                for index in indexes:
+                    result = {"index": index, "question": questions[index], "thread_id": thread_id}
+                    try:
+                        result.update(await self._abatch_item(questions[index], thread_id, leaders, classify, score))
+                    except AdmissionRejected as e:
+                        result.update(error=str(e), retry_after=e.retry_after)
+                    except Exception as e:
+                        result["error"] = str(e)
+                    results.put_nowait(result)
+        
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(max_concurrency or settings.BATCH_MAX_CONCURRENCY, len(lanes)))
+        ]
+        try:
+            for _ in range(len(questions)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            classify.close()
+            if score is not None:
+                score.close()
+    
+    def batch(
+        self,
+        questions: List[str],
+        thread_ids: Optional[List[Optional[str]]] = None,
+        max_concurrency: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Sync variant of abatch, driving it on a private event loop
+        
+        Args:
+            questions: User questions
+            thread_ids: Thread of each question; missing or None entries get
+                a new thread
+            max_concurrency: Threads processed at once (default BATCH_MAX_CONCURRENCY)
+        
+        Yields:
+            Results in completion order (see abatch)
+        """
+        loop = asyncio.new_event_loop()
+        results = self.abatch(questions, thread_ids, max_concurrency)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(results.aclose())
+            # Connections opened on this loop cannot be reused once it closes
+            loop.run_until_complete(llm_registry.release_loop())
+            loop.close()
+    
+    def get_stats(self) -> Dict:
+        """
+        Get runtime statistics of the workflow
+        
+        Returns:
+            Mode, routing counts, admission queues, retries/hedges, batch
+            counters and, when enabled, coalescing, speculation, semantic
+            cache and search cache counters
+        """
+        stats = {
+            "mode": self.mode,
+            "parallel_search": self.parallel_search,
+            "classifier_routes": dict(self.supervisor.route_counts),
+            "validation": {"mode": self.validator.mode, **self.validator.counts},
+            "llm_clients": llm_registry.stats(),
+            "admission": admission.stats(),
+            "resilience": resilience.stats(),
+            "batch": {
+                **self.batch_counts,
+                "classify_calls": self.supervisor.batch_calls,
+                "score_calls": self.validator.batch_calls
+            }
+        }
+        if self.coalescer:
+            stats["coalescing"] = self.coalescer.stats()
+        if self.speculative:
+            stats["speculation"] = self.speculative.stats.snapshot()
+        if self.history_compactor:
+            stats["history_compactions"] = self.history_compactor.compactions
+        if hasattr(self.memory, "stats"):
+            stats["checkpointer"] = self.memory.stats()
+        if self.semantic_cache:
+            stats["semantic_cache"] = self.semantic_cache.stats()
+        search_cache_stats = self.search_tools.cache_stats()
+        if search_cache_stats:
+            stats["search_cache"] = search_cache_stats
+        return stats
     
     def get_state(self, thread_id: str) -> Optional[Dict]:
         """
@@ -119,7 +999,7 @@ class AgentWorkflow:
         
         Args:
             thread_id: Thread identifier
-            
+        
         Returns:
             Current state or None
         """
@@ -128,7 +1008,7 @@ class AgentWorkflow:
             state = self.app.get_state(config)
             return state
         except Exception as e:
-            print(f"Error getting state: {e}")
+            logger.error("Error getting state", extra={"error": str(e)})
             return None
     
     def get_state_history(self, thread_id: str, limit: int = 10):
@@ -138,7 +1018,7 @@ class AgentWorkflow:
         Args:
             thread_id: Thread identifier
             limit: Maximum number of history items to return
-            
+        
         Returns:
             List of state snapshots
         """
@@ -151,5 +1031,5 @@ class AgentWorkflow:
                     break
             return history
         except Exception as e:
-            print(f"Error getting state history: {e}")
+            logger.error("Error getting state history", extra={"error": str(e)})
             return []
@@ -0,0 +1,269 @@
+"""
+Local fast-path question classifier
+
+Hashed word/character n-gram TF-IDF features with a multinomial logistic
+regression, trained offline from logged (question, classifier_response) pairs
+written by SupervisorAgent. The supervisor routes directly when the model is
+confident and falls back to the LLM otherwise.
+
+Training / evaluation CLI (from backend/):
+    python -m src.routers.local_classifier train --data logs/classifier.jsonl --model models/classifier.npz
+    python -m src.routers.local_classifier eval --data logs/holdout.jsonl --model models/classifier.npz
+"""
+import argparse
+import json
+import random
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+LABELS: Tuple[str, ...] = ("business", "research", "technical")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashedNgramClassifier:
+    """Hashed n-gram TF-IDF + softmax regression over the supervisor labels"""
+    
+    def __init__(self, n_features: int = 2 ** 18, labels: Tuple[str, ...] = LABELS):
+        self.n_features = n_features
+        self.labels = labels
+        self.idf = np.ones(n_features, dtype=np.float32)
+        self.weights = np.zeros((len(labels), n_features), dtype=np.float32)
+        self.bias = np.zeros(len(labels), dtype=np.float32)
+    
+    def _ngrams(self, text: str) -> List[str]:
+        """Word unigrams/bigrams plus character trigrams inside words"""
+        words = _WORD_RE.findall(text.lower())
+        grams = [f"w:{word}" for word in words]
+        grams += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return grams
+    
+    def _term_counts(self, text: str) -> Dict[int, int]:
+        """Hash n-grams into feature indices (crc32 is stable across processes)"""
+        counts: Dict[int, int] = {}
+        for gram in self._ngrams(text):
+            index = zlib.crc32(gram.encode("utf-8")) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+        return counts
+    
+    def _vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse TF-IDF vector as (indices, values), L2-normalised
+        
+        Args:
+            text: Question text
+        
+        Returns:
+            Feature indices and their weights
+        """
+        counts = self._term_counts(text)
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        values = tf * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, (values / norm if norm else values).astype(np.float32)
+    
+    def _logits(self, indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        return self.weights[:, indices] @ values + self.bias
+    
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+    
+    def fit(
+        self,
+        questions: List[str],
+        labels: List[str],
+        epochs: int = 15,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0
+    ) -> "HashedNgramClassifier":
+        """
+        Train with plain SGD on the softmax cross-entropy loss
+        
+        Args:
+            questions: Training questions
+            labels: Supervisor label for each question
+            epochs: Passes over the data
+            learning_rate: Initial SGD step size (decays per epoch)
+            l2: L2 regularisation strength
+            seed: Shuffle seed
+        
+        Returns:
+            The fitted classifier
+        """
+        # Document frequencies for the IDF weights
+        df = np.zeros(self.n_features, dtype=np.float32)
+        for question in questions:
+            df[list(self._term_counts(question).keys())] += 1
+        self.idf = (np.log((1 + len(questions)) / (1 + df)) + 1).astype(np.float32)
+        
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        samples = [
+            (*self._vectorize(question), label_index[label])
+            for question, label in zip(questions, labels)
+        ]
+        
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            step = learning_rate / (1 + epoch)
+            for indices, values, target in samples:
+                probs = self._softmax(self._logits(indices, values))
+                probs[target] -= 1.0
+                self.weights[:, indices] -= step * (np.outer(probs, values) + l2 * self.weights[:, indices])
+                self.bias -= step * probs
+        return self
+    
+    def predict_proba(self, question: str) -> Dict[str, float]:
+        """Return the probability of each label"""
+        probs = self._softmax(self._logits(*self._vectorize(question)))
+        return {label: float(prob) for label, prob in zip(self.labels, probs)}
+    
+    def predict(self, question: str) -> Tuple[str, float]:
+        """
+        Predict the route for a question
+        
+        Args:
+            question: Question text
+        
+        Returns:
+            Tuple of (label, confidence)
+        """
+        probs = self.predict_proba(question)
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+    
+    def save(self, path: str):
+        """Persist the model as a compressed .npz file"""
+        np.savez_compressed(
+            path,
+            n_features=np.array(self.n_features),
+            labels=np.array(self.labels),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        """Load a model written by save()"""
+        data = np.load(path)
+        model = cls(int(data["n_features"]), tuple(str(label) for label in data["labels"]))
+        model.idf = data["idf"]
+        model.weights = data["weights"]
+        model.bias = data["bias"]
+        return model
+
+
+def load_pairs(path: str) -> Tuple[List[str], List[str]]:
+    """
+    Read (question, classifier_response) pairs from a JSONL log
+    
+    Args:
+        path: JSONL file with "question" and "classifier_response" keys
+    
+    Returns:
+        Questions and labels, skipping unknown labels
+    """
+    questions, labels = [], []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("classifier_response") in LABELS and record.get("question"):
+                questions.append(record["question"])
+                labels.append(record["classifier_response"])
+    return questions, labels
+
+
+def evaluate(model: HashedNgramClassifier, questions: Iterable[str], labels: Iterable[str], threshold: float) -> Dict:
+    """
+    Measure accuracy overall and on the confidently routed subset
+    
+    Args:
+        model: Trained classifier
+        questions: Evaluation questions
+        labels: Reference labels
+        threshold: Confidence needed to skip the LLM supervisor
+    
+    Returns:
+        Evaluation metrics
+    """
+    total = correct = routed = routed_correct = 0
+    for question, label in zip(questions, labels):
+        predicted, confidence = model.predict(question)
+        total += 1
+        correct += predicted == label
+        if confidence >= threshold:
+            routed += 1
+            routed_correct += predicted == label
+    return {
+        "examples": total,
+        "accuracy": round(correct / total, 4) if total else 0.0,
+        "threshold": threshold,
+        "coverage": round(routed / total, 4) if total else 0.0,
+        "routed_accuracy": round(routed_correct / routed, 4) if routed else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    from config.settings import settings
+    
+    parser = argparse.ArgumentParser(description="Train or evaluate the local question classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    train = sub.add_parser("train", help="Train a model from logged supervisor decisions")
+    train.add_argument("--data", required=True, nargs="+", help="JSONL files with question/classifier_response")
+    train.add_argument("--model", required=True, help="Output .npz path")
+    train.add_argument("--holdout", type=float, default=0.2, help="Fraction held out for evaluation")
+    train.add_argument("--epochs", type=int, default=15)
+    train.add_argument("--threshold", type=float, default=settings.LOCAL_CLASSIFIER_THRESHOLD)
+    
+    evaluate_cmd = sub.add_parser("eval", help="Evaluate a trained model")
+    evaluate_cmd.add_argument("--data", required=True, nargs="+")
+    evaluate_cmd.add_argument("--model", required=True)
+    evaluate_cmd.add_argument("--threshold", type=float, default=settings.LOCAL_CLASSIFIER_THRESHOLD)
+    
+    args = parser.parse_args(argv)
+    questions, labels = [], []
+    for path in args.data:
+        file_questions, file_labels = load_pairs(path)
+        questions += file_questions
+        labels += file_labels
+    
+    if args.command == "train":
+        pairs = list(zip(questions, labels))
+        random.Random(0).shuffle(pairs)
+        split = int(len(pairs) * (1 - args.holdout))
+        train_pairs, test_pairs = pairs[:split], pairs[split:]
+        model = HashedNgramClassifier().fit(
+            [q for q, _ in train_pairs], [l for _, l in train_pairs], epochs=args.epochs
+        )
+        model.save(args.model)
+        report = {"trained_on": len(train_pairs), "model": args.model}
+        if test_pairs:
+            report["holdout"] = evaluate(
+                model, [q for q, _ in test_pairs], [l for _, l in test_pairs], args.threshold
+            )
+    else:
+        model = HashedNgramClassifier.load(args.model)
+        report = evaluate(model, questions, labels, args.threshold)
+    
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,278 @@
-from typing import Dict
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import json
+import logging
+from typing import Dict, List, Optional
+from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+from langchain_core.runnables.config import var_child_runnable_config
 from config.settings import settings
+from src.utils.llm_clients import get_chat_model
+from src.utils.log import file_logger
 from config.prompts import PromptTemplates
 from src.utils.state import AgentState
-from src.utils.schemas import SupervisorResponse
+from src.utils.schemas import BatchSupervisorResponse, SupervisorResponse
+from src.utils.history import QUESTION, conversation_view, tag_message
+from src.utils.prompt_assembly import PromptAssembler
+from src.utils.resilience import aresilient_invoke, resilient_invoke
+
+
+logger = logging.getLogger(__name__)
+
+
+# Key of a classification made before the run (e.g. by a batched supervisor
+# call) in config["configurable"]; the node then skips its own LLM call
+ROUTING_HINT_KEY = "__routing_hint"
+
+
+def routing_hint() -> Optional[Dict]:
+    """Classification handed to the supervisor node of this run, if any"""
+    config = var_child_runnable_config.get() or {}
+    return config.get("configurable", {}).get(ROUTING_HINT_KEY)
 
 
 class SupervisorAgent:
     """Supervisor agent for routing decisions"""
     
-    def __init__(self, model_name: str = settings.MODEL_NAME):
+    def __init__(
+        self,
+        model_name: str = settings.MODEL_NAME,
+        fast_classifier=None,
+        fast_threshold: float = settings.LOCAL_CLASSIFIER_THRESHOLD,
+        decision_log_path: str = settings.CLASSIFIER_LOG_PATH
+    ):
         self.model_name = model_name
-        self.llm = ChatGroq(model=model_name).with_structured_output(SupervisorResponse)
+        self.llm = get_chat_model(model_name).with_structured_output(SupervisorResponse)
+        self.batch_llm = get_chat_model(model_name).with_structured_output(BatchSupervisorResponse)
+        self.assembler = PromptAssembler(settings.PROMPT_BUDGET_SUPERVISOR)
+        
+        # Optional local classifier exposing predict(question) -> (label, confidence)
+        self.fast_classifier = fast_classifier
+        self.fast_threshold = fast_threshold
+        self.decision_log_path = decision_log_path
+        self._decision_log = None
+        if decision_log_path:
+            self._decision_log = file_logger(
+                decision_log_path, settings.CLASSIFIER_LOG_MAX_BYTES, settings.CLASSIFIER_LOG_BACKUPS
+            )
+        self.route_counts = {"local": 0, "llm": 0}
+        self.batch_calls = 0
     
-    def classify(self, state: AgentState) -> Dict:
+    def build_messages(self, state: AgentState) -> List[BaseMessage]:
         """
-        Classify question and route to appropriate agent
+        Build the classification prompt with recent conversation history
         
         Args:
             state: Current agent state
             
         Returns:
-            Updated state with classification
+            Ordered list of messages
         """
         question = state["question"]
         prompt = PromptTemplates.SUPERVISOR_PROMPT
         
-        # Build messages with history
-        messages = [SystemMessage(content=prompt)]
-        
-        # Add conversation history (last 5 messages for context)
-        conversation_history = state.get("messages", [])
-        if conversation_history:
-            recent_history = conversation_history[-5:]
-            messages.extend(recent_history)
-        
-        # Add current question
-        messages.append(HumanMessage(content=f"Question: {question}"))
-        
-        response = self.llm.invoke(messages)
+        # Fit summary, recent question/answer history and question into the
+        # supervisor's token budget
+        summary, conversation_history = conversation_view(state.get("messages", []), question)
+        return self.assembler.assemble(prompt, f"Question: {question}", conversation_history, summary)
+    
+    def build_update(self, question: str, response: SupervisorResponse) -> Dict:
+        """
+        Log the classification and build the state update
         
+        Args:
+            question: User question
+            response: Structured classification response
+            
+        Returns:
+            Updated state with classification
+        """
         classifier_response = response.classifier
         region_response = response.region
         
-        print(f"\n{'='*50}")
-        print("[Supervisor Agent] Classification")
-        print(f"{'='*50}")
-        print(f"Category: {classifier_response}")
-        print(f"Reason: {region_response}")
+        logger.info("Classification", extra={"classifier": classifier_response, "reason": region_response})
         
         return {
             "region_response": region_response,
             "classifier_response": classifier_response,
             "question": question,
-            "messages": [HumanMessage(content=question)],  # Add user question to messages
+            "messages": [tag_message(HumanMessage(content=question), QUESTION)],  # Add user question to messages
             "next": "overall_route"
         }
     
+    def fast_route(self, state: AgentState) -> Optional[Dict]:
+        """
+        Route with the local classifier when it is confident enough
+        
+        Only first turns qualify: the classifier sees the question alone, so a
+        follow-up ("what about the costs of that?") goes to the LLM supervisor,
+        which routes with the conversation history.
+        
+        Args:
+            state: Current agent state
+            
+        Returns:
+            Updated state with classification, or None to fall back to the LLM
+        """
+        summary, conversation_history = conversation_view(state.get("messages", []), state["question"])
+        if summary or conversation_history:
+            return None
+        response = self.fast_response(state["question"])
+        if response is None:
+            return None
+        return self.build_update(state["question"], response)
+    
+    def fast_response(self, question: str) -> Optional[SupervisorResponse]:
+        """Classification by the local classifier, or None when it is not confident enough"""
+        if self.fast_classifier is None:
+            return None
+        
+        label, confidence = self.fast_classifier.predict(question)
+        if confidence < self.fast_threshold:
+            return None
+        
+        self.route_counts["local"] += 1
+        return SupervisorResponse(
+            classifier=label,
+            region=f"Routed by local classifier (confidence {confidence:.2f})"
+        )
+    
+    def hinted_route(self, state: AgentState) -> Optional[Dict]:
+        """
+        Route with the classification passed in the run config
+        
+        Args:
+            state: Current agent state
+        
+        Returns:
+            Updated state with classification, or None when the run has no hint
+        """
+        hint = routing_hint()
+        if not hint:
+            return None
+        return self.build_update(state["question"], SupervisorResponse(**hint))
+    
+    def log_decision(self, question: str, classifier_response: str):
+        """
+        Append an LLM routing decision to the training log
+        
+        The line is queued; a background thread writes and rotates the file.
+        
+        Args:
+            question: User question
+            classifier_response: Label chosen by the LLM supervisor
+        """
+        self.route_counts["llm"] += 1
+        if self._decision_log is None:
+            return
+        
+        self._decision_log.info(json.dumps({"question": question, "classifier_response": classifier_response}))
+    
+    def classify(self, state: AgentState) -> Dict:
+        """
+        Classify question and route to appropriate agent
+        
+        Args:
+            state: Current agent state
+            
+        Returns:
+            Updated state with classification
+        """
+        hinted_update = self.hinted_route(state)
+        if hinted_update is not None:
+            return hinted_update
+        
+        fast_update = self.fast_route(state)
+        if fast_update is not None:
+            return fast_update
+        
+        response = resilient_invoke("supervisor", self.llm, self.build_messages(state))
+        self.log_decision(state["question"], response.classifier)
+        
+        return self.build_update(state["question"], response)
+    
+    async def aclassify(self, state: AgentState) -> Dict:
+        """
+        Async variant of classify using the non-blocking Groq client
+        
+        Args:
+            state: Current agent state
+            
+        Returns:
+            Updated state with classification
+        """
+        hinted_update = self.hinted_route(state)
+        if hinted_update is not None:
+            return hinted_update
+        
+        fast_update = self.fast_route(state)
+        if fast_update is not None:
+            return fast_update
+        
+        response = await aresilient_invoke("supervisor", self.llm, self.build_messages(state))
+        self.log_decision(state["question"], response.classifier)
+        
+        return self.build_update(state["question"], response)
+    
+    def build_batch_messages(self, questions: List[str]) -> List[BaseMessage]:
+        """
+        Build the prompt classifying several first-turn questions at once
+        
+        Args:
+            questions: Questions to classify, numbered from 1 in the prompt
+        
+        Returns:
+            Ordered list of messages
+        """
+        numbered = "\n".join(f"[{index}] {question}" for index, question in enumerate(questions, 1))
+        return [SystemMessage(content=PromptTemplates.BATCH_SUPERVISOR_PROMPT), HumanMessage(content=numbered)]
+    
+    def _match_batch(
+        self,
+        questions: List[str],
+        pending: List[int],
+        response: BatchSupervisorResponse,
+        responses: List[Optional[SupervisorResponse]]
+    ):
+        """Fill responses with the items of a batched reply (unanswered questions stay None)"""
+        self.batch_calls += 1
+        items = {item.index: item for item in response.items}
+        for number, position in enumerate(pending, 1):
+            item = items.get(number)
+            if item is None:
+                continue
+            responses[position] = SupervisorResponse(classifier=item.classifier, region=item.region)
+            self.log_decision(questions[position], item.classifier)
+    
+    def classify_batch(self, questions: List[str]) -> List[Optional[SupervisorResponse]]:
+        """
+        Classify several first-turn questions with one LLM call
+        
+        Questions the local classifier is confident about skip the call.
+        The batched prompt carries no conversation history, so it only
+        suits questions opening a thread.
+        
+        Args:
+            questions: Questions to classify
+        
+        Returns:
+            Classification of each question, None where the reply had none
+        """
+        responses = [self.fast_response(question) for question in questions]
+        pending = [position for position, response in enumerate(responses) if response is None]
+        if pending:
+            messages = self.build_batch_messages([questions[position] for position in pending])
+            response = resilient_invoke("supervisor", self.batch_llm, messages)
+            self._match_batch(questions, pending, response, responses)
+        return responses
+    
+    async def aclassify_batch(self, questions: List[str]) -> List[Optional[SupervisorResponse]]:
+        """Async variant of classify_batch"""
+        responses = [self.fast_response(question) for question in questions]
+        pending = [position for position, response in enumerate(responses) if response is None]
+        if pending:
+            messages = self.build_batch_messages([questions[position] for position in pending])
+            response = await aresilient_invoke("supervisor", self.batch_llm, messages)
+            self._match_batch(questions, pending, response, responses)
+        return responses
+    
     @staticmethod
     def route(state: AgentState) -> str:
         """
@@ -1,20 +1,31 @@
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from typing import Dict, List
+from langchain_core.messages import AIMessage, BaseMessage
 from config.settings import settings
+from src.utils.llm_clients import get_chat_model
 from config.prompts import PromptTemplates
 from src.utils.tools import search_tools
+from src.utils.streaming import ANSWER_STREAM_TAG
+from src.utils.prompt_assembly import PromptAssembler
+from src.utils.history import ANSWER, conversation_view, tag_message
+from src.utils.resilience import aresilient_invoke, resilient_invoke
+
+
+logger = logging.getLogger(__name__)
 
 
 class BaseSynthesis(ABC):
     """Base class for synthesis agents"""
     
-    def __init__(self, model_name: str = settings.MODEL_NAME):
+    def __init__(self, model_name: str = settings.MODEL_NAME, prefetched_search: bool = False):
         self.model_name = model_name
-        self.llm = ChatGroq(model=model_name)
+        self.llm = get_chat_model(model_name)
         self.search_tools = search_tools
+        self.assembler = PromptAssembler(settings.PROMPT_BUDGET_SYNTHESIS)
+        # When True the graph runs the web search as a parallel branch and
+        # stores the results in state["web_search_content"]
+        self.prefetched_search = prefetched_search
     
     @abstractmethod
     def get_state_key(self) -> str:
@@ -26,6 +37,64 @@ class BaseSynthesis(ABC):
         """Return the state key for synthesis output"""
         pass
     
+    def build_prompt(
+        self,
+        question: str,
+        agent_content: str,
+        web_search_content,
+        conversation_history: List[BaseMessage] = None
+    ) -> List[BaseMessage]:
+        """
+        Build the synthesis prompt from agent output and web search results
+        
+        Args:
+            question: User question
+            agent_content: Draft answer from the domain agent
+            web_search_content: Web search results
+            conversation_history: Previous messages in conversation
+            
+        Returns:
+            Formatted prompt messages
+        """
+        prompt = PromptTemplates.SYNTHESIS_PROMPT
+        
+        # Earlier questions and final answers only, so follow-ups resolve
+        summary, history = conversation_view(conversation_history, question)
+        
+        # History goes first, then search results, then the agent draft when over budget
+        return self.assembler.assemble(
+            prompt,
+            f"question: {question}",
+            history,
+            summary,
+            sections=[
+                ("web_search_information", web_search_content),
+                ("agent_generate", agent_content)
+            ]
+        )
+    
+    def build_update(self, question: str, content: str, web_search_content=None) -> Dict:
+        """
+        Log the synthesized answer and build the state update
+        
+        Args:
+            question: User question
+            content: Synthesized answer
+            web_search_content: Search results used (kept for the heuristic validator)
+            
+        Returns:
+            Updated state with synthesized response
+        """
+        logger.info("Synthesized answer", extra={"output_key": self.get_output_key(), "chars": len(content), "preview": content[:200]})
+        
+        return {
+            "messages": tag_message(AIMessage(content=content), ANSWER),
+            self.get_output_key(): content,
+            "web_search_content": str(web_search_content) if web_search_content is not None else None,
+            "next": "validator",
+            "question": question
+        }
+    
     def synthesize(self, state: Dict) -> Dict:
         """
         Synthesize information from agent and web search
@@ -39,37 +108,41 @@ class BaseSynthesis(ABC):
         question = state["question"]
         agent_content = state.get(self.get_state_key(), "No content")
         
-        # Perform web search
-        web_search_content = self.search_tools.search(question)
+        # Use the parallel search branch's results, or perform web search
+        if self.prefetched_search:
+            web_search_content = state.get("web_search_content")
+        else:
+            web_search_content = self.search_tools.search(question)
         
-        # Create synthesis prompt
-        prompt = PromptTemplates.SYNTHESIS_PROMPT
+        final_prompt = self.build_prompt(question, agent_content, web_search_content, state.get("messages", []))
         
-        chat_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=prompt),
-            HumanMessage(
-                content=f"question: {question}\n"
-                       f"web_search_information: {web_search_content}\n"
-                       f"agent_generate: {agent_content}"
-            )
-        ])
+        # Tagged so token-streaming clients receive this call's output
+        response = resilient_invoke("synthesis", self.llm, final_prompt, config={"tags": [ANSWER_STREAM_TAG]})
         
-        final_prompt = chat_prompt.format_messages(
-            web_search_content=web_search_content,
-            question=question,
-            agent_generate=agent_content
-        )
+        return self.build_update(question, response.content, web_search_content)
+    
+    async def asynthesize(self, state: Dict) -> Dict:
+        """
+        Async variant of synthesize using the non-blocking Groq and Tavily clients
+        
+        Args:
+            state: Current agent state
+            
+        Returns:
+            Updated state with synthesized response
+        """
+        question = state["question"]
+        agent_content = state.get(self.get_state_key(), "No content")
         
-        response = self.llm.invoke(final_prompt)
+        # Use the parallel search branch's results, or perform web search
+        if self.prefetched_search:
+            web_search_content = state.get("web_search_content")
+        else:
+            web_search_content = await self.search_tools.asearch(question)
         
-        print(f"\n{'='*50}")
-        print(f"[{self.get_output_key()} Synthesis]")
-        print(f"{'='*50}")
-        print(f"{response.content[:200]}..." if len(response.content) > 200 else response.content)
+        final_prompt = self.build_prompt(question, agent_content, web_search_content, state.get("messages", []))
         
-        return {
-            "messages": AIMessage(content=response.content),
-            self.get_output_key(): response.content,
-            "next": "validator",
-            "question": question
-        }
+        # Tagged so token-streaming clients receive this call's output
+        response = await aresilient_invoke("synthesis", self.llm, final_prompt, config={"tags": [ANSWER_STREAM_TAG]})
+        
+        return self.build_update(question, response.content, web_search_content)
@@ -14,6 +14,9 @@ class BusinessSynthesis(BaseSynthesis):
     
     def process(self, state: AgentState) -> Dict:
         return self.synthesize(state)
+    
+    async def aprocess(self, state: AgentState) -> Dict:
+        return await self.asynthesize(state)
 
 
 class ResearchSynthesis(BaseSynthesis):
@@ -27,6 +30,9 @@ class ResearchSynthesis(BaseSynthesis):
     
     def process(self, state: AgentState) -> Dict:
         return self.synthesize(state)
+    
+    async def aprocess(self, state: AgentState) -> Dict:
+        return await self.asynthesize(state)
 
 
 class TechnicalSynthesis(BaseSynthesis):
@@ -40,3 +46,6 @@ class TechnicalSynthesis(BaseSynthesis):
     
     def process(self, state: AgentState) -> Dict:
         return self.synthesize(state)
+    
+    async def aprocess(self, state: AgentState) -> Dict:
+        return await self.asynthesize(state)
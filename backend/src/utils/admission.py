@@ -0,0 +1,399 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config.settings import settings
+from src.utils.deadline import time_left
+from src.utils.tokens import count_message_tokens
+
+
+class AdmissionRejected(Exception):
+    """Raised when a provider call cannot be admitted before its deadline"""
+    
+    def __init__(self, provider: str, reason: str, retry_after: float):
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{provider} is overloaded ({reason}); retry after {retry_after:.0f}s")
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` units per minute
+    
+    Callers reserve units up front; the level may go negative, which makes
+    later callers wait their turn instead of racing for the refill.
+    """
+    
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def reserve(self, amount: float, max_wait: float) -> Optional[float]:
+        """
+        Reserve units if they become available within max_wait
+        
+        Args:
+            amount: Units to take
+            max_wait: Longest acceptable wait in seconds
+        
+        Returns:
+            Seconds to wait before using the reservation, or None (nothing reserved)
+        """
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (amount - self.level) / self.rate)
+            if wait > max_wait:
+                return None
+            self.level -= amount
+            return wait
+    
+    def refund(self, amount: float):
+        """Return units of a reservation that was not used"""
+        with self._lock:
+            self.level = min(self.capacity, self.level + amount)
+    
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount units would be available"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (amount - self.level) / self.rate)
+
+
+class ProviderLimiter:
+    """
+    Admission control for one upstream provider
+    
+    Combines a concurrency limit, optional requests/minute and tokens/minute
+    token buckets, and a bounded FIFO wait queue shared by sync and async
+    callers. A call that cannot start before its deadline, or that finds the
+    queue full, raises AdmissionRejected instead of adding to the overload.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_queue: int = settings.ADMISSION_MAX_QUEUE,
+        queue_timeout: float = settings.ADMISSION_QUEUE_TIMEOUT
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # threading.Event for sync waiters, (loop, future) for async waiters
+        self._waiters: Deque[Any] = deque()
+        self._hold_seconds = 1.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0, "rejected_rate": 0}
+    
+    # Concurrency slots
+    
+    def _enter_or_enqueue(self, waiter: Any) -> bool:
+        """Take a free slot (True) or join the queue (False); caller holds the lock"""
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(self.name, "queue full", self.retry_after())
+        self._waiters.append(waiter)
+        self._stats["queued"] += 1
+        return False
+    
+    def _release_slot(self):
+        """Hand the slot to the next live waiter, or free it"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                if not future.done():
+                    loop.call_soon_threadsafe(self._resolve, future)
+                    return
+            self._in_flight -= 1
+    
+    def _resolve(self, future: "asyncio.Future"):
+        """Complete an async waiter; if it gave up meanwhile, pass the slot on"""
+        if future.done():
+            self._release_slot()
+        else:
+            future.set_result(True)
+    
+    def _abandon(self, waiter: Any):
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+    
+    def _reject_timeout(self):
+        with self._lock:
+            self._stats["rejected_timeout"] += 1
+        raise AdmissionRejected(self.name, "queue timeout", self.retry_after())
+    
+    # Rate limits
+    
+    def _reserve_rate(self, tokens: int, max_wait: float) -> float:
+        """Reserve one request and `tokens` tokens; returns the wait before sending"""
+        waits = []
+        if self.requests is not None:
+            wait = self.requests.reserve(1, max_wait)
+            if wait is None:
+                return self._reject_rate(self.requests.wait_time(1))
+            waits.append(wait)
+        if self.tokens is not None and tokens:
+            wait = self.tokens.reserve(tokens, max_wait)
+            if wait is None:
+                if self.requests is not None:
+                    self.requests.refund(1)
+                return self._reject_rate(self.tokens.wait_time(tokens))
+            waits.append(wait)
+        return max(waits, default=0.0)
+    
+    def _reject_rate(self, wait: float) -> float:
+        self._release_slot()
+        with self._lock:
+            self._stats["rejected_rate"] += 1
+        raise AdmissionRejected(self.name, "rate limit", wait)
+    
+    def _deadline(self, timeout: Optional[float]) -> float:
+        """Queue deadline, never later than the deadline of the calling node"""
+        wait = self.queue_timeout if timeout is None else timeout
+        remaining = time_left()
+        if remaining is not None:
+            wait = min(wait, max(0.0, remaining))
+        return time.monotonic() + wait
+    
+    # Public API
+    
+    def retry_after(self) -> float:
+        """Rough seconds until the queue drains, for Retry-After headers"""
+        backlog = len(self._waiters) + 1
+        return max(1.0, math.ceil(self._hold_seconds * backlog / self.max_concurrency))
+    
+    def check(self):
+        """Raise AdmissionRejected right away if the wait queue is full"""
+        if len(self._waiters) >= self.max_queue:
+            with self._lock:
+                self._stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(self.name, "queue full", self.retry_after())
+    
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None):
+        """
+        Block until the call may start
+        
+        Args:
+            tokens: Estimated tokens the call will consume
+            timeout: Longest wait in seconds (defaults to queue_timeout)
+        
+        Raises:
+            AdmissionRejected: Queue full, or no capacity before the deadline
+        """
+        deadline = self._deadline(timeout)
+        event = threading.Event()
+        with self._lock:
+            admitted = self._enter_or_enqueue(event)
+        if not admitted and not event.wait(max(0.0, deadline - time.monotonic())):
+            with self._lock:
+                if not event.is_set():
+                    self._waiters.remove(event)
+                    admitted = None
+            if admitted is None:
+                self._reject_timeout()
+        
+        wait = self._reserve_rate(tokens, max(0.0, deadline - time.monotonic()))
+        if wait:
+            time.sleep(wait)
+        with self._lock:
+            self._stats["admitted"] += 1
+    
+    async def aacquire(self, tokens: int = 0, timeout: Optional[float] = None):
+        """Async variant of acquire; waits without blocking the event loop"""
+        deadline = self._deadline(timeout)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            admitted = self._enter_or_enqueue(waiter)
+        if not admitted:
+            try:
+                await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self._abandon(waiter)
+                self._reject_timeout()
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                if future.done() and not future.cancelled():
+                    self._release_slot()
+                raise
+        
+        wait = self._reserve_rate(tokens, max(0.0, deadline - time.monotonic()))
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._release_slot()
+                raise
+        with self._lock:
+            self._stats["admitted"] += 1
+    
+    def release(self, held_seconds: Optional[float] = None):
+        """Free the slot taken by acquire/aacquire"""
+        if held_seconds is not None:
+            # Moving average of call duration, used for Retry-After
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+        self._release_slot()
+    
+    @contextmanager
+    def slot(self, tokens: int = 0, timeout: Optional[float] = None):
+        """Context manager holding a slot for the duration of a call"""
+        self.acquire(tokens, timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+    
+    @asynccontextmanager
+    async def aslot(self, tokens: int = 0, timeout: Optional[float] = None):
+        """Async context manager holding a slot for the duration of a call"""
+        await self.aacquire(tokens, timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "max_concurrency": self.max_concurrency
+            }
+
+
+class AdmissionController:
+    """Registry of provider limiters and the guarded-call helpers"""
+    
+    def __init__(self, limiters: Optional[List[ProviderLimiter]] = None):
+        self.limiters: Dict[str, ProviderLimiter] = {limiter.name: limiter for limiter in limiters or []}
+    
+    def check(self, provider: str):
+        """Fail fast with AdmissionRejected when the provider's queue is full"""
+        limiter = self.limiters.get(provider)
+        if limiter is not None:
+            limiter.check()
+    
+    def call(self, provider: str, func: Callable, *args, tokens: int = 0, **kwargs) -> Any:
+        """
+        Run a provider call once it is admitted
+        
+        Args:
+            provider: Limiter name ("groq", "tavily")
+            func: Function performing the call
+            *args: Positional arguments for func
+            tokens: Estimated tokens the call consumes
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            Whatever func returns
+        """
+        limiter = self.limiters.get(provider)
+        if limiter is None:
+            return func(*args, **kwargs)
+        with limiter.slot(tokens):
+            return func(*args, **kwargs)
+    
+    async def acall(self, provider: str, func: Callable, *args, tokens: int = 0, **kwargs) -> Any:
+        """Async variant of call for coroutine functions"""
+        limiter = self.limiters.get(provider)
+        if limiter is None:
+            return await func(*args, **kwargs)
+        async with limiter.aslot(tokens):
+            return await func(*args, **kwargs)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+def build_admission_controller(workers: int = settings.WORKERS) -> AdmissionController:
+    """
+    Create the Groq and Tavily limiters from settings
+    
+    Args:
+        workers: Processes sharing the provider quotas; each one gets an
+            equal share of the concurrency and per-minute limits
+    
+    Returns:
+        Admission controller for this process
+    """
+    workers = max(1, workers)
+    
+    def share(limit: float) -> float:
+        return limit / workers
+    
+    return AdmissionController([
+        ProviderLimiter(
+            "groq",
+            max(1, math.ceil(share(settings.GROQ_MAX_CONCURRENCY))),
+            share(settings.GROQ_REQUESTS_PER_MINUTE),
+            share(settings.GROQ_TOKENS_PER_MINUTE)
+        ),
+        ProviderLimiter(
+            "tavily",
+            max(1, math.ceil(share(settings.TAVILY_MAX_CONCURRENCY))),
+            share(settings.TAVILY_REQUESTS_PER_MINUTE)
+        )
+    ])
+
+
+# Singleton instance
+admission = build_admission_controller()
+
+
+def _llm_tokens(messages: List) -> int:
+    """Prompt tokens plus the expected completion, for the tokens/minute bucket"""
+    return count_message_tokens(messages) + settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+
+def guarded_invoke(llm, messages: List, config: Optional[Dict] = None) -> Any:
+    """
+    Invoke a chat model through Groq admission control
+    
+    Args:
+        llm: Chat model or structured-output runnable
+        messages: Prompt messages
+        config: Optional runnable config (tags, callbacks)
+    
+    Returns:
+        Model response
+    """
+    return admission.call("groq", llm.invoke, messages, config=config, tokens=_llm_tokens(messages))
+
+
+async def aguarded_invoke(llm, messages: List, config: Optional[Dict] = None) -> Any:
+    """Async variant of guarded_invoke"""
+    return await admission.acall("groq", llm.ainvoke, messages, config=config, tokens=_llm_tokens(messages))
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    In-process LRU cache with per-entry TTL, bounded by the total size in
+    bytes of the JSON-encoded values
+    """
+    
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live value (refreshing its LRU position) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value: Any, expires_at: Optional[float] = None):
+        """Insert a value, evicting least recently used entries over the byte budget"""
+        size = len(json.dumps(value, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at or time.time() + self.ttl_seconds, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class DiskCache:
+    """SQLite-backed cache tier that survives restarts and is shared across processes"""
+    
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer proceed together"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for a live entry, or None"""
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def put(self, key: str, value: Any):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), time.time() + self.ttl_seconds)
+            )
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key so they share one
+    execution. Sync callers share a Future; async callers share a task per
+    event loop.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[Tuple[int, str], "asyncio.Future"] = {}
+        self.coalesced = 0
+    
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run func once for all concurrent callers of key and return its result"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            future.set_result(func())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result()
+    
+    async def ado(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of do(); callers on the same event loop share one task"""
+        task_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(task)
+
+
+class TieredCache:
+    """Memory tier in front of an optional disk tier, with hit/miss statistics"""
+    
+    def __init__(self, memory: TTLCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.single_flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+    
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+    
+    def get_memory(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+        return value
+    
+    def get_disk(self, key: str) -> Optional[Any]:
+        """Look up the disk tier and promote hits into memory"""
+        if self.disk is None:
+            self._count("misses")
+            return None
+        entry = self.disk.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        value, expires_at = entry
+        self.memory.put(key, value, expires_at)
+        self._count("disk_hits")
+        return value
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Look up memory, then disk"""
+        value = self.get_memory(key)
+        return value if value is not None else self.get_disk(key)
+    
+    def put(self, key: str, value: Any):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and memory usage"""
+        with self._stats_lock:
+            counters = dict(self._stats)
+        lookups = sum(counters.values())
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "coalesced": self.single_flight.coalesced,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.memory),
+            "memory_bytes": self.memory.size_bytes,
+            "evictions": self.memory.evictions,
+            "disk_tier": self.disk is not None
+        }
@@ -0,0 +1,446 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from config.settings import settings
+
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '', checkpoint_id TEXT NOT NULL, "
+    "parent_checkpoint_id TEXT, type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB, "
+    "turn_id TEXT, PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))",
+    "CREATE TABLE IF NOT EXISTS writes ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '', checkpoint_id TEXT NOT NULL, "
+    "task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT, value BLOB, "
+    "task_path TEXT NOT NULL DEFAULT '', "
+    "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+    "CREATE TABLE IF NOT EXISTS threads (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_checkpoints_thread ON checkpoints (thread_id)",
+    "CREATE INDEX IF NOT EXISTS idx_writes_thread ON writes (thread_id)",
+    "CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads (updated_at)"
+)
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpoint saver backed by SQLite in WAL mode
+    
+    Survives restarts and can be shared by several worker processes on one
+    host. Each put/put_writes call is written in a single transaction (the
+    writes of one call with a single executemany; calls are not buffered, so
+    pending writes are durable as soon as LangGraph hands them over).
+    
+    A retention policy keeps storage bounded. A turn is the run of checkpoints
+    starting at an "input" checkpoint; once a new turn starts, the
+    intermediate checkpoints of older turns are deleted and only the last
+    checkpoint of each turn is kept, for the newest `max_turns_per_thread`
+    turns. Threads idle for longer than `thread_ttl_seconds` are deleted.
+    
+    Checkpoints are stored whole (channel values included), so trimming old
+    checkpoints never loses state needed by the ones that remain.
+    """
+    
+    def __init__(
+        self,
+        path: str = settings.CHECKPOINT_DB_PATH,
+        max_turns_per_thread: int = settings.CHECKPOINT_MAX_TURNS_PER_THREAD,
+        thread_ttl_seconds: float = settings.CHECKPOINT_THREAD_TTL_SECONDS,
+        sweep_interval_seconds: float = 60.0
+    ):
+        super().__init__()
+        self.path = path
+        self.max_turns_per_thread = max_turns_per_thread
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._last_sweep = time.time()
+        self._sweep_lock = threading.Lock()
+        self._local = threading.local()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(checkpoints)")}
+            if "turn_id" not in columns:
+                # Databases created before turn-based retention
+                connection.execute("ALTER TABLE checkpoints ADD COLUMN turn_id TEXT")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer proceed together"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    @staticmethod
+    def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id
+            }
+        }
+    
+    def _pending_writes(self, connection: sqlite3.Connection, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List:
+        """Return the writes of a checkpoint in the order LangGraph replays them"""
+        rows = connection.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        rows.sort(key=lambda row: writes_sort_key(row[5], row[0], row[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, value))) for task_id, _, channel, type_, value, _ in rows]
+    
+    def _tuple(self, connection: sqlite3.Connection, row: Tuple, metadata: Optional[Dict] = None) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata_blob = row
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                self._config(thread_id, checkpoint_ns, parent_checkpoint_id)
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=self._pending_writes(connection, thread_id, checkpoint_ns, checkpoint_id)
+        )
+    
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Fetch a checkpoint: the one named in the config, or the thread's latest
+        
+        Args:
+            config: Config carrying thread_id and optionally checkpoint_id
+        
+        Returns:
+            Checkpoint tuple, or None if the thread has no such checkpoint
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: Tuple = (thread_id, checkpoint_ns)
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        
+        connection = self._connection()
+        row = connection.execute(query, params).fetchone()
+        return self._tuple(connection, row) if row else None
+    
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        """
+        List checkpoints, newest first
+        
+        Args:
+            config: Config selecting the thread (None lists every thread)
+            filter: Metadata key/values the checkpoints must match
+            before: Only list checkpoints older than this one
+            limit: Maximum number of checkpoints to return
+        
+        Yields:
+            Matching checkpoint tuples
+        """
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        if limit is not None and not filter:
+            # Metadata filters are applied below, so only an unfiltered listing can stop in SQL
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        connection = self._connection()
+        remaining = limit
+        # Rows (checkpoint blobs included) are read as the caller iterates
+        for row in connection.execute(query, params):
+            if remaining is not None and remaining <= 0:
+                break
+            metadata = self.serde.loads_typed((row[6], row[7]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if remaining is not None:
+                remaining -= 1
+            yield self._tuple(connection, row, metadata)
+    
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        """
+        Store a checkpoint and, when it starts a turn, apply the retention policy
+        
+        Args:
+            config: Config of the parent checkpoint
+            checkpoint: Checkpoint to store
+            metadata: Checkpoint metadata
+            new_versions: Channel versions written by this step (unused; the
+                checkpoint is stored whole)
+        
+        Returns:
+            Config pointing at the stored checkpoint
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        metadata = get_checkpoint_metadata(config, metadata)
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+        parent_id = config["configurable"].get("checkpoint_id")
+        starts_turn = metadata.get("source") == "input"
+        
+        with self._connection() as connection:
+            # A turn starts at an input checkpoint; the rest inherit their parent's turn
+            parent = None if starts_turn or not parent_id else connection.execute(
+                "SELECT turn_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, parent_id)
+            ).fetchone()
+            turn_id = parent[0] if parent and parent[0] else checkpoint["id"]
+            connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, type, checkpoint, metadata_type, metadata, turn_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], parent_id,
+                    type_, serialized, metadata_type, metadata_blob, turn_id
+                )
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, time.time())
+            )
+            if starts_turn:
+                # Earlier turns are complete once a new one starts
+                self._trim(connection, thread_id, checkpoint_ns)
+        
+        self._maybe_sweep()
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+    
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        """
+        Store the pending writes of a task in one transaction (one executemany
+        per conflict policy)
+        
+        Args:
+            config: Config of the checkpoint the writes belong to
+            writes: (channel, value) pairs
+            task_id: Task that produced the writes
+            task_path: Path of the task
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        
+        # Special channels (negative index) overwrite; regular writes are kept
+        # from the first attempt, matching the in-memory saver
+        batches: Dict[str, List[Tuple]] = {"REPLACE": [], "IGNORE": []}
+        for index, (channel, value) in enumerate(writes):
+            type_, serialized = self.serde.dumps_typed(value)
+            batches["REPLACE" if channel in WRITES_IDX_MAP else "IGNORE"].append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, index),
+                channel, type_, serialized, task_path
+            ))
+        
+        with self._connection() as connection:
+            for conflict, rows in batches.items():
+                if rows:
+                    connection.executemany(
+                        f"INSERT OR {conflict} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+                        "idx, channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+    
+    def _trim(self, connection: sqlite3.Connection, thread_id: str, checkpoint_ns: str):
+        """
+        Delete the intermediate checkpoints of completed turns, and whole
+        turns beyond the newest N, with their writes
+        
+        Trimming runs as each turn starts, so a thread holds at most one
+        checkpoint per earlier turn plus the checkpoints of the current one.
+        """
+        by_turn: Dict[str, List[str]] = {}
+        for checkpoint_id, turn_id in connection.execute(
+            "SELECT checkpoint_id, turn_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id",
+            (thread_id, checkpoint_ns)
+        ):
+            # Rows written before turns were recorded count as turns of their own
+            by_turn.setdefault(turn_id or checkpoint_id, []).append(checkpoint_id)
+        turns = list(by_turn.values())
+        
+        stale = [checkpoint_id for turn in turns[:-1] for checkpoint_id in turn[:-1]]
+        if self.max_turns_per_thread > 0:
+            stale += [turn[-1] for turn in turns[:-self.max_turns_per_thread]]
+        if not stale:
+            return
+        for table in ("checkpoints", "writes"):
+            connection.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in stale]
+            )
+    
+    def _maybe_sweep(self):
+        """Run the idle-thread expiry at most once per sweep interval"""
+        if self.thread_ttl_seconds <= 0:
+            return
+        now = time.time()
+        with self._sweep_lock:
+            if now - self._last_sweep < self.sweep_interval_seconds:
+                return
+            self._last_sweep = now
+        self.purge_idle_threads()
+    
+    def purge_idle_threads(self) -> int:
+        """
+        Delete every thread with no checkpoint written for thread_ttl_seconds
+        
+        Returns:
+            Number of threads removed
+        """
+        cutoff = time.time() - self.thread_ttl_seconds
+        with self._connection() as connection:
+            thread_ids = [
+                row[0] for row in connection.execute(
+                    "SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,)
+                ).fetchall()
+            ]
+            for thread_id in thread_ids:
+                self._delete_thread(connection, thread_id)
+        return len(thread_ids)
+    
+    @staticmethod
+    def _delete_thread(connection: sqlite3.Connection, thread_id: str):
+        for table in ("checkpoints", "writes", "threads"):
+            connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+    
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread"""
+        with self._connection() as connection:
+            self._delete_thread(connection, thread_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return row counts and the database size on disk"""
+        connection = self._connection()
+        counts = {
+            table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("threads", "checkpoints", "writes")
+        }
+        size = sum(
+            os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path)
+        )
+        return {"backend": "sqlite", **counts, "size_bytes": size}
+    
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+    
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+    
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+    
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+    
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def build_checkpointer(backend: Optional[str] = None) -> BaseCheckpointSaver:
+    """
+    Create the checkpointer selected by CHECKPOINTER_BACKEND
+    
+    Args:
+        backend: "memory" or "sqlite" (defaults to the setting)
+    
+    Returns:
+        Checkpoint saver instance
+    """
+    backend = backend or settings.CHECKPOINTER_BACKEND
+    if backend == "memory":
+        return MemorySaver()
+    if backend == "sqlite":
+        return SQLiteCheckpointer()
+    raise ValueError(f"Unsupported checkpointer backend: {backend}")
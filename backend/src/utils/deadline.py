@@ -0,0 +1,41 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from langchain_core.runnables.config import var_child_runnable_config
+
+
+# Key of the run deadline in config["configurable"]; the "__" prefix keeps it
+# out of checkpoint and tracing metadata
+REQUEST_DEADLINE_KEY = "__request_deadline"
+
+# Absolute time.monotonic() by which the current provider call must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("call_deadline", default=None)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current call's deadline, or None when there is none"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """
+    Set the deadline seen by code running in this context
+    
+    Args:
+        deadline: Absolute time.monotonic() value, or None for no deadline
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_deadline() -> Optional[float]:
+    """Deadline of the workflow run calling this node, from the graph config"""
+    config = var_child_runnable_config.get() or {}
+    return config.get("configurable", {}).get(REQUEST_DEADLINE_KEY)
@@ -0,0 +1,269 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from config.prompts import PromptTemplates
+from config.settings import settings
+from src.utils.llm_clients import get_chat_model
+from src.utils.tokens import count_message_tokens, message_tokens, truncate_to_tokens
+from src.utils.resilience import aresilient_invoke, resilient_invoke
+
+
+logger = logging.getLogger(__name__)
+
+
+# Fixed id of the rolling summary message kept in state["messages"]
+SUMMARY_MESSAGE_ID = "history-summary"
+
+
+# Message kinds recorded in additional_kwargs (never sent to the model API)
+MESSAGE_KIND_KEY = "message_kind"
+QUESTION = "question"
+DRAFT = "draft"
+ANSWER = "answer"
+SCORE = "score"
+SUMMARY = "summary"
+
+
+def tag_message(message: BaseMessage, kind: str) -> BaseMessage:
+    """
+    Record what a message is (question, draft, answer, score, summary)
+    
+    Args:
+        message: Message about to be added to state["messages"]
+        kind: One of the message kind constants
+    
+    Returns:
+        The same message, tagged
+    """
+    message.additional_kwargs[MESSAGE_KIND_KEY] = kind
+    return message
+
+
+def message_kind(message: BaseMessage) -> str:
+    """
+    Return the kind of a message, inferring it for untagged messages
+    
+    Args:
+        message: Message from state["messages"]
+    
+    Returns:
+        Message kind
+    """
+    kind = message.additional_kwargs.get(MESSAGE_KIND_KEY)
+    if kind:
+        return kind
+    if message.id == SUMMARY_MESSAGE_ID:
+        return SUMMARY
+    if message.type == "human":
+        return QUESTION
+    # Untagged validator output is a bare score such as "8"
+    return SCORE if str(message.content).strip().isdigit() else ANSWER
+
+
+def conversation_view(messages: List[BaseMessage], question: str = "") -> Tuple[str, List[BaseMessage]]:
+    """
+    History as the model should see it: each turn's question and one final
+    answer, without agent drafts or validator scores
+    
+    Args:
+        messages: Contents of state["messages"]
+        question: Question of the turn in progress; its partial turn is left
+            out because callers add the question themselves
+    
+    Returns:
+        Tuple of (rolling summary text or "", question/answer messages)
+    """
+    summary, rest = split_summary(messages)
+    
+    turns: List[List[BaseMessage]] = []
+    for message in rest:
+        if message_kind(message) == QUESTION or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    
+    # Drop the turn currently being answered
+    if turns and question:
+        last = turns[-1]
+        answered = any(message_kind(message) == ANSWER for message in last)
+        if last[0].type == "human" and last[0].content == question and not answered:
+            turns.pop()
+    
+    view = []
+    for turn in turns:
+        view += [message for message in turn if message_kind(message) == QUESTION]
+        answers = [message for message in turn if message_kind(message) == ANSWER]
+        drafts = [message for message in turn if message_kind(message) == DRAFT]
+        view += (answers or drafts)[-1:]
+    return summary, view
+
+
+def split_summary(messages: List[BaseMessage]) -> Tuple[str, List[BaseMessage]]:
+    """
+    Separate the rolling summary from the regular conversation messages
+    
+    Args:
+        messages: Contents of state["messages"]
+    
+    Returns:
+        Tuple of (summary text or "", remaining messages in order)
+    """
+    summary = ""
+    rest = []
+    for message in messages or []:
+        if message.id == SUMMARY_MESSAGE_ID:
+            summary = message.content
+        else:
+            rest.append(message)
+    return summary, rest
+
+
+def token_window(messages: List[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """
+    Return the newest messages whose combined size fits a token budget
+    
+    Args:
+        messages: Messages in chronological order
+        max_tokens: Token budget for the window
+    
+    Returns:
+        Suffix of messages, in chronological order
+    """
+    used = 0
+    start = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        used += message_tokens(messages[index])
+        if used > max_tokens:
+            break
+        start = index
+    return messages[start:]
+
+
+class HistoryCompactor:
+    """
+    Keeps the stored conversation bounded
+    
+    When the messages of a thread exceed `max_tokens`, everything older than
+    the newest `window_tokens` worth of messages is folded into a single
+    rolling summary message and removed from the checkpointed state. The gap
+    between the two budgets means compaction runs every few turns rather than
+    on every turn.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = settings.MODEL_NAME,
+        max_tokens: int = settings.HISTORY_MAX_TOKENS,
+        window_tokens: int = settings.HISTORY_WINDOW_TOKENS,
+        summary_max_tokens: int = settings.HISTORY_SUMMARY_MAX_TOKENS
+    ):
+        self.llm = get_chat_model(model_name)
+        self.max_tokens = max_tokens
+        self.window_tokens = window_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.compactions = 0
+    
+    def plan(self, messages: List[BaseMessage]) -> Optional[Tuple[str, List[BaseMessage], List[BaseMessage]]]:
+        """
+        Decide whether the stored history needs compacting
+        
+        Args:
+            messages: Contents of state["messages"]
+        
+        Returns:
+            Tuple of (previous summary, messages to fold, messages to keep),
+            or None while the history is within budget
+        """
+        summary, rest = split_summary(messages)
+        if count_message_tokens(rest) <= self.max_tokens:
+            return None
+        recent = token_window(rest, self.window_tokens)
+        return summary, rest[:len(rest) - len(recent)], recent
+    
+    def build_prompt(self, summary: str, old: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        Build the summarization prompt
+        
+        Args:
+            summary: Previous rolling summary
+            old: Messages being folded into the summary
+        
+        Returns:
+            Formatted prompt messages
+        """
+        prompt = PromptTemplates.HISTORY_SUMMARY_PROMPT.format(max_words=int(self.summary_max_tokens * 0.75))
+        _, old = conversation_view(old)
+        transcript = "\n".join(
+            f"{message.type}: {truncate_to_tokens(str(message.content), self.summary_max_tokens)}"
+            for message in old
+        )
+        return [
+            SystemMessage(content=prompt),
+            HumanMessage(content=f"existing_summary: {summary or 'None'}\nmessages:\n{transcript}")
+        ]
+    
+    def fallback_summary(self, summary: str, old: List[BaseMessage]) -> str:
+        """Extractive summary used when the LLM call fails"""
+        parts = [summary] if summary else []
+        parts += [truncate_to_tokens(str(message.content), 40) for message in conversation_view(old)[1]]
+        return truncate_to_tokens(" ".join(parts), self.summary_max_tokens)
+    
+    def build_update(self, summary: str, recent: List[BaseMessage]) -> Dict:
+        """
+        Replace the stored messages with the summary and the recent window
+        
+        Args:
+            summary: Updated rolling summary
+            recent: Messages kept verbatim
+        
+        Returns:
+            State update for the messages channel
+        """
+        self.compactions += 1
+        logger.info("Compacted history", extra={"kept_messages": len(recent)})
+        return {
+            "messages": [
+                RemoveMessage(id=REMOVE_ALL_MESSAGES),
+                tag_message(
+                    SystemMessage(content=truncate_to_tokens(summary, self.summary_max_tokens), id=SUMMARY_MESSAGE_ID),
+                    SUMMARY
+                ),
+                *recent
+            ]
+        }
+    
+    def compact(self, state: Dict) -> Dict:
+        """
+        Compact state["messages"] if it exceeds the token budget
+        
+        Args:
+            state: Current agent state
+        
+        Returns:
+            State update (empty when nothing needs compacting)
+        """
+        plan = self.plan(state.get("messages", []))
+        if plan is None:
+            return {}
+        summary, old, recent = plan
+        try:
+            summary = resilient_invoke("summary", self.llm, self.build_prompt(summary, old)).content
+        except Exception as e:
+            logger.warning("History summarization failed, using extractive summary", extra={"error": str(e)})
+            summary = self.fallback_summary(summary, old)
+        return self.build_update(summary, recent)
+    
+    async def acompact(self, state: Dict) -> Dict:
+        """Async variant of compact"""
+        plan = self.plan(state.get("messages", []))
+        if plan is None:
+            return {}
+        summary, old, recent = plan
+        try:
+            summary = (await aresilient_invoke("summary", self.llm, self.build_prompt(summary, old))).content
+        except Exception as e:
+            logger.warning("History summarization failed, using extractive summary", extra={"error": str(e)})
+            summary = self.fallback_summary(summary, old)
+        return self.build_update(summary, recent)
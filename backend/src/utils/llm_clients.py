@@ -0,0 +1,260 @@
+import asyncio
+import importlib.util
+import os
+import ssl
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from config.settings import settings
+
+
+# Same override the Groq SDK reads
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com").rstrip("/")
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _timeout() -> httpx.Timeout:
+    # The Groq SDK takes its default request timeout from the client it is given
+    return httpx.Timeout(settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+
+
+class _SharedClient(httpx.Client):
+    """
+    Stable handle on the shared sync pool
+    
+    Chat models keep the client they were built with, so close() only closes
+    the pool behind it; the next request opens a new one.
+    """
+    
+    def __init__(self, pool_options: Callable[[], Dict[str, Any]]):
+        # The handle only builds requests; its own transport is never used
+        super().__init__(transport=httpx.BaseTransport(), timeout=_timeout(), trust_env=False)
+        self._pool_options = pool_options
+        self._pool_lock = threading.Lock()
+        self._pool: Optional[httpx.Client] = None
+    
+    @property
+    def pool(self) -> httpx.Client:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = httpx.Client(**self._pool_options())
+            return self._pool
+    
+    def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        return self.pool.send(request, **kwargs)
+    
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    """
+    Stable handle on the shared async pools, one per event loop
+    
+    Pooled connections belong to the loop that opened them, so a private loop
+    (e.g. AgentWorkflow.batch) gets its own pool instead of reusing the
+    server loop's connections. aclose() closes the pools and the next request
+    opens new ones.
+    """
+    
+    def __init__(self, pool_options: Callable[[], Dict[str, Any]]):
+        super().__init__(transport=httpx.AsyncBaseTransport(), timeout=_timeout(), trust_env=False)
+        self._pool_options = pool_options
+        self._pool_lock = threading.Lock()
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+    
+    @property
+    def pool(self) -> httpx.AsyncClient:
+        """Pool of the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._pool_lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = self._pools[loop] = httpx.AsyncClient(**self._pool_options())
+            return pool
+    
+    @property
+    def pool_count(self) -> int:
+        return len(self._pools)
+    
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        return await self.pool.send(request, **kwargs)
+    
+    async def release_loop(self):
+        """Close the running loop's pool (before closing a private loop)"""
+        with self._pool_lock:
+            pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+    
+    async def aclose(self):
+        """
+        Close the running loop's pool and forget the others; their
+        connections cannot be closed from another loop
+        """
+        await self.release_loop()
+        with self._pool_lock:
+            self._pools.clear()
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of chat model clients
+    
+    Clients are keyed by model name and parameters, so agents asking for the
+    same configuration share one instance. All clients share a single sync and
+    a single async keep-alive connection pool (per event loop), so warm
+    connections are reused across the supervisor, agents, synthesis and
+    validator. aclose() closes the pools but not the clients: the next request
+    reopens them, so agents built before a shutdown keep working after it.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, Any] = {}
+        self._http_client: Optional[_SharedClient] = None
+        self._http_async_client: Optional[_SharedAsyncClient] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._factory: Optional[Callable[..., Any]] = None
+    
+    def _pool_options(self) -> Dict[str, Any]:
+        """Connection pool limits, timeouts and TLS context shared by both HTTP clients"""
+        # Loading the CA bundle takes tens of milliseconds; do it once
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        return {
+            "verify": self._ssl_context,
+            "limits": httpx.Limits(
+                max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY
+            ),
+            "timeout": _timeout(),
+            "http2": settings.LLM_HTTP2 and _http2_available()
+        }
+    
+    @property
+    def http_client(self) -> httpx.Client:
+        """Shared synchronous connection pool (opened on first request)"""
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = _SharedClient(self._pool_options)
+            return self._http_client
+    
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        """Shared asynchronous connection pools (opened per event loop on first request)"""
+        with self._lock:
+            if self._http_async_client is None:
+                self._http_async_client = _SharedAsyncClient(self._pool_options)
+            return self._http_async_client
+    
+    def set_factory(self, factory: Optional[Callable[..., Any]]):
+        """
+        Replace how chat models are built (e.g. with fakes in benchmarks)
+        
+        Args:
+            factory: Callable taking (model_name, **params), or None to restore ChatGroq
+        """
+        with self._lock:
+            self._factory = factory
+            self._clients.clear()
+    
+    def get_chat_model(self, model_name: str = settings.MODEL_NAME, **params) -> Any:
+        """
+        Return the shared chat model for a model name and parameter set
+        
+        Args:
+            model_name: Groq model identifier
+            **params: Extra ChatGroq parameters (temperature, max_tokens, ...)
+        
+        Returns:
+            Chat model instance shared by every caller with the same arguments
+        """
+        key = (model_name, tuple(sorted(params.items())))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        
+        if self._factory is not None:
+            client = self._factory(model_name, **params)
+        else:
+            # Imported on first use: langchain_groq and the Groq SDK are slow to import
+            from langchain_groq import ChatGroq
+            
+            client = ChatGroq(
+                model=model_name,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                max_retries=settings.LLM_MAX_RETRIES,
+                **params
+            )
+        with self._lock:
+            return self._clients.setdefault(key, client)
+    
+    async def warm_up(self, connections: int) -> int:
+        """
+        Open keep-alive connections to Groq before requests need them
+        
+        Sends concurrent GET /models requests through the shared async pool,
+        so the TCP and TLS handshakes happen at startup instead of on the
+        first LLM calls. Connections stay pooled for LLM_POOL_KEEPALIVE_EXPIRY.
+        
+        Args:
+            connections: Connections to open (at most LLM_POOL_MAX_KEEPALIVE)
+        
+        Returns:
+            Number of requests that got a response
+        """
+        client = self.http_async_client
+        url = f"{GROQ_API_BASE}/openai/v1/models"
+        headers = {"Authorization": f"Bearer {settings.GROQ_API_KEY}"}
+        responses = await asyncio.gather(
+            *(client.get(url, headers=headers) for _ in range(min(connections, settings.LLM_POOL_MAX_KEEPALIVE))),
+            return_exceptions=True
+        )
+        return sum(isinstance(response, httpx.Response) for response in responses)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of shared clients and the pool configuration"""
+        options = self._pool_options()
+        return {
+            "clients": len(self._clients),
+            "async_pools": self._http_async_client.pool_count if self._http_async_client else 0,
+            "max_connections": settings.LLM_POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.LLM_POOL_MAX_KEEPALIVE,
+            "http2": options["http2"]
+        }
+    
+    async def release_loop(self):
+        """Close the async pool of the running event loop (call before closing a private loop)"""
+        if self._http_async_client is not None:
+            await self._http_async_client.release_loop()
+    
+    async def aclose(self):
+        """Close the shared connection pools; chat models reopen them on their next request"""
+        if self._http_client is not None:
+            self._http_client.close()
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+
+
+# Singleton instance
+llm_registry = LLMClientRegistry()
+
+
+def get_chat_model(model_name: str = settings.MODEL_NAME, **params) -> Any:
+    """Shortcut for llm_registry.get_chat_model"""
+    return llm_registry.get_chat_model(model_name, **params)
@@ -0,0 +1,268 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+from langchain_core.runnables.config import var_child_runnable_config
+
+from config.settings import settings
+
+
+# Loggers of this application; library loggers stay at WARNING
+APP_LOGGERS = ("src", "api", "config", "main", "__main__")
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+# ID of the HTTP request being served, set by api/middleware.py
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def _run_context() -> Dict[str, str]:
+    """request_id, plus thread_id and node of the graph run in this context, if any"""
+    config = var_child_runnable_config.get() or {}
+    context = {}
+    request_id = request_id_var.get()
+    if request_id:
+        context["request_id"] = request_id
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    if thread_id:
+        context["thread_id"] = thread_id
+    node = (config.get("metadata") or {}).get("langgraph_node")
+    if node:
+        context["node"] = node
+    return context
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and extra fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable records with the extra fields appended as key=value"""
+    
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in _extra_fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+class _ContextFilter(logging.Filter):
+    """Samples records below WARNING and stamps the rest with the request_id, thread_id and node"""
+    
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.sampled_out = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        for key, value in _run_context().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of waiting when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the writer thread; only the message is
+        # rendered here so arguments and tracebacks do not outlive the call
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, so redirecting it also silences the logs"""
+    
+    def emit(self, record: logging.LogRecord):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+_lock = threading.Lock()
+_handler: Optional[_NonBlockingQueueHandler] = None
+_filter: Optional[_ContextFilter] = None
+_listener: Optional[QueueListener] = None
+# Writer threads of the file loggers, by logger name
+_file_listeners: Dict[str, QueueListener] = {}
+
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    sample_rate: float = settings.LOG_SAMPLE_RATE,
+    queue_size: int = settings.LOG_QUEUE_SIZE
+):
+    """
+    Route log records through a queue to a background writer thread
+    
+    Calls on the request path only build the record and put it on the queue;
+    formatting and writing to stdout happen on the listener thread. Safe to
+    call more than once; later calls replace the earlier pipeline.
+    
+    Args:
+        level: Level of the application loggers (DEBUG, INFO, ...)
+        fmt: "json" for one JSON object per line, "text" for plain lines
+        sample_rate: Share of records below WARNING that are kept
+        queue_size: Records buffered for the writer before new ones are dropped
+    """
+    global _handler, _filter, _listener
+    with _lock:
+        _stop()
+        
+        writer = _StdoutHandler()
+        writer.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        log_queue = queue.Queue(maxsize=max(1, queue_size))
+        _filter = _ContextFilter(sample_rate)
+        _handler = _NonBlockingQueueHandler(log_queue)
+        _handler.addFilter(_filter)
+        _listener = QueueListener(log_queue, writer, respect_handler_level=False)
+        _listener.start()
+        
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        if root.level == logging.NOTSET or root.level > logging.WARNING:
+            root.setLevel(logging.WARNING)
+        for name in APP_LOGGERS:
+            logging.getLogger(name).setLevel(level)
+
+
+def file_logger(
+    path: str,
+    max_bytes: int,
+    backup_count: int,
+    queue_size: int = settings.LOG_QUEUE_SIZE
+) -> logging.Logger:
+    """
+    Logger appending each message as one line to a size-rotated file
+    
+    Like the application logs, records are queued and written by a
+    background thread, so callers on the event loop never touch the disk.
+    The logger does not propagate; its lines carry only the message. With
+    several worker processes each writes its own file (the process id is
+    added before the extension), since rotating a file that other processes
+    append to loses lines.
+    
+    Args:
+        path: File to write; calls with the same path share one logger
+        max_bytes: Size at which the file is rotated
+        backup_count: Rotated files kept (path.1 ... path.N)
+        queue_size: Lines buffered for the writer before new ones are dropped
+    
+    Returns:
+        The logger, ready for logger.info(line)
+    """
+    name = f"file:{os.path.abspath(path)}"
+    logger = logging.getLogger(name)
+    with _lock:
+        if name in _file_listeners:
+            return logger
+        if settings.WORKERS > 1:
+            root, extension = os.path.splitext(path)
+            path = f"{root}.{os.getpid()}{extension}"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        
+        writer = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        writer.setFormatter(logging.Formatter("%(message)s"))
+        log_queue = queue.Queue(maxsize=max(1, queue_size))
+        listener = QueueListener(log_queue, writer, respect_handler_level=False)
+        listener.start()
+        _file_listeners[name] = listener
+        
+        logger.addHandler(_NonBlockingQueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def _stop():
+    global _handler, _listener
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        # Writes out the records still queued, then joins the thread
+        try:
+            _listener.stop()
+        except queue.Full:
+            # No room for the stop sentinel; the daemon thread ends with the process
+            pass
+        _listener = None
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    with _lock:
+        _stop()
+
+
+def _stop_file_loggers():
+    """Write out the lines still queued for the file loggers (at exit)"""
+    with _lock:
+        for listener in _file_listeners.values():
+            try:
+                listener.stop()
+            except queue.Full:
+                pass
+            for handler in listener.handlers:
+                handler.close()
+        _file_listeners.clear()
+
+
+def log_stats() -> Dict[str, int]:
+    """Records dropped because the queue was full and records skipped by sampling"""
+    return {
+        "dropped": _handler.dropped if _handler is not None else 0,
+        "sampled_out": _filter.sampled_out if _filter is not None else 0
+    }
+
+
+atexit.register(shutdown_logging)
+atexit.register(_stop_file_loggers)
@@ -0,0 +1,361 @@
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables.config import var_child_runnable_config
+from pydantic import BaseModel
+
+from config.settings import settings
+from src.utils.tokens import count_message_tokens, count_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+# Latency buckets (seconds) shared by the duration histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Nodes whose classification is only known from their own output
+CLASSIFYING_NODES = ("supervisor", "speculate")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+    
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format (0.0.4)"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+    
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+    
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+    
+    def render(self) -> str:
+        """Exposition text of every registered metric"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+metrics = MetricsRegistry()
+
+NODE_SECONDS = metrics.histogram("agent_node_duration_seconds", "Graph node latency", ("node", "route"))
+NODE_ERRORS = metrics.counter("agent_node_errors_total", "Graph node failures", ("node", "route", "error"))
+LLM_SECONDS = metrics.histogram("agent_llm_call_duration_seconds", "LLM call latency including retries", ("call", "node"))
+LLM_TOKENS = metrics.counter("agent_llm_tokens_total", "LLM tokens by direction (input/output)", ("call", "node", "direction"))
+LLM_ERRORS = metrics.counter("agent_llm_errors_total", "Failed LLM calls", ("call", "node", "error"))
+SEARCH_SECONDS = metrics.histogram("agent_search_duration_seconds", "Web search latency (cache hits included)", ("node",))
+SEARCH_ERRORS = metrics.counter("agent_search_errors_total", "Failed web searches", ("node", "error"))
+CACHE_REQUESTS = metrics.counter("agent_cache_requests_total", "Cache lookups by result (hit/miss)", ("cache", "node", "result"))
+HTTP_SECONDS = metrics.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "path", "status"))
+
+
+class RequestTimings:
+    """Time spent per node and per LLM / search call while serving one request"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, float]] = {}
+        self._calls: Dict[str, Dict[str, float]] = {}
+    
+    @staticmethod
+    def _add(table: Dict[str, Dict[str, float]], key: str, seconds: float, **counts: int):
+        entry = table.setdefault(key, {"count": 0, "ms": 0.0})
+        entry["count"] += 1
+        entry["ms"] += seconds * 1000
+        for name, value in counts.items():
+            entry[name] = entry.get(name, 0) + value
+    
+    def add_node(self, node: str, seconds: float):
+        with self._lock:
+            self._add(self._nodes, node, seconds)
+    
+    def add_call(self, call: str, seconds: float, **counts: int):
+        with self._lock:
+            self._add(self._calls, call, seconds, **counts)
+    
+    def breakdown(self) -> Dict[str, Any]:
+        """Total, per-node and per-call milliseconds (calls also carry token counts)"""
+        with self._lock:
+            nodes = {node: {**entry, "ms": round(entry["ms"], 1)} for node, entry in self._nodes.items()}
+            calls = {call: {**entry, "ms": round(entry["ms"], 1)} for call, entry in self._calls.items()}
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "nodes": nodes,
+            "calls": calls
+        }
+
+
+# Timings of the request being served; graph tasks and worker threads
+# inherit it through their copied context
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def request_timing():
+    """
+    Collect the timing breakdown of the work done in this context
+    
+    Yields:
+        RequestTimings filled in by the instrumented nodes and calls
+    """
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def current_node() -> str:
+    """Graph node running in this context, or "" outside the graph"""
+    config = var_child_runnable_config.get() or {}
+    return (config.get("metadata") or {}).get("langgraph_node", "")
+
+
+def _route(name: str, state: Dict, update: Any = None) -> str:
+    """Classifier route of a node run, for labels"""
+    if name in CLASSIFYING_NODES:
+        route = update.get("classifier_response") if isinstance(update, dict) else None
+    else:
+        route = state.get("classifier_response") if isinstance(state, dict) else None
+    return route or "none"
+
+
+def _record_node(name: str, state: Dict, seconds: float, update: Any = None, error: Optional[BaseException] = None):
+    route = _route(name, state, update)
+    NODE_SECONDS.observe(seconds, node=name, route=route)
+    fields = {"node": name, "route": route, "duration_ms": round(seconds * 1000, 1)}
+    if error is not None:
+        NODE_ERRORS.inc(node=name, route=route, error=type(error).__name__)
+        logger.warning("Node failed", extra={**fields, "error": type(error).__name__})
+    else:
+        logger.debug("Node finished", extra=fields)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add_node(name, seconds)
+
+
+def instrument_node(name: str, func: Callable, afunc: Callable) -> Tuple[Callable, Callable]:
+    """
+    Wrap a node's sync and async implementations with latency and error metrics
+    
+    Args:
+        name: Node name in the graph
+        func: Synchronous node implementation
+        afunc: Asynchronous node implementation
+    
+    Returns:
+        Instrumented (func, afunc); both accept the run config, which is
+        forwarded when the wrapped implementation takes it
+    """
+    if not settings.METRICS_ENABLED:
+        return func, afunc
+    
+    sync_config = "config" in inspect.signature(func).parameters
+    async_config = "config" in inspect.signature(afunc).parameters
+    
+    def timed(state, config):
+        start = time.perf_counter()
+        try:
+            update = func(state, config=config) if sync_config else func(state)
+        except Exception as e:
+            _record_node(name, state, time.perf_counter() - start, error=e)
+            raise
+        _record_node(name, state, time.perf_counter() - start, update)
+        return update
+    
+    async def atimed(state, config):
+        start = time.perf_counter()
+        try:
+            update = await (afunc(state, config=config) if async_config else afunc(state))
+        except Exception as e:
+            _record_node(name, state, time.perf_counter() - start, error=e)
+            raise
+        _record_node(name, state, time.perf_counter() - start, update)
+        return update
+    
+    # Keep the implementation's name for tracing
+    timed.__name__ = getattr(func, "__name__", name)
+    atimed.__name__ = getattr(afunc, "__name__", name)
+    return timed, atimed
+
+
+def _usage(response: Any) -> Dict[str, int]:
+    usage = getattr(response, "usage_metadata", None)
+    return usage if isinstance(usage, dict) else {}
+
+
+def _output_tokens(response: Any) -> int:
+    usage = _usage(response)
+    if "output_tokens" in usage:
+        return usage["output_tokens"]
+    if isinstance(response, BaseModel) and not hasattr(response, "content"):
+        # Structured output: the model produced the schema's JSON
+        return count_tokens(response.model_dump_json())
+    content = getattr(response, "content", response)
+    return count_tokens(content if isinstance(content, str) else str(content))
+
+
+def record_llm_call(call: str, messages: Iterable, seconds: float, response: Any = None, error: Optional[BaseException] = None):
+    """
+    Record one logical LLM call (retries and hedges included)
+    
+    Args:
+        call: Budget name of the call (supervisor, agent, synthesis, ...)
+        messages: Prompt messages
+        seconds: Wall time of the call
+        response: Model response, when the call succeeded
+        error: Exception the call failed with
+    """
+    if not settings.METRICS_ENABLED:
+        return
+    node = current_node()
+    LLM_SECONDS.observe(seconds, call=call, node=node)
+    if error is not None:
+        LLM_ERRORS.inc(call=call, node=node, error=type(error).__name__)
+        input_tokens, output_tokens = 0, 0
+    else:
+        input_tokens = _usage(response).get("input_tokens") or count_message_tokens(messages)
+        output_tokens = _output_tokens(response)
+        LLM_TOKENS.inc(input_tokens, call=call, node=node, direction="input")
+        LLM_TOKENS.inc(output_tokens, call=call, node=node, direction="output")
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add_call(f"llm.{call}", seconds, input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+def record_search(seconds: float, error: Optional[BaseException] = None):
+    """Record one web search (cache hits included)"""
+    if not settings.METRICS_ENABLED:
+        return
+    node = current_node()
+    SEARCH_SECONDS.observe(seconds, node=node)
+    if error is not None:
+        SEARCH_ERRORS.inc(node=node, error=type(error).__name__)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add_call("search", seconds)
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a lookup in the search or semantic cache"""
+    if not settings.METRICS_ENABLED:
+        return
+    CACHE_REQUESTS.inc(cache=cache, node=current_node() or "request", result="hit" if hit else "miss")
+
+
+def record_http(method: str, path: str, status: int, seconds: float):
+    """Record one HTTP request (path is the route template)"""
+    if not settings.METRICS_ENABLED:
+        return
+    HTTP_SECONDS.observe(seconds, method=method, path=path, status=status)
@@ -0,0 +1,93 @@
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from src.utils.tokens import MESSAGE_OVERHEAD_TOKENS, count_tokens, message_tokens, truncate_to_tokens
+
+
+SUMMARY_HEADER = "\n\nSummary of the earlier conversation:\n"
+
+
+class PromptAssembler:
+    """
+    Fits a prompt into a token budget
+    
+    A prompt is made of the system prompt, the rolling history summary, the
+    conversation history, context sections (web search results, agent
+    drafts, ...) and the question. The system prompt and the question are
+    always kept whole; when the rest does not fit, the lowest-value parts are
+    cut first:
+    
+    1. the oldest history messages are dropped, one at a time
+    2. the history summary is truncated
+    3. context sections are truncated in the order given (lowest value first)
+    
+    Older turns are already folded into the summary by HistoryCompactor, so
+    dropping history here loses detail rather than whole topics.
+    """
+    
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.truncations = 0
+    
+    def assemble(
+        self,
+        system_prompt: str,
+        question: str,
+        history: Optional[Sequence[BaseMessage]] = None,
+        summary: str = "",
+        sections: Optional[Sequence[Tuple[str, str]]] = None
+    ) -> List[BaseMessage]:
+        """
+        Build the message list for one LLM call within the token budget
+        
+        Args:
+            system_prompt: Node system prompt
+            question: Formatted question line (e.g. "question: ...")
+            history: Conversation messages in chronological order
+            summary: Rolling summary of earlier turns
+            sections: (label, text) context sections appended after the
+                question, ordered from lowest to highest value
+        
+        Returns:
+            Ordered list of messages
+        """
+        history = list(history or [])
+        sections = [(label, str(text)) for label, text in sections or []]
+        
+        # Tokens needed by each part
+        fixed = count_tokens(system_prompt) + count_tokens(question) + 2 * MESSAGE_OVERHEAD_TOKENS
+        summary_tokens = count_tokens(summary)
+        if summary:
+            fixed += count_tokens(SUMMARY_HEADER)
+        history_tokens = [message_tokens(message) for message in history]
+        section_tokens = [count_tokens(f"{label}: {text}") for label, text in sections]
+        over = fixed + summary_tokens + sum(history_tokens) + sum(section_tokens) - self.max_tokens
+        
+        if over > 0:
+            self.truncations += 1
+        
+        # 1. Drop the oldest history messages
+        while over > 0 and history:
+            history.pop(0)
+            over -= history_tokens.pop(0)
+        
+        # 2. Truncate the summary
+        if over > 0 and summary:
+            keep = max(0, summary_tokens - over)
+            summary = truncate_to_tokens(summary, keep)
+            over -= summary_tokens - count_tokens(summary)
+        
+        # 3. Truncate context sections, lowest value first
+        for index, (label, text) in enumerate(sections):
+            if over <= 0:
+                break
+            keep = max(0, count_tokens(text) - over)
+            shortened = truncate_to_tokens(text, keep)
+            over -= count_tokens(text) - count_tokens(shortened)
+            sections[index] = (label, shortened)
+        
+        if summary:
+            system_prompt = f"{system_prompt}{SUMMARY_HEADER}{summary}"
+        content = "\n".join([question] + [f"{label}: {text}" for label, text in sections])
+        return [SystemMessage(content=system_prompt), *history, HumanMessage(content=content)]
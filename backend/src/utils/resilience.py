@@ -0,0 +1,383 @@
+import asyncio
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextvars import copy_context
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from config.settings import settings
+from src.utils.admission import AdmissionRejected, aguarded_invoke, guarded_invoke
+from src.utils.deadline import deadline_scope, request_deadline
+from src.utils.metrics import record_llm_call
+from src.utils.streaming import ANSWER_STREAM_TAG
+
+
+logger = logging.getLogger(__name__)
+
+
+# HTTP statuses worth retrying (timeouts, rate limits, upstream hiccups)
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call does not finish within its node or request deadline"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed provider call is worth retrying
+    
+    Args:
+        error: Exception raised by the call
+    
+    Returns:
+        True for timeouts, connection errors, 429 and 5xx responses
+    """
+    if isinstance(error, (AdmissionRejected, DeadlineExceeded)):
+        # Our own overload / deadline decisions; retrying would only add load
+        return False
+    # Imported here so that importing this module does not load the Groq SDK
+    import groq
+    
+    if isinstance(error, TIMEOUT_ERRORS + (httpx.TransportError, groq.APIConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in TRANSIENT_STATUS_CODES
+
+
+class LatencyWindow:
+    """Rolling window of recent call latencies used to pick the hedge delay"""
+    
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        """Latency quantile, or None until min_samples calls were recorded"""
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ResilientCaller:
+    """
+    Deadlines, retries and hedging around provider calls
+    
+    Every call runs within a deadline: its node's budget (NODE_TIMEOUT_*),
+    cut short by whatever is left of the workflow run's REQUEST_TIMEOUT_SECONDS.
+    Transient failures are retried with decorrelated jitter backoff
+    (sleep = min(cap, uniform(base, 3 * previous sleep))) while time remains.
+    For hedged nodes, a call still running after that node's recent
+    HEDGE_QUANTILE latency gets one duplicate request and the first response
+    wins; HEDGE_MAX_RATIO caps the extra load.
+    
+    Call functions receive `primary`, False only for hedged duplicates, so LLM
+    calls can keep those out of the client token stream. Retries replace a
+    failed request and stay primary.
+    """
+    
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, float]] = None,
+        max_attempts: int = settings.RETRY_MAX_ATTEMPTS,
+        base_delay: float = settings.RETRY_BASE_DELAY,
+        max_delay: float = settings.RETRY_MAX_DELAY,
+        hedge_nodes: Optional[set] = None,
+        hedge_quantile: float = settings.HEDGE_QUANTILE,
+        hedge_min_samples: int = settings.HEDGE_MIN_SAMPLES,
+        hedge_max_ratio: float = settings.HEDGE_MAX_RATIO,
+        max_workers: int = 64
+    ):
+        self.budgets = budgets or {}
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_nodes = hedge_nodes or set()
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = hedge_max_ratio
+        self.latencies: Dict[str, LatencyWindow] = {}
+        
+        # Sync calls run on worker threads so a stalled response can be abandoned
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provider-call")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+    
+    # Bookkeeping
+    
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+    
+    def _deadline(self, node: str) -> Optional[float]:
+        """Absolute deadline of a call: node budget capped by the request deadline"""
+        deadlines = [request_deadline()]
+        budget = self.budgets.get(node)
+        if budget:
+            deadlines.append(time.monotonic() + budget)
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        return min(deadlines) if deadlines else None
+    
+    def _window(self, node: str) -> LatencyWindow:
+        window = self.latencies.get(node)
+        if window is None:
+            with self._lock:
+                window = self.latencies.setdefault(node, LatencyWindow())
+        return window
+    
+    def _hedge_delay(self, node: str) -> Optional[float]:
+        """Seconds after which to hedge, or None when this call is not hedged"""
+        if node not in self.hedge_nodes:
+            return None
+        with self._lock:
+            if self._stats["hedges"] >= self.hedge_max_ratio * self._stats["calls"]:
+                return None
+        return self._window(node).quantile(self.hedge_quantile, self.hedge_min_samples)
+    
+    def _backoff(self, previous: float) -> float:
+        """Decorrelated jitter: grows roughly 3x per retry, capped at max_delay"""
+        return min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+    
+    def _timeout(self, node: str) -> DeadlineExceeded:
+        self._count("timeouts")
+        return DeadlineExceeded(f"{node} call did not finish within its deadline")
+    
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else deadline - time.monotonic()
+    
+    # Sync path
+    
+    def _submit(self, func: Callable[[bool], Any], primary: bool, deadline: Optional[float]) -> concurrent.futures.Future:
+        """Run one request on a worker thread, carrying over the caller's context"""
+        def run():
+            with deadline_scope(deadline):
+                return func(primary)
+        return self._executor.submit(copy_context().run, run)
+    
+    def _attempt(self, node: str, func: Callable[[bool], Any], deadline: Optional[float]) -> Any:
+        """One attempt, hedged when the node allows it"""
+        futures = [self._submit(func, True, deadline)]
+        hedge_delay = self._hedge_delay(node)
+        if hedge_delay is not None:
+            remaining = self._remaining(deadline)
+            done, _ = concurrent.futures.wait(futures, timeout=hedge_delay if remaining is None else min(hedge_delay, remaining))
+            if not done and (remaining is None or remaining > hedge_delay):
+                self._count("hedges")
+                futures.append(self._submit(func, False, deadline))
+        
+        pending = set(futures)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=self._remaining(deadline), return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count("hedge_wins")
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        for future in pending:
+            # Not yet started requests are dropped; running ones finish unobserved
+            future.cancel()
+        raise self._timeout(node)
+    
+    def call(self, node: str, func: Callable[[bool], Any]) -> Any:
+        """
+        Run a provider call with the node's deadline, retries and hedging
+        
+        Args:
+            node: Budget name ("supervisor", "agent", "synthesis", "validator",
+                "summary", "search")
+            func: Performs one request; receives `primary` (False for hedged
+                duplicates)
+        
+        Returns:
+            Result of the first successful request
+        """
+        self._count("calls")
+        deadline = self._deadline(node)
+        delay = self.base_delay
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.monotonic()
+            try:
+                result = self._attempt(node, func, deadline)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_transient(e):
+                    raise
+                delay = self._backoff(delay)
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= delay:
+                    raise
+                logger.warning(
+                    "Retrying provider call",
+                    extra={"call": node, "attempt": attempt, "error": type(e).__name__, "delay_ms": round(delay * 1000, 1)}
+                )
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            self._window(node).record(time.monotonic() - start)
+            return result
+    
+    # Async path
+    
+    async def _aattempt(self, node: str, func: Callable[[bool], Awaitable], deadline: Optional[float]) -> Any:
+        """Async variant of _attempt; losing requests are cancelled"""
+        async def run(primary: bool):
+            with deadline_scope(deadline):
+                return await func(primary)
+        
+        tasks = [asyncio.ensure_future(run(True))]
+        try:
+            hedge_delay = self._hedge_delay(node)
+            if hedge_delay is not None:
+                remaining = self._remaining(deadline)
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay if remaining is None else min(hedge_delay, remaining))
+                if not done and (remaining is None or remaining > hedge_delay):
+                    self._count("hedges")
+                    tasks.append(asyncio.ensure_future(run(False)))
+            
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                remaining = self._remaining(deadline)
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if remaining is None else max(0.0, remaining),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not pending:
+                raise error
+            raise self._timeout(node)
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def acall(self, node: str, func: Callable[[bool], Awaitable]) -> Any:
+        """Async variant of call; func returns an awaitable"""
+        self._count("calls")
+        deadline = self._deadline(node)
+        delay = self.base_delay
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.monotonic()
+            try:
+                result = await self._aattempt(node, func, deadline)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_transient(e):
+                    raise
+                delay = self._backoff(delay)
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= delay:
+                    raise
+                logger.warning(
+                    "Retrying provider call",
+                    extra={"call": node, "attempt": attempt, "error": type(e).__name__, "delay_ms": round(delay * 1000, 1)}
+                )
+                self._count("retries")
+                await asyncio.sleep(delay)
+                continue
+            self._window(node).record(time.monotonic() - start)
+            return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Call, retry, timeout and hedge counters plus current hedge delays"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["p95_seconds"] = {
+            node: window.quantile(self.hedge_quantile, 1) for node, window in list(self.latencies.items())
+        }
+        return stats
+
+
+def build_resilient_caller() -> ResilientCaller:
+    """Create the caller from the NODE_TIMEOUT_* and HEDGE_* settings"""
+    return ResilientCaller(
+        budgets={
+            "supervisor": settings.NODE_TIMEOUT_SUPERVISOR,
+            "agent": settings.NODE_TIMEOUT_AGENT,
+            "synthesis": settings.NODE_TIMEOUT_SYNTHESIS,
+            "validator": settings.NODE_TIMEOUT_VALIDATOR,
+            "summary": settings.NODE_TIMEOUT_SUMMARY,
+            "search": settings.NODE_TIMEOUT_SEARCH
+        },
+        hedge_nodes={node.strip() for node in settings.HEDGE_NODES.split(",") if node.strip()}
+        if settings.HEDGE_ENABLED else set()
+    )
+
+
+# Singleton instance
+resilience = build_resilient_caller()
+
+
+def _quiet(config: Optional[Dict]) -> Optional[Dict]:
+    """Config for a duplicate request: same call, tokens not streamed to clients"""
+    if not config or ANSWER_STREAM_TAG not in config.get("tags", []):
+        return config
+    return {**config, "tags": [tag for tag in config["tags"] if tag != ANSWER_STREAM_TAG]}
+
+
+def resilient_invoke(node: str, llm, messages, config: Optional[Dict] = None) -> Any:
+    """
+    Invoke a chat model with admission control, deadline, retries and hedging
+    
+    Args:
+        node: Budget name of the calling node
+        llm: Chat model or structured-output runnable
+        messages: Prompt messages
+        config: Optional runnable config (tags, callbacks)
+    
+    Returns:
+        Model response
+    """
+    start = time.perf_counter()
+    try:
+        response = resilience.call(node, lambda primary: guarded_invoke(llm, messages, config if primary else _quiet(config)))
+    except Exception as e:
+        record_llm_call(node, messages, time.perf_counter() - start, error=e)
+        raise
+    record_llm_call(node, messages, time.perf_counter() - start, response)
+    return response
+
+
+async def aresilient_invoke(node: str, llm, messages, config: Optional[Dict] = None) -> Any:
+    """Async variant of resilient_invoke"""
+    start = time.perf_counter()
+    try:
+        response = await resilience.acall(
+            node, lambda primary: aguarded_invoke(llm, messages, config if primary else _quiet(config))
+        )
+    except Exception as e:
+        record_llm_call(node, messages, time.perf_counter() - start, error=e)
+        raise
+    record_llm_call(node, messages, time.perf_counter() - start, response)
+    return response
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import List, Literal
 
 
 class SupervisorResponse(BaseModel):
@@ -19,3 +19,29 @@ class ConfidenceScore(BaseModel):
     range: str = Field(
         description="Confidence score in the range between 0-10 only"
     )
+
+
+class BatchClassification(SupervisorResponse):
+    """Classification of one question of a batch"""
+    index: int = Field(..., description="Number of the question in the batch")
+
+
+class BatchSupervisorResponse(BaseModel):
+    """Schema for a batched supervisor classification response"""
+    items: List[BatchClassification] = Field(
+        ...,
+        description="One classification per question, identified by its number"
+    )
+
+
+class BatchScore(ConfidenceScore):
+    """Confidence score of one answer of a batch"""
+    index: int = Field(..., description="Number of the question/answer pair in the batch")
+
+
+class BatchConfidenceScore(BaseModel):
+    """Schema for a batched validator response"""
+    items: List[BatchScore] = Field(
+        ...,
+        description="One confidence score per question/answer pair, identified by its number"
+    )
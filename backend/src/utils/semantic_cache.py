@@ -0,0 +1,355 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    # Fall back to brute-force numpy search
+    faiss = None
+
+from config.settings import settings
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashedEmbedding:
+    """
+    Cheap local embedding: hashed word and character trigram counts,
+    L2-normalised so inner product equals cosine similarity
+    """
+    
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+    
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = _TOKEN_RE.findall(text.lower())
+        grams = [f"w:{word}" for word in words]
+        for word in words:
+            padded = f"<{word}>"
+            grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        for gram in grams:
+            vector[zlib.crc32(gram.encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedding:
+    """Embedding backed by a local sentence-transformers model"""
+    
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+    
+    def __call__(self, text: str) -> np.ndarray:
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+class _VectorIndex:
+    """Inner-product index over normalised vectors (faiss, or numpy if unavailable)"""
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+        if faiss is not None:
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        else:
+            self._ids: List[int] = []
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+    
+    def add(self, entry_id: int, vector: np.ndarray):
+        if faiss is not None:
+            self._index.add_with_ids(vector.reshape(1, -1), np.array([entry_id], dtype=np.int64))
+        else:
+            self._ids.append(entry_id)
+            self._vectors = np.vstack([self._vectors, vector.reshape(1, -1)])
+    
+    def remove(self, entry_id: int):
+        if faiss is not None:
+            self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+        else:
+            position = self._ids.index(entry_id)
+            self._ids.pop(position)
+            self._vectors = np.delete(self._vectors, position, axis=0)
+    
+    def nearest(self, vector: np.ndarray):
+        """Return (entry_id, similarity) of the closest vector, or None if empty"""
+        if faiss is not None:
+            if self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector.reshape(1, -1), 1)
+            return int(ids[0][0]), float(scores[0][0])
+        if not self._ids:
+            return None
+        scores = self._vectors @ vector
+        best = int(np.argmax(scores))
+        return self._ids[best], float(scores[best])
+
+
+class SemanticCacheStore:
+    """
+    SQLite journal of cached answers shared by the worker processes on one host
+    
+    Each worker appends the answers it caches (with their embedding) and
+    periodically reads the rows other workers appended, so an answer cached
+    by one worker is served by all of them.
+    """
+    
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._appends = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, vector BLOB NOT NULL, "
+                "answer TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created_at)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer proceed together"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def append(self, vector: np.ndarray, values: Dict[str, Any], created_at: float) -> int:
+        """Add an entry and return its row id"""
+        with self._connection() as connection:
+            row_id = connection.execute(
+                "INSERT INTO entries (vector, answer, created_at) VALUES (?, ?, ?)",
+                (vector.astype(np.float32).tobytes(), json.dumps(values, default=str), created_at)
+            ).lastrowid
+        self._appends += 1
+        if self._appends % 100 == 0:
+            self.purge_expired()
+        return row_id
+    
+    def since(self, after_id: int, limit: int = 1000) -> List[Tuple[int, np.ndarray, Dict[str, Any], float]]:
+        """Live entries appended after row after_id, oldest first"""
+        rows = self._connection().execute(
+            "SELECT id, vector, answer, created_at FROM entries WHERE id > ? AND created_at > ? ORDER BY id LIMIT ?",
+            (after_id, time.time() - self.ttl_seconds, limit)
+        ).fetchall()
+        return [
+            (row_id, np.frombuffer(vector, dtype=np.float32), json.loads(answer), created_at)
+            for row_id, vector, answer, created_at in rows
+        ]
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        with self._connection() as connection:
+            return connection.execute(
+                "DELETE FROM entries WHERE created_at <= ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on question embeddings
+    
+    Lookups return a stored answer when the nearest cached question is at least
+    `threshold` cosine-similar and younger than `ttl_seconds`. The cache is
+    bounded to `max_entries` with least-recently-used eviction. With a
+    `shared` store, answers cached by other processes are picked up every
+    `sync_interval` seconds.
+    """
+    
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], np.ndarray]] = None,
+        threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: float = settings.SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries: int = settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        min_score: int = settings.CONFIDENCE_THRESHOLD,
+        shared: Optional[SemanticCacheStore] = None,
+        sync_interval: float = 1.0
+    ):
+        self.embed = embed or HashedEmbedding()
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_score = min_score
+        self.shared = shared
+        self.sync_interval = sync_interval
+        
+        self._lock = threading.Lock()
+        self._index = _VectorIndex(self.embed.dim)
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "rejected": 0, "evictions": 0, "expirations": 0, "synced": 0}
+        # Shared-store rows already applied, and rows this process appended
+        self._synced_id = 0
+        self._own_rows = set()
+        self._last_sync = 0.0
+        self._sync_lock = threading.Lock()
+    
+    def _drop(self, entry_id: int):
+        self._entries.pop(entry_id, None)
+        self._index.remove(entry_id)
+    
+    def _insert(self, vector: np.ndarray, values: Dict[str, Any], created_at: float):
+        """Add an entry, replacing a near-duplicate and evicting beyond max_entries (lock held)"""
+        match = self._index.nearest(vector)
+        if match is not None and match[1] >= self.threshold:
+            self._drop(match[0])
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self._index.add(entry_id, vector)
+        self._entries[entry_id] = {"values": dict(values), "created_at": created_at}
+        
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._drop(oldest_id)
+            self._stats["evictions"] += 1
+    
+    def _sync(self):
+        """Apply the entries other processes added to the shared store"""
+        if self.shared is None or time.time() - self._last_sync < self.sync_interval:
+            return
+        # Lookups run in worker threads on the async path; one sync at a time
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sync = time.time()
+            rows = self.shared.since(self._synced_id)
+            with self._lock:
+                for row_id, vector, values, created_at in rows:
+                    self._synced_id = max(self._synced_id, row_id)
+                    if row_id in self._own_rows:
+                        self._own_rows.discard(row_id)
+                    elif vector.shape == (self.embed.dim,):
+                        self._insert(vector, values, created_at)
+                        self._stats["synced"] += 1
+        finally:
+            self._sync_lock.release()
+    
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically similar question
+        
+        Args:
+            question: User question
+        
+        Returns:
+            Cached state values, or None on a miss
+        """
+        self._sync()
+        vector = self.embed(question)
+        with self._lock:
+            match = self._index.nearest(vector)
+            if match is None or match[1] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            
+            entry_id = match[0]
+            entry = self._entries[entry_id]
+            if time.time() - entry["created_at"] > self.ttl_seconds:
+                self._drop(entry_id)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            return dict(entry["values"])
+    
+    @property
+    def blocking(self) -> bool:
+        """
+        Whether lookups and stores would block an event loop: model embeddings
+        are CPU-heavy and the shared store does SQLite I/O. Only the hashed
+        fallback without a shared store is cheap enough to run inline.
+        """
+        return self.shared is not None or not isinstance(self.embed, HashedEmbedding)
+    
+    async def alookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """Async variant of lookup; blocking work runs in a worker thread"""
+        if self.blocking:
+            return await asyncio.to_thread(self.lookup, question)
+        return self.lookup(question)
+    
+    def store(self, question: str, values: Dict[str, Any]) -> bool:
+        """
+        Cache a validated answer
+        
+        Args:
+            question: User question
+            values: Final state values (must carry validator_score)
+        
+        Returns:
+            True if stored, False if the score was below the confidence threshold
+        """
+        try:
+            score = float(values.get("validator_score", ""))
+        except (TypeError, ValueError):
+            score = -1.0
+        if score < self.min_score:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+        
+        vector = self.embed(question)
+        created_at = time.time()
+        with self._lock:
+            # Replaces a near-duplicate instead of storing it twice
+            self._insert(vector, values, created_at)
+            self._stats["stores"] += 1
+        if self.shared is not None:
+            row_id = self.shared.append(vector, values, created_at)
+            with self._lock:
+                self._own_rows.add(row_id)
+        return True
+    
+    async def astore(self, question: str, values: Dict[str, Any]) -> bool:
+        """Async variant of store; blocking work runs in a worker thread"""
+        if self.blocking:
+            return await asyncio.to_thread(self.store, question, values)
+        return self.store(question, values)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+            }
+
+
+def build_semantic_cache() -> Optional[SemanticCache]:
+    """Create the semantic cache from settings, or None when disabled"""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    if settings.SEMANTIC_CACHE_EMBEDDING_MODEL:
+        embed = SentenceTransformerEmbedding(settings.SEMANTIC_CACHE_EMBEDDING_MODEL)
+        threshold = settings.SEMANTIC_CACHE_THRESHOLD
+    else:
+        # Word overlap is not meaning; a semantic threshold would serve the
+        # answer to "risks of X" for "benefits of X"
+        embed = HashedEmbedding()
+        threshold = max(settings.SEMANTIC_CACHE_THRESHOLD, settings.SEMANTIC_CACHE_HASHED_THRESHOLD)
+    shared = None
+    if settings.SEMANTIC_CACHE_DISK_PATH:
+        shared = SemanticCacheStore(settings.SEMANTIC_CACHE_DISK_PATH, settings.SEMANTIC_CACHE_TTL_SECONDS)
+    return SemanticCache(embed=embed, threshold=threshold, shared=shared)
@@ -1,4 +1,4 @@
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated, List, Optional
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
@@ -13,9 +13,11 @@ class AgentState(TypedDict):
     business_analyst: str
     research_analyst: str
     technical_analyst: str
+    web_search_content: Optional[str]
     messages: Annotated[List[BaseMessage], add_messages]
     classifier_response: str
     region_response: str
     next: str
     validator_score: str
+    validation_source: str
     final_data: str
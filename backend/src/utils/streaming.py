@@ -0,0 +1,80 @@
+from typing import Any, Callable, Dict, Iterator, List
+
+
+# Tag attached to LLM calls whose tokens are forwarded to streaming clients
+# (domain agent drafts and synthesized answers, not routing or scoring calls)
+ANSWER_STREAM_TAG = "answer_stream"
+
+# Run metadata naming the speculative branch an LLM call belongs to
+SPECULATIVE_BRANCH_KEY = "speculative_branch"
+
+# LangGraph stream modes needed to build node_start / token / node_complete events
+TOKEN_STREAM_MODES: List[str] = ["tasks", "messages", "updates"]
+
+
+def iter_stream_events(mode: str, chunk: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Convert a LangGraph multi-mode stream part into workflow events
+    
+    Args:
+        mode: Stream mode that produced the chunk ("tasks", "messages" or "updates")
+        chunk: Raw chunk emitted by the compiled graph
+    
+    Yields:
+        Event dicts with "event" and "node" keys; tokens of a speculative
+        branch also carry its name under "branch"
+    """
+    if mode == "tasks":
+        # Task payloads carry "input" when a node starts and "result" when it ends
+        if "input" in chunk:
+            yield {"event": "node_start", "node": chunk["name"]}
+    
+    elif mode == "messages":
+        message, metadata = chunk
+        if ANSWER_STREAM_TAG in (metadata.get("tags") or []) and message.content:
+            event = {
+                "event": "token",
+                "node": metadata.get("langgraph_node", ""),
+                "content": message.content
+            }
+            if metadata.get(SPECULATIVE_BRANCH_KEY):
+                event["branch"] = metadata[SPECULATIVE_BRANCH_KEY]
+            yield event
+    
+    elif mode == "updates":
+        for node_name, node_data in chunk.items():
+            yield {"event": "node_complete", "node": node_name, "update": node_data or {}}
+
+
+class SpeculativeTokens:
+    """
+    Hold speculative branch tokens until the classification picks a branch
+    
+    All domain agents stream while the supervisor runs; when the node that
+    ran them completes, only the winning branch's tokens are released (ahead
+    of its node_complete), so discarded drafts never reach the client.
+    """
+    
+    def __init__(self, route: Callable[[Dict[str, Any]], str]):
+        # Maps the completed node's update to the winning branch name
+        self.route = route
+        self._held: Dict[str, List[Dict[str, Any]]] = {}
+    
+    def filter(self, event: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Pass an event through, holding or releasing branch tokens
+        
+        Args:
+            event: Event from iter_stream_events
+        
+        Yields:
+            Events to forward to the client
+        """
+        if "branch" in event:
+            branch = event.pop("branch")
+            self._held.setdefault(branch, []).append(event)
+            return
+        if event["event"] == "node_complete" and self._held:
+            yield from self._held.get(self.route(event["update"]), [])
+            self._held.clear()
+        yield event
@@ -0,0 +1,114 @@
+import logging
+import re
+import threading
+from typing import Iterable
+
+from langchain_core.messages import BaseMessage
+
+try:
+    import tiktoken
+except ImportError:
+    # Fall back to the regex estimate below
+    tiktoken = None
+
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead of the chat format (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+# cl100k_base encoding once load_encoding() has succeeded; counts use the
+# local estimate until then
+_encoding = None
+_load_lock = threading.Lock()
+
+
+def load_encoding() -> bool:
+    """
+    Load the tiktoken cl100k_base encoding for exact token counts
+    
+    Blocking: tiktoken downloads the encoding on first use (cached under
+    TIKTOKEN_CACHE_DIR), without a timeout. Called once at startup off the
+    event loop; token counts never trigger the load themselves.
+    
+    Returns:
+        True when exact counts are in use
+    """
+    global _encoding
+    with _load_lock:
+        if _encoding is not None:
+            return True
+        if tiktoken is None:
+            logger.info("tiktoken not installed; counting tokens with the local estimate")
+            return False
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(
+                "tiktoken encoding unavailable; counting tokens with the local estimate",
+                extra={"error": str(e)}
+            )
+            return False
+        return True
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens locally (tiktoken once its encoding is loaded, otherwise an estimate)
+    
+    The estimate counts words and punctuation, charging long words one token
+    per four characters, which stays within a few percent of BPE tokenizers on
+    English prose and code.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Token count
+    """
+    if not text:
+        return 0
+    encoding = _encoding
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _PIECE_RE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text so that it fits in a token budget
+    
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget
+    
+    Returns:
+        The text itself if it fits, otherwise its longest fitting prefix
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    used = 0
+    for match in _PIECE_RE.finditer(text):
+        used += max(1, (len(match.group()) + 3) // 4)
+        if used > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Token count of one chat message including the format overhead"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_message_tokens(messages: Iterable[BaseMessage]) -> int:
+    """Token count of a list of chat messages"""
+    return sum(message_tokens(message) for message in messages)
@@ -1,15 +1,99 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
+import asyncio
+import logging
+import re
+import threading
+import time
 from config.settings import settings
-from typing import Optional
+from typing import Any, Optional
+from src.utils.cache import DiskCache, TieredCache, TTLCache
+from src.utils.admission import admission
+from src.utils.resilience import resilience
+from src.utils.metrics import record_cache, record_search
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(question: str) -> str:
+    """Cache key for a search query: lowercase words, punctuation and spacing removed"""
+    return " ".join(re.findall(r"\w+", question.lower()))
+
+
+def build_search_cache() -> Optional[TieredCache]:
+    """Create the search result cache from settings, or None when disabled"""
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    disk = None
+    if settings.SEARCH_CACHE_DISK_PATH:
+        disk = DiskCache(settings.SEARCH_CACHE_DISK_PATH, settings.SEARCH_CACHE_TTL_SECONDS)
+    return TieredCache(TTLCache(settings.SEARCH_CACHE_TTL_SECONDS, settings.SEARCH_CACHE_MAX_BYTES), disk)
 
 
 class SearchTools:
     """External search tools wrapper"""
     
-    def __init__(self):
-        self.tavily = TavilySearchResults(
-            max_results=settings.TAVILY_MAX_RESULTS
-        )
+    def __init__(self, enable_cache: Optional[bool] = None):
+        self._tavily: Any = None
+        self._tavily_lock = threading.Lock()
+        # Identical normalized queries share cached results and in-flight requests
+        use_cache = settings.SEARCH_CACHE_ENABLED if enable_cache is None else enable_cache
+        self.cache = build_search_cache() if use_cache else None
+    
+    @property
+    def tavily(self) -> Any:
+        """Tavily client, created on first use (langchain_community is slow to import)"""
+        if self._tavily is None:
+            with self._tavily_lock:
+                if self._tavily is None:
+                    from langchain_community.tools.tavily_search import TavilySearchResults
+                    
+                    self._tavily = TavilySearchResults(
+                        max_results=settings.TAVILY_MAX_RESULTS
+                    )
+        return self._tavily
+    
+    @tavily.setter
+    def tavily(self, client: Any):
+        self._tavily = client
+    
+    def _cache_key(self, question: str) -> str:
+        return f"{settings.TAVILY_MAX_RESULTS}:{normalize_query(question)}"
+    
+    def _query(self, question: str):
+        """Tavily request with admission control, deadline and retries"""
+        return resilience.call("search", lambda primary: admission.call("tavily", self.tavily.invoke, question))
+    
+    async def _aquery(self, question: str):
+        """Async variant of _query"""
+        return await resilience.acall("search", lambda primary: admission.acall("tavily", self.tavily.ainvoke, question))
+    
+    def _fetch(self, key: str, question: str):
+        """Call Tavily and cache successful (list) results"""
+        response = self._query(question)
+        if isinstance(response, list):
+            self.cache.put(key, response)
+        return response
+    
+    async def _afetch(self, key: str, question: str):
+        """Async variant of _fetch"""
+        response = await self._aquery(question)
+        if isinstance(response, list):
+            if self.cache.disk is not None:
+                await asyncio.to_thread(self.cache.put, key, response)
+            else:
+                self.cache.put(key, response)
+        return response
+    
+    @staticmethod
+    def _log_search(question: str, start: float, cached: bool, error: Optional[Exception] = None):
+        """Record the search in the metrics and the log"""
+        seconds = time.perf_counter() - start
+        record_search(seconds, error)
+        fields = {"query": question, "cached": cached, "duration_ms": round(seconds * 1000, 1)}
+        if error is not None:
+            logger.warning("Web search failed", extra={**fields, "error": str(error)})
+        else:
+            logger.info("Web search", extra=fields)
     
     def search(self, question: str) -> Optional[str]:
         """
@@ -17,17 +101,65 @@ class SearchTools:
         
         Args:
             question: Search query
-            
+        
+        Returns:
+            Search results or None if error
+        """
+        start = time.perf_counter()
+        cached = False
+        try:
+            if self.cache is None:
+                result = self._query(question)
+            else:
+                key = self._cache_key(question)
+                result = self.cache.get(key)
+                cached = result is not None
+                record_cache("search", cached)
+                if not cached:
+                    result = self.cache.single_flight.do(key, lambda: self._fetch(key, question))
+        except Exception as e:
+            self._log_search(question, start, cached, e)
+            return None
+        self._log_search(question, start, cached)
+        return result
+    
+    async def asearch(self, question: str) -> Optional[str]:
+        """
+        Perform web search using the async Tavily client
+        
+        Args:
+            question: Search query
+        
         Returns:
             Search results or None if error
         """
+        start = time.perf_counter()
+        cached = False
         try:
-            print(f"\n[Tavily Search] Searching for: {question}")
-            response = self.tavily.invoke(question)
-            return response
+            if self.cache is None:
+                result = await self._aquery(question)
+            else:
+                key = self._cache_key(question)
+                result = self.cache.get_memory(key)
+                if result is None:
+                    # Keep SQLite reads off the event loop
+                    if self.cache.disk is not None:
+                        result = await asyncio.to_thread(self.cache.get_disk, key)
+                    else:
+                        result = self.cache.get_disk(key)
+                cached = result is not None
+                record_cache("search", cached)
+                if not cached:
+                    result = await self.cache.single_flight.ado(key, lambda: self._afetch(key, question))
         except Exception as e:
-            print(f"[Tavily Search Error]: {e}")
+            self._log_search(question, start, cached, e)
             return None
+        self._log_search(question, start, cached)
+        return result
+    
+    def cache_stats(self) -> Optional[dict]:
+        """Return search cache statistics, or None when caching is disabled"""
+        return self.cache.stats() if self.cache is not None else None
 
 
 # Singleton instance
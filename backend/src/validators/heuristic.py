@@ -0,0 +1,94 @@
+import re
+from typing import Optional, Set
+
+
+# Phrases the synthesis prompt tells the model to use when it cannot answer
+REFUSAL_PHRASES = (
+    "i do not know the answer",
+    "i don't know the answer",
+    "cannot be confidently generated",
+    "cannot be confidently answered",
+    "i cannot answer",
+    "i can't answer",
+    "unable to answer",
+    "not enough information",
+    "insufficient information",
+    "no relevant information"
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its of on or that the "
+    "their there these this to was what when where which who why will with you your about into "
+    "than then them they also more most such some any been being were would should could".split()
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def content_words(text: str) -> Set[str]:
+    """Lower-cased words of three or more characters, without stopwords"""
+    return {word for word in _WORD_RE.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS}
+
+
+class HeuristicScorer:
+    """
+    Local 0-10 answer quality score, used instead of the validator LLM call
+    
+    Starts from a base score and adjusts it for:
+    - refusals ("I do not know the answer", ...) -> low score
+    - answer length (very short answers are penalised)
+    - coverage of the question's keywords by the answer
+    - overlap of the answer with the web search results (grounding)
+    """
+    
+    def __init__(self, base: int = 4, min_words: int = 20, max_words: int = 1500):
+        self.base = base
+        self.min_words = min_words
+        self.max_words = max_words
+    
+    def score(self, question: str, answer: str, web_search_content: Optional[str] = None) -> int:
+        """
+        Score an answer
+        
+        Args:
+            question: User question
+            answer: Synthesized answer
+            web_search_content: Search results the answer was built from
+        
+        Returns:
+            Score between 0 and 10
+        """
+        text = (answer or "").strip()
+        if not text:
+            return 0
+        lowered = text.lower()
+        if any(phrase in lowered for phrase in REFUSAL_PHRASES):
+            return 2
+        
+        score = float(self.base)
+        
+        # Length
+        words = len(text.split())
+        if words < self.min_words:
+            score -= 2
+        elif words > self.max_words:
+            score -= 1
+        else:
+            score += 1
+        
+        # Question keyword coverage
+        answer_words = content_words(text)
+        question_words = content_words(question or "")
+        if question_words:
+            score += 2 * len(question_words & answer_words) / len(question_words)
+        else:
+            score += 1
+        
+        # Grounding in the search results
+        search_words = content_words(web_search_content or "")
+        if search_words and answer_words:
+            score += 3 * len(answer_words & search_words) / len(answer_words)
+        else:
+            score += 1
+        
+        return max(0, min(10, round(score)))
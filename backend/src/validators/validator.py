@@ -1,33 +1,73 @@
-from typing import Dict
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import logging
+import random
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
 from config.settings import settings
+from src.utils.llm_clients import get_chat_model
 from config.prompts import PromptTemplates
 from src.utils.state import AgentState
-from src.utils.schemas import ConfidenceScore
+from src.utils.schemas import BatchConfidenceScore, ConfidenceScore
+from src.utils.prompt_assembly import PromptAssembler
+from src.utils.history import SCORE, tag_message
+from src.utils.resilience import aresilient_invoke, resilient_invoke
+from src.utils.tokens import truncate_to_tokens
+from src.validators.heuristic import HeuristicScorer
+
+
+logger = logging.getLogger(__name__)
+
+
+VALIDATION_MODES = ("llm", "sampled", "heuristic", "async")
+
+# validator_score of a turn whose LLM validation runs in the background
+PENDING_SCORE = "pending"
 
 
 class ValidatorAgent:
     """Validator agent for quality assurance"""
     
-    def __init__(self, model_name: str = settings.MODEL_NAME):
+    def __init__(
+        self,
+        model_name: str = settings.MODEL_NAME,
+        mode: Optional[str] = None,
+        sample_rate: float = settings.VALIDATION_SAMPLE_RATE,
+        scorer: Optional[HeuristicScorer] = None
+    ):
         self.model_name = model_name
-        self.llm = ChatGroq(model=model_name).with_structured_output(ConfidenceScore)
+        self.llm = get_chat_model(model_name).with_structured_output(ConfidenceScore)
+        self.batch_llm = get_chat_model(model_name).with_structured_output(BatchConfidenceScore)
+        self.assembler = PromptAssembler(settings.PROMPT_BUDGET_VALIDATOR)
+        
+        # "llm" scores every answer, "sampled" a fraction of them (the rest
+        # heuristically), "heuristic" none, and "async" scores with the LLM
+        # after the answer has been returned
+        self.mode = mode or settings.VALIDATION_MODE
+        if self.mode not in VALIDATION_MODES:
+            raise ValueError(f"Unsupported validation mode: {self.mode}")
+        self.sample_rate = sample_rate
+        self.scorer = scorer or HeuristicScorer()
+        self.counts = {"llm": 0, "heuristic": 0, "deferred": 0}
+        self.batch_calls = 0
+        self._rng = random.Random()
     
-    def validate(self, state: AgentState) -> Dict:
+    @staticmethod
+    def collect_result(state: AgentState) -> str:
         """
-        Validate generated answer quality
+        Collect the synthesized answer from the appropriate analyst
         
         Args:
             state: Current agent state
             
         Returns:
-            Updated state with validation score
+            Synthesized answer or empty string
         """
-        question = state["question"]
+        # Prefer this turn's analyst; the other *_analyst keys may hold
+        # answers from earlier turns of the thread
+        classifier = state.get("classifier_response", "")
+        if classifier and state.get(f"{classifier}_analyst", ""):
+            return state[f"{classifier}_analyst"]
         
-        # Collect result from appropriate analyst
         result = ""
         if state.get("technical_analyst", ""):
             result = state["technical_analyst"]
@@ -35,29 +75,178 @@ class ValidatorAgent:
             result = state["research_analyst"]
         elif state.get("business_analyst", ""):
             result = state["business_analyst"]
+        return result
+    
+    def build_prompt(self, question: str, result: str) -> List[BaseMessage]:
+        """
+        Build the validation prompt
         
+        Args:
+            question: User question
+            result: Generated answer to score
+            
+        Returns:
+            Formatted prompt messages
+        """
         prompt = PromptTemplates.VALIDATOR_PROMPT
         
-        chat_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=prompt),
-            HumanMessage(content=f"question: {question}\nGenerated Answer: {result}")
-        ])
-        
-        system_prompt = chat_prompt.format_messages(
-            question=question,
-            result=result
-        )
-        
-        response = self.llm.invoke(system_prompt)
+        return self.assembler.assemble(prompt, f"question: {question}", sections=[("Generated Answer", result)])
+    
+    def build_update(self, question: str, result: str, response: ConfidenceScore, source: str = "llm") -> Dict:
+        """
+        Log the confidence score and build the state update
         
-        print(f"\n{'='*50}")
-        print("[Validator Agent] Confidence Score")
-        print(f"{'='*50}")
-        print(f"Score: {response.range}/10")
+        Args:
+            question: User question
+            result: Validated answer
+            response: Structured confidence score
+            source: How the score was produced ("llm" or "heuristic")
+            
+        Returns:
+            Updated state with validation score
+        """
+        logger.info("Confidence score", extra={"score": response.range, "source": source})
         
+        self.counts[source] += 1
         return {
             "validator_score": response.range,
+            "validation_source": source,
             "final_data": result,
             "question": question,
-            "messages": AIMessage(content=response.range)
+            "messages": tag_message(AIMessage(content=response.range), SCORE),
+            # Search results are only needed until the answer is scored; keep
+            # them out of the turn's final checkpoint
+            "web_search_content": None
+        }
+    
+    def build_pending_update(self, question: str, result: str) -> Dict:
+        """
+        Build the state update of an answer whose score will be attached later
+        
+        web_search_content stays in the state for a heuristic fallback and is
+        cleared by the update that attaches the score.
+        
+        Args:
+            question: User question
+            result: Answer to validate in the background
+            
+        Returns:
+            Updated state with the answer and a pending score
+        """
+        self.counts["deferred"] += 1
+        return {
+            "validator_score": PENDING_SCORE,
+            "validation_source": PENDING_SCORE,
+            "final_data": result,
+            "question": question
         }
+    
+    def heuristic_score(self, question: str, result: str, state: AgentState) -> ConfidenceScore:
+        """Score locally from length, refusals and overlap with the search results"""
+        score = self.scorer.score(question, result, state.get("web_search_content"))
+        return ConfidenceScore(range=str(score))
+    
+    def is_deferred(self, config: Optional[RunnableConfig]) -> bool:
+        """Whether scoring is left to the background (async mode or per-request defer_validation)"""
+        if self.mode == "async":
+            return True
+        return bool((config or {}).get("configurable", {}).get("defer_validation"))
+    
+    def use_llm(self) -> bool:
+        """Whether this answer gets an LLM validation call in the current mode"""
+        if self.mode == "llm":
+            return True
+        if self.mode == "sampled":
+            return self._rng.random() < self.sample_rate
+        return False
+    
+    def score(self, question: str, result: str) -> ConfidenceScore:
+        """Score an answer with the LLM"""
+        return resilient_invoke("validator", self.llm, self.build_prompt(question, result))
+    
+    async def ascore(self, question: str, result: str) -> ConfidenceScore:
+        """Async variant of score"""
+        return await aresilient_invoke("validator", self.llm, self.build_prompt(question, result))
+    
+    def build_batch_messages(self, pairs: List[Tuple[str, str]]) -> List[BaseMessage]:
+        """
+        Build the prompt scoring several answers at once
+        
+        Args:
+            pairs: (question, answer) pairs, numbered from 1 in the prompt;
+                each answer is cut to the single-answer prompt budget
+        
+        Returns:
+            Ordered list of messages
+        """
+        numbered = "\n\n".join(
+            f"[{index}]\nQuestion: {question}\nGenerated Answer: {truncate_to_tokens(result, self.assembler.max_tokens)}"
+            for index, (question, result) in enumerate(pairs, 1)
+        )
+        return [SystemMessage(content=PromptTemplates.BATCH_VALIDATOR_PROMPT), HumanMessage(content=numbered)]
+    
+    def _match_batch(self, pairs: List[Tuple[str, str]], response: BatchConfidenceScore) -> List[Optional[ConfidenceScore]]:
+        """Order the items of a batched reply like pairs (None where the reply has no score)"""
+        self.batch_calls += 1
+        items = {item.index: item for item in response.items}
+        return [
+            ConfidenceScore(range=items[number].range) if number in items else None
+            for number in range(1, len(pairs) + 1)
+        ]
+    
+    def score_batch(self, pairs: List[Tuple[str, str]]) -> List[Optional[ConfidenceScore]]:
+        """
+        Score several answers with one LLM call
+        
+        Args:
+            pairs: (question, answer) pairs
+        
+        Returns:
+            Score of each pair, None where the reply had none
+        """
+        return self._match_batch(pairs, resilient_invoke("validator", self.batch_llm, self.build_batch_messages(pairs)))
+    
+    async def ascore_batch(self, pairs: List[Tuple[str, str]]) -> List[Optional[ConfidenceScore]]:
+        """Async variant of score_batch"""
+        response = await aresilient_invoke("validator", self.batch_llm, self.build_batch_messages(pairs))
+        return self._match_batch(pairs, response)
+    
+    def validate(self, state: AgentState, config: Optional[RunnableConfig] = None) -> Dict:
+        """
+        Validate generated answer quality
+        
+        Args:
+            state: Current agent state
+            config: Run config (configurable.defer_validation defers scoring)
+            
+        Returns:
+            Updated state with validation score
+        """
+        question = state["question"]
+        result = self.collect_result(state)
+        
+        if self.is_deferred(config):
+            return self.build_pending_update(question, result)
+        if self.use_llm():
+            return self.build_update(question, result, self.score(question, result))
+        return self.build_update(question, result, self.heuristic_score(question, result, state), "heuristic")
+    
+    async def avalidate(self, state: AgentState, config: Optional[RunnableConfig] = None) -> Dict:
+        """
+        Async variant of validate using the non-blocking Groq client
+        
+        Args:
+            state: Current agent state
+            config: Run config (configurable.defer_validation defers scoring)
+            
+        Returns:
+            Updated state with validation score
+        """
+        question = state["question"]
+        result = self.collect_result(state)
+        
+        if self.is_deferred(config):
+            return self.build_pending_update(question, result)
+        if self.use_llm():
+            return self.build_update(question, result, await self.ascore(question, result))
+        return self.build_update(question, result, self.heuristic_score(question, result, state), "heuristic")
@@ -85,8 +85,13 @@ export default function ChatInterface() {
           input,
           threadId,
           (chunk: StreamChunk) => {
-            if (chunk.event === 'node_complete' && chunk.data.content) {
-              setStreamingContent((prev) => prev + chunk.data.content);
+            if (chunk.event === 'node_complete') {
+              // The final answer replaces what the analyst node streamed
+              if (chunk.data.answer) {
+                setStreamingContent(chunk.data.answer);
+              } else if (chunk.data.content) {
+                setStreamingContent((prev) => prev + chunk.data.content);
+              }
             }
           },
           (error: string) => {
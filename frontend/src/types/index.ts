@@ -23,6 +23,7 @@ export interface StreamChunk {
   data: {
     node?: string;
     content?: string;
+    answer?: string;
     classifier?: string;
     score?: string;
     status?: string;
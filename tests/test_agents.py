@@ -0,0 +1,141 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.agents.business_agent import BusinessAgent
+from src.utils import tokens
+from src.utils.history import ANSWER, DRAFT, QUESTION, SCORE, SUMMARY, SUMMARY_MESSAGE_ID, tag_message
+from src.utils.prompt_assembly import SUMMARY_HEADER, PromptAssembler
+from src.utils.tokens import count_message_tokens, count_tokens, load_encoding
+
+
+def _words(prefix, count):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def _history(turns, words=40):
+    messages = []
+    for number in range(turns):
+        messages.append(HumanMessage(content=f"question {number}: {_words('q', words)}"))
+        messages.append(AIMessage(content=f"answer {number}: {_words('a', words)}"))
+    return messages
+
+
+# PromptAssembler
+
+def test_prompt_within_budget_is_unchanged():
+    assembler = PromptAssembler(max_tokens=10_000)
+    history = _history(2)
+    messages = assembler.assemble("system", "question: now", history, "earlier", [("context", "facts")])
+
+    assert messages[0].content == f"system{SUMMARY_HEADER}earlier"
+    assert messages[1:-1] == history
+    assert messages[-1].content == "question: now\ncontext: facts"
+    assert assembler.truncations == 0
+
+
+def test_oldest_history_is_dropped_first():
+    history = _history(6)
+    assembler = PromptAssembler(max_tokens=count_message_tokens(history[-2:]) + 60)
+    messages = assembler.assemble("system", "question: now", history, "earlier topics")
+
+    # The summary survives while whole messages can still be dropped
+    assert messages[0].content.endswith("earlier topics")
+    kept = messages[1:-1]
+    assert kept == history[len(history) - len(kept):]
+    assert history[-1] in kept and history[0] not in kept
+    assert count_message_tokens(messages) <= assembler.max_tokens
+    assert assembler.truncations == 1
+
+
+def test_summary_and_sections_are_truncated_to_fit():
+    summary = _words("s", 200)
+    sections = [("web_search", _words("w", 400)), ("drafts", _words("d", 50))]
+    assembler = PromptAssembler(max_tokens=300)
+    messages = assembler.assemble("system prompt", "question: now", _history(3), summary, sections)
+
+    # System prompt and question are kept whole, history goes first
+    assert messages[0].content.startswith("system prompt")
+    assert len(messages) == 2
+    assert messages[-1].content.startswith("question: now\n")
+    # The lowest-value section absorbs the cut before the one after it
+    assert "drafts: " + _words("d", 50) in messages[-1].content
+    assert count_message_tokens(messages) <= assembler.max_tokens
+
+
+def test_budget_holds_across_sizes():
+    sections = [("web_search", _words("w", 300))]
+    for budget in (150, 400, 800, 1600):
+        assembler = PromptAssembler(max_tokens=budget)
+        messages = assembler.assemble("system", "question: now", _history(8), _words("s", 100), sections)
+        assert count_message_tokens(messages) <= budget
+
+
+def test_fixed_parts_are_never_cut():
+    question = "question: " + _words("x", 50)
+    messages = PromptAssembler(max_tokens=10).assemble("system", question, _history(2), "summary")
+    assert messages[0].content.startswith("system")
+    assert messages[-1].content == question
+    assert count_tokens(messages[0].content) <= count_tokens(f"system{SUMMARY_HEADER}")
+
+
+# Token counting
+
+def test_counts_use_the_estimate_until_the_encoding_is_loaded(monkeypatch):
+    loads = []
+
+    class Encoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    class Tiktoken:
+        @staticmethod
+        def get_encoding(name):
+            loads.append(name)
+            return Encoding()
+
+    monkeypatch.setattr(tokens, "tiktoken", Tiktoken)
+    monkeypatch.setattr(tokens, "_encoding", None)
+
+    # Counting on a request path never starts the (network) load
+    assert count_tokens("internationalization") == 5
+    assert loads == []
+
+    assert load_encoding() and load_encoding()
+    assert loads == ["cl100k_base"]
+    assert count_tokens("internationalization") == 1
+
+
+def test_failed_encoding_load_keeps_the_estimate(monkeypatch):
+    class Tiktoken:
+        @staticmethod
+        def get_encoding(name):
+            raise OSError("no network")
+
+    monkeypatch.setattr(tokens, "tiktoken", Tiktoken)
+    monkeypatch.setattr(tokens, "_encoding", None)
+    assert load_encoding() is False
+    assert count_tokens("internationalization") == 5
+
+
+# Agent prompts
+
+def test_agent_prompt_uses_view_and_budget():
+    agent = BusinessAgent()
+    agent.assembler = PromptAssembler(max_tokens=400)
+    messages = [tag_message(SystemMessage(content="earlier topics", id=SUMMARY_MESSAGE_ID), SUMMARY)]
+    for number in range(5):
+        messages += [
+            tag_message(HumanMessage(content=f"question {number}: {_words('q', 20)}"), QUESTION),
+            tag_message(AIMessage(content=f"draft {number}"), DRAFT),
+            tag_message(AIMessage(content="7"), SCORE),
+            tag_message(AIMessage(content=f"answer {number}: {_words('a', 20)}"), ANSWER)
+        ]
+    messages.append(tag_message(HumanMessage(content="question now"), QUESTION))
+
+    prompt = agent.build_messages("You are a business expert.", "question now", messages)
+    history = [message.content for message in prompt[1:-1]]
+    assert prompt[0].content.endswith(f"{SUMMARY_HEADER}earlier topics")
+    assert prompt[-1].content == "question: question now"
+    # Most recent turn kept; drafts, scores and the current question left out
+    assert history[-2:] == [messages[-5].content, messages[-2].content]
+    assert not any(text.startswith("draft") or text == "7" or text == "question now" for text in history)
+    assert count_message_tokens(prompt) <= 400
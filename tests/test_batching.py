@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.fakes import install_fakes
+from src.graph.batching import MicroBatcher
+from src.graph.workflow import AgentWorkflow
+from src.utils.admission import AdmissionRejected
+from src.utils.history import QUESTION
+
+
+class Recorder:
+    """Batch function that records each call"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def __call__(self, items):
+        self.batches.append((list(items), time.monotonic()))
+        if self.error is not None:
+            raise self.error
+        return [item * 10 for item in items]
+
+
+def test_flushes_when_max_size_is_reached():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_size=3, linger=10)
+
+    async def run():
+        start = time.monotonic()
+        results = await asyncio.gather(*(batcher.submit(item) for item in (1, 2, 3)))
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == [10, 20, 30]
+    assert [items for items, _ in recorder.batches] == [[1, 2, 3]]
+    assert elapsed < 1
+    assert batcher.stats() == {"calls": 1, "items": 3}
+
+
+def test_flushes_a_partial_batch_after_linger():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_size=10, linger=0.05)
+
+    async def run():
+        start = time.monotonic()
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        return results, recorder.batches[0][1] - start
+
+    results, waited = asyncio.run(run())
+    assert results == [10, 20]
+    assert [items for items, _ in recorder.batches] == [[1, 2]]
+    assert 0.04 <= waited < 1
+
+
+def test_overflow_starts_a_new_batch():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_size=2, linger=0.02)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert [items for items, _ in recorder.batches] == [[0, 1], [2, 3], [4]]
+
+
+def test_batch_failure_reaches_every_item():
+    error = RuntimeError("batch call failed")
+    batcher = MicroBatcher(Recorder(error), max_size=2, linger=10)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert asyncio.run(run()) == [error, error]
+
+
+def test_close_cancels_waiting_items():
+    batcher = MicroBatcher(Recorder(), max_size=10, linger=10)
+
+    async def run():
+        waiting = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0)
+        batcher.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def workflow():
+    workflow = AgentWorkflow()
+    install_fakes(workflow)
+    return workflow
+
+
+def _questions(workflow, thread_id):
+    messages = workflow.get_state(thread_id).values["messages"]
+    return [message.content for message in messages if message.additional_kwargs.get("message_kind") == QUESTION]
+
+
+def test_abatch_keeps_the_order_within_a_thread(workflow):
+    questions = ["What is SWOT analysis?", "Explain Python generators", "How do I price a product?", "What is a hypothesis?"]
+    thread_ids = ["a", "b", "a", "a"]
+
+    async def run():
+        return [result async for result in workflow.abatch(questions, thread_ids, max_concurrency=2)]
+
+    results = asyncio.run(run())
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3]
+    assert all("values" in result for result in results)
+    lane_a = [result["index"] for result in results if result["thread_id"] == "a"]
+    assert lane_a == [0, 2, 3]
+    assert _questions(workflow, "a") == [questions[0], questions[2], questions[3]]
+    assert _questions(workflow, "b") == [questions[1]]
+
+
+def test_batch_keeps_the_order_within_a_thread(workflow):
+    questions = ["First question about strategy", "Second question about strategy", "Third question about strategy"]
+
+    results = list(workflow.batch(questions, ["a", "a", "a"]))
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert _questions(workflow, "a") == questions
+
+
+def test_batch_deduplicates_identical_new_thread_questions(workflow):
+    results = list(workflow.batch(["What is SWOT analysis?"] * 3))
+    assert len({result["thread_id"] for result in results}) == 3
+    assert sum(bool(result.get("deduplicated")) for result in results) == 2
+    assert workflow.batch_counts["deduplicated"] == 2
+
+
+@pytest.fixture
+def client(workflow, monkeypatch):
+    from api.routes import agent as agent_routes
+    from main import app
+
+    monkeypatch.setattr(agent_routes, "workflow", workflow)
+    return TestClient(app)
+
+
+def _batch(client, questions):
+    response = client.post("/api/v1/ask/batch", json={"questions": [{"question": question} for question in questions]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+
+
+def test_batch_route_reports_a_rejected_item_and_answers_the_rest(client, workflow, monkeypatch):
+    answer = workflow._abatch_item
+
+    async def rejecting_item(question, *args):
+        if "pricing" in question:
+            raise AdmissionRejected("groq", "queue full", 2.4)
+        return await answer(question, *args)
+
+    monkeypatch.setattr(workflow, "_abatch_item", rejecting_item)
+    lines = _batch(client, ["What is SWOT analysis?", "What is a pricing strategy?", "Explain Python generators"])
+
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[1]["error"] == "groq is overloaded (queue full); retry after 2s"
+    assert lines[1]["retry_after"] == 2.4
+    assert "answer" not in lines[1]
+    assert all(line["answer"] and "error" not in line for line in (lines[0], lines[2]))
+
+
+def test_batch_route_keeps_streaming_after_a_failure_mid_stream(client, workflow, monkeypatch):
+    async def failing_batch(questions, thread_ids, max_concurrency=None):
+        yield {"index": 2, "question": questions[2], "thread_id": "c", "values": {"final_data": "answered"}}
+        # A result the route cannot format
+        yield {"index": 0, "question": questions[0], "thread_id": "a", "values": None}
+        raise AdmissionRejected("groq", "rate limited", 5)
+
+    monkeypatch.setattr(workflow, "abatch", failing_batch)
+    lines = _batch(client, ["first", "second", "third", "fourth"])
+
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[2]["answer"] == "answered"
+    assert "error" in lines[0] and "retry_after" not in lines[0]
+    for line in (lines[1], lines[3]):
+        assert line["error"] == "groq is overloaded (rate limited); retry after 5s"
+        assert line["retry_after"] == 5
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeTavily
+from config.settings import settings
+from src.utils.cache import DiskCache, SingleFlight, TieredCache, TTLCache
+from src.utils.tools import SearchTools
+
+
+def _size(value):
+    return len(json.dumps(value).encode("utf-8"))
+
+
+# TTLCache
+
+def test_expired_entries_are_dropped():
+    cache = TTLCache(ttl_seconds=60, max_bytes=1000)
+    cache.put("old", "value", expires_at=time.time() - 1)
+    cache.put("new", "value")
+    assert cache.get("old") is None
+    assert cache.get("new") == "value"
+    assert len(cache) == 1 and cache.size_bytes == _size("value")
+
+
+def test_ttl_applies_from_insertion():
+    cache = TTLCache(ttl_seconds=0.05, max_bytes=1000)
+    cache.put("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.1)
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entry_is_evicted_over_the_byte_budget():
+    cache = TTLCache(ttl_seconds=60, max_bytes=3 * _size("aaaa"))
+    for key in ("a", "b", "c"):
+        cache.put(key, key * 4)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == "aaaa"
+    cache.put("d", "dddd")
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["aaaa", "cccc", "dddd"]
+    assert cache.evictions == 1
+    assert cache.size_bytes == 3 * _size("aaaa")
+
+
+def test_values_larger_than_the_budget_are_not_stored():
+    cache = TTLCache(ttl_seconds=60, max_bytes=10)
+    cache.put("big", "x" * 100)
+    assert cache.get("big") is None
+    assert cache.size_bytes == 0
+
+
+# SingleFlight
+
+def test_concurrent_callers_share_one_sync_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.coalesced < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+    assert flight.coalesced == 4
+
+
+def test_sync_followers_receive_the_leader_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise ValueError("search down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ValueError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.coalesced < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert all(error is errors[0] for error in errors)
+    # The failed call is not reused by the next caller
+    assert flight.do("key", lambda: "retried") == "retried"
+
+
+def test_concurrent_callers_share_one_async_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.ado("key", slow) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.coalesced == 4
+
+
+def test_async_followers_receive_the_leader_exception():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("search down")
+
+    async def run():
+        return await asyncio.gather(*(flight.ado("key", failing) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flight.coalesced == 2
+
+
+# DiskCache and TieredCache
+
+def test_disk_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    DiskCache(path, ttl_seconds=60).put("key", [{"url": "https://example.com"}])
+
+    value, expires_at = DiskCache(path, ttl_seconds=60).get("key")
+    assert value == [{"url": "https://example.com"}]
+    assert expires_at > time.time()
+
+
+def test_expired_disk_entries_are_hidden_and_purged(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), ttl_seconds=-1)
+    cache.put("key", "value")
+    assert cache.get("key") is None
+    assert cache.purge_expired() == 1
+
+
+def test_disk_hits_are_promoted_into_memory(tmp_path):
+    path = str(tmp_path / "cache.db")
+    TieredCache(TTLCache(60, 1000), DiskCache(path, 60)).put("key", "value")
+
+    cache = TieredCache(TTLCache(60, 1000), DiskCache(path, 60))
+    assert cache.get("key") == "value"
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["entries"] == 1 and stats["disk_tier"] is True
+
+
+# SearchTools
+
+@pytest.fixture
+def search_tools(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_CACHE_DISK_PATH", "")
+    tools = SearchTools(enable_cache=True)
+    tools.tavily = FakeTavily()
+    return tools
+
+
+def test_search_hits_the_cache_for_the_same_normalized_query(search_tools):
+    first = search_tools.search("What is SWOT analysis?")
+    second = search_tools.search("  what is swot ANALYSIS ")
+
+    assert first == second
+    assert search_tools.tavily.calls == 1
+    stats = search_tools.cache_stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_concurrent_async_searches_share_one_request(search_tools):
+    async def run():
+        return await asyncio.gather(*(search_tools.asearch("What is SWOT analysis?") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert all(result == results[0] for result in results)
+    assert search_tools.tavily.calls == 1
+    assert search_tools.cache_stats()["coalesced"] == 4
+
+
+def test_search_without_cache_always_calls_tavily():
+    tools = SearchTools(enable_cache=False)
+    tools.tavily = FakeTavily()
+    tools.search("What is SWOT analysis?")
+    tools.search("What is SWOT analysis?")
+    assert tools.tavily.calls == 2
+    assert tools.cache_stats() is None
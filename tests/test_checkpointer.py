@@ -0,0 +1,168 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from src.utils.checkpointer import SQLiteCheckpointer
+
+
+def _config(thread_id, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def _checkpoint(value):
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"question": value}
+    checkpoint["channel_versions"] = {"question": 1}
+    return checkpoint
+
+
+def _put(saver, thread_id, value, parent=None, step=0):
+    return saver.put(_config(thread_id, parent), _checkpoint(value), {"source": "loop", "step": step}, {})
+
+
+@pytest.fixture
+def saver(tmp_path):
+    return SQLiteCheckpointer(str(tmp_path / "checkpoints.sqlite"), max_turns_per_thread=0, thread_ttl_seconds=0)
+
+
+def test_put_and_get_tuple(saver):
+    first = _put(saver, "t1", "a")
+    second = _put(saver, "t1", "b", parent=first["configurable"]["checkpoint_id"], step=1)
+
+    latest = saver.get_tuple(_config("t1"))
+    assert latest.config["configurable"]["checkpoint_id"] == second["configurable"]["checkpoint_id"]
+    assert latest.checkpoint["channel_values"] == {"question": "b"}
+    assert latest.metadata["step"] == 1
+    assert latest.parent_config["configurable"]["checkpoint_id"] == first["configurable"]["checkpoint_id"]
+
+    named = saver.get_tuple(_config("t1", first["configurable"]["checkpoint_id"]))
+    assert named.checkpoint["channel_values"] == {"question": "a"}
+    assert named.parent_config is None
+    assert saver.get_tuple(_config("missing")) is None
+
+
+def test_list_filters_and_orders_newest_first(saver):
+    ids = [_put(saver, "t1", str(step), step=step)["configurable"]["checkpoint_id"] for step in range(3)]
+    _put(saver, "t2", "other")
+
+    listed = [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"))]
+    assert listed == ids[::-1]
+    assert len(list(saver.list(None))) == 4
+    assert [item.metadata["step"] for item in saver.list(_config("t1"), filter={"step": 1})] == [1]
+    assert [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"), limit=2)] == ids[:0:-1]
+    before = [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"), before=_config("t1", ids[2]))]
+    assert before == [ids[1], ids[0]]
+
+
+def test_list_limit_is_applied_in_sql_unless_filtered(saver):
+    ids = [_put(saver, "t1", str(step), step=step)["configurable"]["checkpoint_id"] for step in range(3)]
+    statements = []
+    saver._connection().set_trace_callback(statements.append)
+
+    assert [item.config["configurable"]["checkpoint_id"] for item in saver.list(None, limit=1)] == [ids[2]]
+    assert any(statement.startswith("SELECT thread_id") and "LIMIT 1" in statement for statement in statements)
+
+    statements.clear()
+    assert [item.metadata["step"] for item in saver.list(None, filter={"step": 0}, limit=1)] == [0]
+    assert not any("LIMIT" in statement for statement in statements)
+
+
+def test_put_writes_are_returned_in_task_order(saver):
+    config = _put(saver, "t1", "a")
+    saver.put_writes(config, [("question", "x"), ("answer", "y")], task_id="task-b", task_path="b")
+    saver.put_writes(config, [("question", "z")], task_id="task-a", task_path="a")
+    # Regular writes keep the first attempt
+    saver.put_writes(config, [("question", "retry")], task_id="task-a", task_path="a")
+
+    writes = saver.get_tuple(config).pending_writes
+    assert writes == [("task-a", "question", "z"), ("task-b", "question", "x"), ("task-b", "answer", "y")]
+
+
+def _turn(saver, thread_id, steps, parent=None):
+    """Checkpoints of one turn: the input checkpoint, then one per step"""
+    configs = [saver.put(_config(thread_id, parent), _checkpoint("input"), {"source": "input", "step": -1}, {})]
+    for step in range(steps):
+        parent = configs[-1]["configurable"]["checkpoint_id"]
+        configs.append(_put(saver, thread_id, str(step), parent=parent, step=step))
+        saver.put_writes(configs[-1], [("question", "w")], task_id="task")
+    return [config["configurable"]["checkpoint_id"] for config in configs]
+
+
+def test_keeps_the_last_checkpoint_of_the_newest_turns(tmp_path):
+    saver = SQLiteCheckpointer(str(tmp_path / "trim.sqlite"), max_turns_per_thread=2, thread_ttl_seconds=0)
+    first = _turn(saver, "t1", 3)
+    # Intermediate checkpoints of the turn in progress are kept
+    assert len(list(saver.list(_config("t1")))) == 4
+
+    second = _turn(saver, "t1", 3, parent=first[-1])
+    kept = [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"))]
+    assert kept == second[::-1] + [first[-1]]
+
+    third = _turn(saver, "t1", 2, parent=second[-1])
+    kept = [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"))]
+    assert kept == third[::-1] + [second[-1]]
+    # Writes go with their checkpoints
+    assert saver.stats()["writes"] == 3
+    assert saver.get_tuple(_config("t1")).checkpoint["channel_values"] == {"question": "1"}
+
+
+def test_unlimited_turns_still_drop_intermediate_checkpoints(saver):
+    finals = []
+    for _ in range(5):
+        finals.append(_turn(saver, "t1", 6, parent=finals[-1] if finals else None)[-1])
+    kept = [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"))]
+    assert len(kept) == 7 + 4
+    assert kept[-4:] == finals[-2::-1]
+
+
+def test_databases_without_the_turn_column_are_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE checkpoints (thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '', "
+            "checkpoint_id TEXT NOT NULL, parent_checkpoint_id TEXT, type TEXT, checkpoint BLOB, "
+            "metadata_type TEXT, metadata BLOB, PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))"
+        )
+    saver = SQLiteCheckpointer(path, thread_ttl_seconds=0)
+    ids = _turn(saver, "t1", 1)
+    assert [item.config["configurable"]["checkpoint_id"] for item in saver.list(_config("t1"))] == ids[::-1]
+
+
+def test_purges_idle_threads(saver):
+    saver.thread_ttl_seconds = 60
+    _put(saver, "idle", "a")
+    _put(saver, "active", "b")
+    with saver._connection() as connection:
+        connection.execute("UPDATE threads SET updated_at = ? WHERE thread_id = 'idle'", (time.time() - 120,))
+
+    assert saver.purge_idle_threads() == 1
+    assert saver.get_tuple(_config("idle")) is None
+    assert saver.get_tuple(_config("active")) is not None
+
+
+def test_delete_thread(saver):
+    config = _put(saver, "t1", "a")
+    saver.put_writes(config, [("question", "w")], task_id="task")
+    saver.delete_thread("t1")
+    assert saver.get_tuple(_config("t1")) is None
+    assert saver.stats()["writes"] == 0
+
+
+def test_async_methods_match_sync(saver):
+    async def run():
+        config = await saver.aput(_config("t1"), _checkpoint("a"), {"step": 0}, {})
+        await saver.aput_writes(config, [("question", "w")], task_id="task")
+        fetched = await saver.aget_tuple(_config("t1"))
+        listed = [item async for item in saver.alist(_config("t1"))]
+        return config, fetched, listed
+
+    config, fetched, listed = asyncio.run(run())
+    assert fetched.config == config
+    assert fetched.pending_writes == [("task", "question", "w")]
+    assert len(listed) == 1
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fakes import Latency, install_fakes
+from src.graph.coalescing import RunCoalescer, coalesce_key
+from src.graph.workflow import AgentWorkflow
+
+QUESTION = "What is SWOT analysis?"
+
+
+@pytest.fixture
+def workflow():
+    workflow = AgentWorkflow()
+    workflow.coalescer = RunCoalescer()
+    install_fakes(workflow, Latency(0.05), Latency())
+    return workflow
+
+
+def _failing_supervisor(error):
+    async def ainvoke(messages, config=None):
+        await asyncio.sleep(0.05)
+        raise error
+
+    def invoke(messages, config=None):
+        threading.Event().wait(0.05)
+        raise error
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def test_coalesce_key_ignores_case_and_punctuation_but_not_history():
+    assert coalesce_key("What is SWOT?", []) == coalesce_key("what is  swot", [])
+    assert coalesce_key("What is SWOT?", []) != coalesce_key("What is SWOT?", [], defer_validation=True)
+
+
+def test_concurrent_identical_async_calls_share_one_run(workflow):
+    async def run():
+        return await asyncio.gather(*(workflow.ainvoke(QUESTION, thread_id=f"thread-{i}") for i in range(5)))
+
+    results = asyncio.run(run())
+    assert workflow.coalescer.stats() == {"runs": 1, "coalesced": 4, "in_flight": 0}
+    assert len({result["final_data"] for result in results}) == 1
+    # Every caller's own thread records the shared answer
+    for i in range(5):
+        assert workflow.get_state(f"thread-{i}").values["final_data"] == results[0]["final_data"]
+
+
+def test_concurrent_identical_sync_calls_share_one_run(workflow):
+    results = [None] * 4
+
+    def ask(index):
+        results[index] = workflow.invoke(QUESTION, thread_id=f"thread-{index}")
+
+    threads = [threading.Thread(target=ask, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert workflow.coalescer.stats()["runs"] == 1
+    assert workflow.coalescer.stats()["coalesced"] == 3
+    assert all(result["final_data"] == results[0]["final_data"] for result in results)
+
+
+def test_different_questions_are_not_coalesced(workflow):
+    async def run():
+        await asyncio.gather(workflow.ainvoke(QUESTION, "thread-1"), workflow.ainvoke("Explain Python generators", "thread-2"))
+
+    asyncio.run(run())
+    assert workflow.coalescer.stats()["runs"] == 2
+
+
+def test_async_follower_gets_the_leaders_exception(workflow):
+    error = ValueError("supervisor failed")
+    workflow.supervisor.llm = _failing_supervisor(error)
+
+    async def run():
+        return await asyncio.gather(
+            *(workflow.ainvoke(QUESTION, thread_id=f"thread-{i}") for i in range(3)),
+            return_exceptions=True
+        )
+
+    outcomes = asyncio.run(run())
+    assert all(outcome is error for outcome in outcomes)
+    assert workflow.coalescer.stats() == {"runs": 1, "coalesced": 2, "in_flight": 0}
+
+
+def test_sync_follower_gets_the_leaders_exception(workflow):
+    error = ValueError("supervisor failed")
+    workflow.supervisor.llm = _failing_supervisor(error)
+    outcomes = [None] * 3
+
+    def ask(index):
+        try:
+            workflow.invoke(QUESTION, thread_id=f"thread-{index}")
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=ask, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(outcome is error for outcome in outcomes)
+    assert workflow.coalescer.stats()["runs"] == 1
+    assert workflow.coalescer.stats()["in_flight"] == 0
+
+
+def test_failed_run_is_not_reused(workflow):
+    good_llm = workflow.supervisor.llm
+    workflow.supervisor.llm = _failing_supervisor(ValueError("supervisor failed"))
+    with pytest.raises(ValueError):
+        asyncio.run(workflow.ainvoke(QUESTION, thread_id="thread-1"))
+
+    workflow.supervisor.llm = good_llm
+    assert asyncio.run(workflow.ainvoke(QUESTION, thread_id="thread-2"))["final_data"]
+    assert workflow.coalescer.stats()["runs"] == 2
@@ -0,0 +1,139 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES, add_messages
+
+from benchmarks.fakes import FakeChatModel
+from src.utils.history import (
+    ANSWER,
+    DRAFT,
+    QUESTION,
+    SCORE,
+    SUMMARY,
+    SUMMARY_MESSAGE_ID,
+    HistoryCompactor,
+    conversation_view,
+    message_kind,
+    tag_message
+)
+from src.utils.tokens import count_message_tokens
+
+
+def _turn(number, answered=True):
+    messages = [
+        tag_message(HumanMessage(content=f"question {number}", id=f"q{number}"), QUESTION),
+        tag_message(AIMessage(content=f"draft {number}", id=f"d{number}"), DRAFT),
+        tag_message(AIMessage(content="8", id=f"s{number}"), SCORE)
+    ]
+    if answered:
+        messages.append(tag_message(AIMessage(content=f"answer {number}", id=f"a{number}"), ANSWER))
+    return messages
+
+
+def _summary(text):
+    return tag_message(SystemMessage(content=text, id=SUMMARY_MESSAGE_ID), SUMMARY)
+
+
+def _long_history(turns):
+    messages = []
+    for number in range(turns):
+        messages += _turn(number)
+        messages[-1].content += " " + " ".join(f"word{i}" for i in range(20))
+    return messages
+
+
+# conversation_view
+
+def test_view_keeps_questions_and_final_answers_only():
+    summary, view = conversation_view(_turn(1) + _turn(2))
+    assert summary == ""
+    assert [message.id for message in view] == ["q1", "a1", "q2", "a2"]
+
+
+def test_view_returns_the_summary_separately():
+    summary, view = conversation_view([_summary("earlier topics")] + _turn(1))
+    assert summary == "earlier topics"
+    assert all(message.id != SUMMARY_MESSAGE_ID for message in view)
+    assert [message.id for message in view] == ["q1", "a1"]
+
+
+def test_view_drops_the_turn_in_progress():
+    messages = _turn(1) + [tag_message(HumanMessage(content="question 2", id="q2"), QUESTION)]
+    _, view = conversation_view(messages, "question 2")
+    assert [message.id for message in view] == ["q1", "a1"]
+
+
+def test_view_falls_back_to_the_last_draft_when_unanswered():
+    _, view = conversation_view(_turn(1, answered=False) + _turn(2))
+    assert [message.content for message in view] == ["question 1", "draft 1", "question 2", "answer 2"]
+
+
+def test_untagged_messages_are_classified():
+    assert message_kind(HumanMessage(content="hi")) == QUESTION
+    assert message_kind(AIMessage(content=" 7 ")) == SCORE
+    assert message_kind(AIMessage(content="An answer")) == ANSWER
+    assert message_kind(SystemMessage(content="old", id=SUMMARY_MESSAGE_ID)) == SUMMARY
+
+
+# HistoryCompactor
+
+def _compactor(**kwargs):
+    compactor = HistoryCompactor(**kwargs)
+    compactor.llm = FakeChatModel(answer_words=5)
+    return compactor
+
+
+def test_history_within_budget_is_left_alone():
+    compactor = _compactor(max_tokens=10_000, window_tokens=100)
+    assert compactor.compact({"messages": _turn(1)}) == {}
+    assert compactor.llm.calls == 0
+
+
+def test_compaction_replaces_history_with_summary_and_recent_window():
+    messages = [_summary("earlier topics")] + _long_history(6)
+    compactor = _compactor(max_tokens=200, window_tokens=120, summary_max_tokens=50)
+
+    update = compactor.compact({"messages": messages})
+    removal, summary, *recent = update["messages"]
+    assert isinstance(removal, RemoveMessage) and removal.id == REMOVE_ALL_MESSAGES
+    assert summary.id == SUMMARY_MESSAGE_ID and message_kind(summary) == SUMMARY
+    assert summary.content.startswith("Answer to")
+    # The kept messages are the newest ones, in order
+    assert recent == messages[len(messages) - len(recent):]
+    assert 0 < count_message_tokens(recent) <= 120
+    assert compactor.compactions == 1
+
+    # Applied through the messages reducer, the state holds exactly that
+    stored = add_messages(messages, update["messages"])
+    assert [message.id for message in stored] == [SUMMARY_MESSAGE_ID] + [message.id for message in recent]
+    assert compactor.plan(stored) is None
+
+
+def test_summary_prompt_leaves_out_drafts_and_scores():
+    compactor = _compactor()
+    _, old, _ = _compactor(max_tokens=200, window_tokens=120).plan(_long_history(6))
+    transcript = compactor.build_prompt("", old)[1].content
+    assert "question 0" in transcript and "answer 0" in transcript
+    assert "draft 0" not in transcript
+    assert "ai: 8" not in transcript
+
+
+def test_failed_summary_falls_back_to_extractive_summary():
+    compactor = _compactor(max_tokens=200, window_tokens=120, summary_max_tokens=50)
+
+    class Broken(FakeChatModel):
+        def _generate(self, *args, **kwargs):
+            raise ValueError("model down")
+
+    compactor.llm = Broken()
+    update = compactor.compact({"messages": [_summary("earlier topics")] + _long_history(6)})
+    summary = update["messages"][1].content
+    assert summary.startswith("earlier topics question 0 answer 0")
+    assert "draft" not in summary
+
+
+def test_async_compaction_matches_sync():
+    messages = _long_history(6)
+    sync_update = _compactor(max_tokens=200, window_tokens=120).compact({"messages": messages})
+    async_update = asyncio.run(_compactor(max_tokens=200, window_tokens=120).acompact({"messages": messages}))
+    assert [message.id for message in async_update["messages"][2:]] == [message.id for message in sync_update["messages"][2:]]
@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fakes import FakeChatModel
+from src.utils.llm_clients import LLMClientRegistry
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "test-model",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4}
+}
+
+
+def _registry():
+    """Registry whose pools answer every request with a chat completion"""
+    registry = LLMClientRegistry()
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=COMPLETION)
+
+    options = registry._pool_options
+    registry._pool_options = lambda: {**options(), "transport": httpx.MockTransport(handler)}
+    return registry, requests
+
+
+def test_same_arguments_share_one_client_and_one_pool():
+    registry, requests = _registry()
+    model = registry.get_chat_model("test-model")
+    assert registry.get_chat_model("test-model") is model
+    other = registry.get_chat_model("test-model", temperature=0.5)
+    assert other is not model
+    assert registry.stats()["clients"] == 2
+
+    model.invoke([HumanMessage(content="Hi")])
+    pool = registry.http_client.pool
+    other.invoke([HumanMessage(content="Hi")])
+    assert registry.http_client.pool is pool
+    assert len(requests) == 2
+
+
+def test_set_factory_replaces_and_restores_the_client_type():
+    registry, _ = _registry()
+    groq_model = registry.get_chat_model("test-model")
+
+    registry.set_factory(lambda model_name, **params: FakeChatModel())
+    fake = registry.get_chat_model("test-model")
+    assert isinstance(fake, FakeChatModel)
+    assert registry.get_chat_model("test-model") is fake
+
+    registry.set_factory(None)
+    restored = registry.get_chat_model("test-model")
+    assert type(restored) is type(groq_model) and restored is not groq_model
+
+
+def test_models_keep_working_after_the_pools_close():
+    registry, requests = _registry()
+    model = registry.get_chat_model("test-model")
+
+    async def lifespan():
+        response = await model.ainvoke([HumanMessage(content="Hi")])
+        model.invoke([HumanMessage(content="Hi")])
+        await registry.aclose()
+        return response.content
+
+    # Two lifespans in one process, as with tests or reloads
+    assert asyncio.run(lifespan()) == "Hello"
+    assert registry.http_client._pool is None
+    assert asyncio.run(lifespan()) == "Hello"
+    assert len(requests) == 4
+    assert registry.get_chat_model("test-model") is model
+
+
+def test_each_event_loop_gets_its_own_async_pool():
+    registry, _ = _registry()
+    client = registry.http_async_client
+
+    async def pool():
+        await client.get("https://api.groq.com/openai/v1/models")
+        return client.pool
+
+    async def same_loop():
+        return await pool(), await pool()
+
+    first, second = asyncio.run(same_loop())
+    assert first is second
+
+    loop = asyncio.new_event_loop()
+    try:
+        private = loop.run_until_complete(pool())
+        assert private is not first
+        loop.run_until_complete(registry.release_loop())
+        assert private.is_closed
+    finally:
+        loop.close()
@@ -0,0 +1,93 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.routers.local_classifier import HashedNgramClassifier, main
+from src.routers.supervisor import SupervisorAgent
+from src.utils.history import ANSWER, QUESTION, tag_message
+
+TRAINING = [
+    ("What is a good pricing strategy for a new product?", "business"),
+    ("How do we grow revenue and market share?", "business"),
+    ("Write a SWOT analysis of our competitors in the market", "business"),
+    ("What does the latest research say about sleep and memory?", "research"),
+    ("Summarise recent studies on climate change", "research"),
+    ("Find academic papers about protein folding", "research"),
+    ("How do I fix a Python import error?", "technical"),
+    ("Explain how a database index speeds up queries", "technical"),
+    ("Why does my Docker container keep restarting?", "technical"),
+]
+
+
+def _fit():
+    questions, labels = zip(*TRAINING)
+    return HashedNgramClassifier(n_features=2 ** 12).fit(list(questions), list(labels), epochs=30)
+
+
+class FixedClassifier:
+    """Stand-in returning the same prediction for every question"""
+
+    def __init__(self, label, confidence):
+        self.label = label
+        self.confidence = confidence
+
+    def predict(self, question):
+        return self.label, self.confidence
+
+
+def _supervisor(confidence, threshold=0.8):
+    return SupervisorAgent(
+        fast_classifier=FixedClassifier("technical", confidence), fast_threshold=threshold, decision_log_path=""
+    )
+
+
+def test_fit_predict_and_save_load_round_trip(tmp_path):
+    model = _fit()
+    for question, label in TRAINING:
+        assert model.predict(question)[0] == label
+    assert abs(sum(model.predict_proba("pricing for a new product").values()) - 1.0) < 1e-5
+
+    path = str(tmp_path / "classifier.npz")
+    model.save(path)
+    loaded = HashedNgramClassifier.load(path)
+    assert loaded.labels == model.labels and loaded.n_features == model.n_features
+    for question, _ in TRAINING:
+        assert loaded.predict(question) == model.predict(question)
+
+
+def test_fast_response_falls_back_below_the_threshold():
+    assert _supervisor(confidence=0.5).fast_response("How do I fix this bug?") is None
+
+    confident = _supervisor(confidence=0.95)
+    response = confident.fast_response("How do I fix this bug?")
+    assert response.classifier == "technical"
+    assert confident.route_counts["local"] == 1
+
+
+def test_fast_route_only_handles_first_turns():
+    supervisor = _supervisor(confidence=0.95)
+    assert supervisor.fast_route({"question": "How do I fix this bug?", "messages": []})["classifier_response"] == "technical"
+
+    # A follow-up depends on the history the local classifier does not see
+    history = [
+        tag_message(HumanMessage(content="What is a good pricing strategy?"), QUESTION),
+        tag_message(AIMessage(content="Value-based pricing."), ANSWER),
+    ]
+    assert supervisor.fast_route({"question": "What about the costs of that?", "messages": history}) is None
+
+
+def test_train_and_eval_cli(tmp_path, capsys):
+    data = tmp_path / "classifier.jsonl"
+    data.write_text("\n".join(
+        json.dumps({"question": question, "classifier_response": label}) for question, label in TRAINING * 3
+    ))
+    model = str(tmp_path / "classifier.npz")
+
+    main(["train", "--data", str(data), "--model", model, "--holdout", "0"])
+    assert json.loads(capsys.readouterr().out)["trained_on"] == len(TRAINING) * 3
+
+    main(["eval", "--data", str(data), "--model", model, "--threshold", "0.0"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["examples"] == len(TRAINING) * 3
+    assert report["accuracy"] == report["routed_accuracy"] == 1.0
+    assert report["coverage"] == 1.0
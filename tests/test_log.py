@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import pytest
+
+from config.settings import settings
+from src.routers.supervisor import SupervisorAgent
+from src.utils import log
+from src.utils.log import file_logger, log_stats, request_id_var, setup_logging, shutdown_logging
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "writer thread did not catch up"
+        time.sleep(0.01)
+
+
+def _lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as handle:
+        return handle.read().splitlines()
+
+
+@pytest.fixture
+def app_logger():
+    yield logging.getLogger("src.tests")
+    # Back to the pipeline main.py sets up
+    setup_logging()
+
+
+def _records(capsys):
+    """Lines written to stdout, after the queued records are flushed"""
+    shutdown_logging()
+    return capsys.readouterr().out.splitlines()
+
+
+def test_records_are_written_by_the_listener_thread(app_logger, capsys, monkeypatch):
+    setup_logging(level="INFO", fmt="json")
+    writers = []
+    emit = log._StdoutHandler.emit
+
+    def recording_emit(handler, record):
+        writers.append(threading.get_ident())
+        emit(handler, record)
+
+    monkeypatch.setattr(log._StdoutHandler, "emit", recording_emit)
+    handlers = [handler for handler in logging.getLogger().handlers if isinstance(handler, log._NonBlockingQueueHandler)]
+    assert handlers == [log._handler]
+    assert log._listener._thread.is_alive()
+
+    app_logger.info("first")
+    app_logger.info("second")
+    lines = _records(capsys)
+
+    assert [json.loads(line)["msg"] for line in lines] == ["first", "second"]
+    assert len(writers) == 2 and threading.get_ident() not in writers
+    assert log._listener is None
+
+
+def test_json_format_carries_extra_fields_and_request_context(app_logger, capsys):
+    setup_logging(level="INFO", fmt="json")
+    token = request_id_var.set("req-1")
+    try:
+        app_logger.info("Answer %s", "ready", extra={"chars": 42})
+    finally:
+        request_id_var.reset(token)
+    app_logger.debug("below the level")
+
+    [line] = _records(capsys)
+    entry = json.loads(line)
+    assert {key: entry[key] for key in ("level", "logger", "msg", "chars", "request_id")} == {
+        "level": "INFO", "logger": "src.tests", "msg": "Answer ready", "chars": 42, "request_id": "req-1"
+    }
+    assert entry["ts"].endswith("+00:00")
+
+
+def test_text_format_appends_extra_fields(app_logger, capsys):
+    setup_logging(level="INFO", fmt="text")
+    app_logger.warning("Slow call", extra={"node": "validator", "ms": 120})
+
+    [line] = _records(capsys)
+    assert line.endswith("WARNING src.tests: Slow call node=validator ms=120")
+
+
+def test_sampling_drops_only_records_below_warning(app_logger, capsys):
+    setup_logging(level="INFO", fmt="json", sample_rate=0.0)
+    for number in range(5):
+        app_logger.info(f"info {number}")
+    app_logger.warning("kept")
+    app_logger.error("also kept")
+
+    assert log_stats() == {"dropped": 0, "sampled_out": 5}
+    assert [json.loads(line)["msg"] for line in _records(capsys)] == ["kept", "also kept"]
+
+
+def test_partial_sampling_keeps_a_share_of_the_records(app_logger, capsys):
+    setup_logging(level="INFO", fmt="json", sample_rate=0.5)
+    random.seed(3)
+    for number in range(200):
+        app_logger.info(f"info {number}")
+
+    sampled_out = log_stats()["sampled_out"]
+    assert 60 <= sampled_out <= 140
+    assert len(_records(capsys)) == 200 - sampled_out
+
+
+def test_full_queue_drops_records_instead_of_blocking(app_logger, capsys, monkeypatch):
+    setup_logging(level="INFO", fmt="json", queue_size=1)
+    writing = threading.Event()
+    release = threading.Event()
+    emit = log._StdoutHandler.emit
+
+    def stalled_emit(handler, record):
+        writing.set()
+        release.wait(5)
+        emit(handler, record)
+
+    monkeypatch.setattr(log._StdoutHandler, "emit", stalled_emit)
+    app_logger.info("being written")
+    assert writing.wait(2)
+
+    start = time.perf_counter()
+    for number in range(5):
+        app_logger.info(f"queued {number}")
+    # One record fits in the queue; the rest are dropped without waiting
+    assert time.perf_counter() - start < 0.5
+    assert log_stats() == {"dropped": 4, "sampled_out": 0}
+
+    release.set()
+    # Leave room for the stop sentinel
+    _wait_for(log._handler.queue.empty)
+    assert [json.loads(line)["msg"] for line in _records(capsys)] == ["being written", "queued 0"]
+
+
+def test_file_logger_writes_on_a_background_thread(tmp_path):
+    path = str(tmp_path / "nested" / "lines.jsonl")
+    logger = file_logger(path, max_bytes=1_000_000, backup_count=1)
+    writers = []
+    handler = logger.handlers[0]
+    original = handler.queue.put_nowait
+
+    def put_nowait(record):
+        writers.append(threading.get_ident())
+        original(record)
+
+    handler.queue.put_nowait = put_nowait
+    logger.info("first")
+    logger.info("second")
+
+    _wait_for(lambda: len(_lines(path)) == 2)
+    assert _lines(path) == ["first", "second"]
+    # The caller only queued the lines
+    assert writers == [threading.get_ident()] * 2
+    assert file_logger(path, max_bytes=1, backup_count=1) is logger
+
+
+def test_file_logger_rotates_by_size(tmp_path):
+    path = str(tmp_path / "rotating.jsonl")
+    logger = file_logger(path, max_bytes=200, backup_count=2)
+    for number in range(30):
+        logger.info(f"line {number:02d} " + "x" * 40)
+
+    _wait_for(lambda: "line 29" in "".join(_lines(path)))
+    files = sorted(os.listdir(tmp_path))
+    assert files == ["rotating.jsonl", "rotating.jsonl.1", "rotating.jsonl.2"]
+    assert all(os.path.getsize(tmp_path / name) <= 200 for name in files)
+
+
+def test_worker_processes_write_their_own_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WORKERS", 4)
+    logger = file_logger(str(tmp_path / "decisions.jsonl"), max_bytes=1_000_000, backup_count=1)
+    logger.info("from this worker")
+
+    path = str(tmp_path / f"decisions.{os.getpid()}.jsonl")
+    _wait_for(lambda: _lines(path) == ["from this worker"])
+
+
+def test_supervisor_logs_llm_decisions(tmp_path):
+    path = str(tmp_path / "classifier.jsonl")
+    supervisor = SupervisorAgent(decision_log_path=path)
+    supervisor.log_decision("What is SWOT analysis?", "business")
+
+    _wait_for(lambda: len(_lines(path)) == 1)
+    assert json.loads(_lines(path)[0]) == {"question": "What is SWOT analysis?", "classifier_response": "business"}
+    assert supervisor.route_counts["llm"] == 1
+
+
+def test_supervisor_without_log_path_writes_nothing(tmp_path):
+    supervisor = SupervisorAgent(decision_log_path="")
+    supervisor.log_decision("What is SWOT analysis?", "business")
+    assert supervisor.route_counts["llm"] == 1
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.fakes import Latency, install_fakes
+from src.graph.workflow import AgentWorkflow
+
+SAMPLE_RE = re.compile(r"^(\w+)(\{.*\})? (\S+)$")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from api.routes import agent as agent_routes
+    from main import app
+
+    workflow = AgentWorkflow()
+    install_fakes(workflow, Latency(), Latency())
+    monkeypatch.setattr(agent_routes, "workflow", workflow)
+    return TestClient(app)
+
+
+def _samples(client):
+    """Series of the /metrics exposition text mapped to their values"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#") or not line:
+            continue
+        match = SAMPLE_RE.match(line)
+        assert match, f"not a Prometheus sample: {line}"
+        samples[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return samples, response.text
+
+
+def _delta(before, after, series):
+    return after.get(series, 0.0) - before.get(series, 0.0)
+
+
+def test_ask_moves_node_llm_search_and_http_metrics(client):
+    before, _ = _samples(client)
+    response = client.post("/api/v1/ask", json={"question": "What is SWOT analysis?"})
+    assert response.status_code == 200
+    after, text = _samples(client)
+
+    for metric in (
+        "agent_node_duration_seconds",
+        "agent_llm_call_duration_seconds",
+        "agent_llm_tokens_total",
+        "agent_search_duration_seconds",
+        "http_request_duration_seconds"
+    ):
+        assert f"# TYPE {metric} " in text
+
+    for node in ("supervisor", "web_search", "business", "business_analyst", "validator"):
+        assert _delta(before, after, f'agent_node_duration_seconds_count{{node="{node}",route="business"}}') == 1
+    for call, node in (("supervisor", "supervisor"), ("agent", "business"), ("synthesis", "business_analyst"), ("validator", "validator")):
+        assert _delta(before, after, f'agent_llm_call_duration_seconds_count{{call="{call}",node="{node}"}}') == 1
+        for direction in ("input", "output"):
+            assert _delta(before, after, f'agent_llm_tokens_total{{call="{call}",node="{node}",direction="{direction}"}}') > 0
+    assert _delta(before, after, 'agent_search_duration_seconds_count{node="web_search"}') == 1
+    assert _delta(before, after, 'http_request_duration_seconds_count{method="POST",path="/api/v1/ask",status="200"}') == 1
+
+
+def test_histogram_buckets_are_cumulative(client):
+    client.post("/api/v1/ask", json={"question": "What is SWOT analysis?"})
+    samples, _ = _samples(client)
+
+    prefix = 'http_request_duration_seconds_bucket{method="POST",path="/api/v1/ask",status="200",le="'
+    buckets = [value for series, value in samples.items() if series.startswith(prefix)]
+    assert buckets == sorted(buckets)
+    count = samples['http_request_duration_seconds_count{method="POST",path="/api/v1/ask",status="200"}']
+    assert samples[prefix + '+Inf"}'] == count
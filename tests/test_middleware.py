@@ -0,0 +1,117 @@
+import re
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api import middleware
+from api.middleware import SECURITY_HEADERS, setup_middleware
+from src.utils.log import request_id_var
+
+HEX_ID = re.compile(r"[0-9a-f]{32}")
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """record_http calls and stream chunks, in the order they happened"""
+    recorded = []
+    monkeypatch.setattr(
+        middleware, "record_http",
+        lambda method, path, status, seconds: recorded.append(("record", method, path, status))
+    )
+    return recorded
+
+
+@pytest.fixture
+def client(events):
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"item_id": item_id, "request_id": request_id_var.get()}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(3):
+                events.append(("chunk", index))
+                yield f"data: {index}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="Not here")
+
+    @app.get("/framed")
+    async def framed():
+        return StreamingResponse(iter(["x"]), headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    @app.get("/broken")
+    async def broken():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def _assert_security_headers(response):
+    for name, value in SECURITY_HEADERS:
+        assert response.headers[name.decode()] == value.decode()
+    assert float(response.headers["x-process-time"]) >= 0
+
+
+def test_valid_request_id_is_echoed_and_set_for_the_request(client):
+    response = client.get("/items/1", headers={"X-Request-ID": "client-id.42"})
+    assert response.headers["x-request-id"] == "client-id.42"
+    assert response.json()["request_id"] == "client-id.42"
+
+
+@pytest.mark.parametrize("header", [None, "not valid!", "x" * 129])
+def test_missing_or_invalid_request_id_is_replaced(client, header):
+    headers = {"X-Request-ID": header} if header else {}
+    first = client.get("/items/1", headers=headers)
+    second = client.get("/items/1", headers=headers)
+
+    assert HEX_ID.fullmatch(first.headers["x-request-id"])
+    assert first.json()["request_id"] == first.headers["x-request-id"]
+    assert first.headers["x-request-id"] != second.headers["x-request-id"]
+
+
+def test_normal_response_gets_headers_and_one_record(client, events):
+    response = client.get("/items/7")
+    assert response.status_code == 200
+    _assert_security_headers(response)
+    # Path parameters are folded back into the route template
+    assert events == [("record", "GET", "/items/{item_id}", 200)]
+
+
+def test_streaming_response_is_recorded_after_the_last_chunk(client, events):
+    response = client.get("/stream")
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    _assert_security_headers(response)
+    assert events == [("chunk", 0), ("chunk", 1), ("chunk", 2), ("record", "GET", "/stream", 200)]
+
+
+def test_error_responses_get_headers_and_one_record(client, events):
+    response = client.get("/missing")
+    assert response.status_code == 404
+    _assert_security_headers(response)
+
+    unmatched = client.get("/nowhere")
+    assert unmatched.status_code == 404
+    _assert_security_headers(unmatched)
+
+    assert events == [("record", "GET", "/missing", 404), ("record", "GET", "unmatched", 404)]
+
+
+def test_unhandled_exception_is_recorded_as_500_once(client, events):
+    response = client.get("/broken")
+    assert response.status_code == 500
+    assert events == [("record", "GET", "/broken", 500)]
+
+
+def test_route_headers_are_not_overridden(client):
+    response = client.get("/framed")
+    assert response.headers.get_list("x-frame-options") == ["SAMEORIGIN"]
+    assert response.headers["x-content-type-options"] == "nosniff"
@@ -0,0 +1,261 @@
+import asyncio
+import random
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fakes import FakeChatModel, Latency, install_fakes
+from src.graph.workflow import AgentWorkflow
+from src.utils.admission import AdmissionRejected, ProviderLimiter, admission
+from src.utils.deadline import deadline_scope, time_left
+from src.utils.resilience import DeadlineExceeded, ResilientCaller, is_transient, resilience
+
+MESSAGES = [HumanMessage(content="question: What is SWOT analysis?")]
+
+
+def _transient_error():
+    return httpx.ConnectError("connection refused")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from api.routes import agent as agent_routes
+    from main import app
+
+    def serve(llm_latency=0.0):
+        workflow = AgentWorkflow()
+        install_fakes(workflow, Latency(llm_latency), Latency())
+        monkeypatch.setattr(agent_routes, "workflow", workflow)
+        return TestClient(app)
+
+    return serve
+
+
+# Admission control
+
+def test_full_queue_is_rejected_right_away():
+    limiter = ProviderLimiter("groq", max_concurrency=1, max_queue=1, queue_timeout=5)
+
+    async def run():
+        await limiter.aacquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.aacquire()
+        limiter.release()
+        await waiter
+        limiter.release()
+        return rejected.value
+
+    error = asyncio.run(run())
+    assert error.reason == "queue full"
+    assert error.retry_after >= 1
+    assert limiter.stats()["rejected_queue_full"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_queue_timeout_rejects_and_frees_the_queue():
+    limiter = ProviderLimiter("groq", max_concurrency=1, max_queue=5, queue_timeout=5)
+    limiter.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire(timeout=0.05)
+    assert rejected.value.reason == "queue timeout"
+    assert limiter.stats()["waiting"] == 0
+    limiter.release()
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_queue_wait_is_capped_by_the_call_deadline():
+    limiter = ProviderLimiter("groq", max_concurrency=1, max_queue=5, queue_timeout=30)
+    limiter.acquire()
+    start = time.monotonic()
+    with deadline_scope(time.monotonic() + 0.05):
+        with pytest.raises(AdmissionRejected):
+            limiter.acquire()
+    assert time.monotonic() - start < 1
+    limiter.release()
+
+
+def test_rate_limit_rejects_with_the_refill_wait():
+    limiter = ProviderLimiter("tavily", max_concurrency=4, requests_per_minute=60, max_queue=5, queue_timeout=0.1)
+    # 60/minute bucket starts full; drain it
+    limiter.requests.level = 0
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "rate limit"
+    assert 0.5 < rejected.value.retry_after <= 1.0
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_ask_returns_503_with_retry_after_when_overloaded(client, monkeypatch):
+    full = ProviderLimiter("groq", max_concurrency=1, max_queue=0)
+    monkeypatch.setitem(admission.limiters, "groq", full)
+
+    response = client().post("/api/v1/ask", json={"question": "What is SWOT analysis?"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert "queue full" in response.json()["detail"]
+
+
+def test_stream_returns_503_before_the_stream_starts(client, monkeypatch):
+    monkeypatch.setitem(admission.limiters, "groq", ProviderLimiter("groq", max_concurrency=1, max_queue=0))
+
+    response = client().post("/api/v1/ask/stream", json={"question": "What is SWOT analysis?"})
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+
+# Retries
+
+def test_backoff_stays_within_jitter_bounds():
+    caller = ResilientCaller(base_delay=0.1, max_delay=2.0)
+    random.seed(7)
+    previous = caller.base_delay
+    for _ in range(200):
+        delay = caller._backoff(previous)
+        assert caller.base_delay <= delay <= min(caller.max_delay, 3 * previous)
+        previous = delay
+    assert previous <= caller.max_delay
+
+
+def test_transient_errors_are_retried_up_to_max_attempts():
+    caller = ResilientCaller(max_attempts=3, base_delay=0.001, max_delay=0.002)
+    attempts = []
+
+    def call(primary):
+        attempts.append(primary)
+        raise _transient_error()
+
+    with pytest.raises(httpx.ConnectError):
+        caller.call("agent", call)
+    # Retries replace the failed request, so each one is streamed to the client
+    assert attempts == [True, True, True]
+    assert caller.stats()["retries"] == 2
+
+
+def test_retry_succeeds_after_transient_failure():
+    caller = ResilientCaller(max_attempts=3, base_delay=0.001, max_delay=0.002)
+    llm = FakeChatModel()
+    failures = [_transient_error()]
+
+    async def call(primary):
+        if failures:
+            raise failures.pop()
+        return await llm.ainvoke(MESSAGES)
+
+    response = asyncio.run(caller.acall("agent", call))
+    assert response.content.startswith("Answer to 'What is SWOT analysis?'")
+    assert caller.stats()["retries"] == 1
+
+
+def test_permanent_errors_are_not_retried():
+    caller = ResilientCaller(max_attempts=3, base_delay=0.001)
+    calls = []
+
+    def call(primary):
+        calls.append(primary)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        caller.call("agent", call)
+    assert len(calls) == 1
+    assert not is_transient(AdmissionRejected("groq", "queue full", 1))
+    assert not is_transient(DeadlineExceeded("late"))
+
+
+def test_no_retry_when_the_backoff_would_pass_the_deadline():
+    caller = ResilientCaller(budgets={"agent": 0.05}, max_attempts=5, base_delay=1.0, max_delay=1.0)
+    calls = []
+
+    def call(primary):
+        calls.append(primary)
+        raise _transient_error()
+
+    with pytest.raises(httpx.ConnectError):
+        caller.call("agent", call)
+    assert len(calls) == 1
+
+
+# Hedging
+
+def test_hedge_wins_and_the_losing_call_is_cancelled():
+    caller = ResilientCaller(hedge_nodes={"agent"}, hedge_quantile=0.5, hedge_min_samples=1, hedge_max_ratio=1.0)
+    caller._window("agent").record(0.02)
+    slow = FakeChatModel(latency=Latency(5.0))
+    fast = FakeChatModel()
+    cancelled = []
+
+    async def call(primary):
+        try:
+            return await (slow if primary else fast).ainvoke(MESSAGES)
+        except asyncio.CancelledError:
+            cancelled.append(primary)
+            raise
+
+    async def run():
+        start = time.monotonic()
+        response = await caller.acall("agent", call)
+        # Let the cancellation of the losing task run
+        await asyncio.sleep(0)
+        return response, time.monotonic() - start
+
+    response, elapsed = asyncio.run(run())
+    assert response.content.startswith("Answer to")
+    assert elapsed < 1
+    assert cancelled == [True]
+    assert caller.stats()["hedges"] == 1
+    assert caller.stats()["hedge_wins"] == 1
+
+
+def test_no_hedge_before_enough_latency_samples():
+    caller = ResilientCaller(hedge_nodes={"agent"}, hedge_min_samples=10, hedge_max_ratio=1.0)
+    llm = FakeChatModel(latency=Latency(0.05))
+    asyncio.run(caller.acall("agent", lambda primary: llm.ainvoke(MESSAGES)))
+    assert caller.stats()["hedges"] == 0
+    assert llm.calls == 1
+
+
+# Deadlines
+
+def test_node_budget_raises_deadline_exceeded():
+    caller = ResilientCaller(budgets={"agent": 0.05})
+    llm = FakeChatModel(latency=Latency(5.0))
+    seen = []
+
+    async def call(primary):
+        seen.append(time_left())
+        return await llm.ainvoke(MESSAGES)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(caller.acall("agent", call))
+    assert time.monotonic() - start < 1
+    # The call sees its own deadline (e.g. for admission waits)
+    assert 0 < seen[0] <= 0.05
+    assert caller.stats()["timeouts"] == 1
+
+
+def test_sync_deadline_abandons_the_stalled_call():
+    caller = ResilientCaller(budgets={"agent": 0.05})
+    llm = FakeChatModel(latency=Latency(0.5))
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        caller.call("agent", lambda primary: llm.invoke(MESSAGES))
+    assert time.monotonic() - start < 0.4
+
+
+def test_ask_maps_deadline_exceeded_to_504(client, monkeypatch):
+    monkeypatch.setattr(resilience, "budgets", {"supervisor": 0.05})
+
+    response = client(llm_latency=5.0).post("/api/v1/ask", json={"question": "What is SWOT analysis?"})
+    assert response.status_code == 504
+    assert "deadline" in response.json()["detail"]
+
+
+def test_ask_rejects_empty_question_with_400(client):
+    response = client().post("/api/v1/ask", json={"question": "   "})
+    assert response.status_code == 400
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import pytest
+
+from config.settings import settings
+from src.utils.semantic_cache import HashedEmbedding, SemanticCache, SemanticCacheStore, build_semantic_cache
+
+SCORED = {"final_answer": "cached", "validator_score": "9"}
+
+# Same wording apart from one word that reverses the meaning
+OPPOSITES = [
+    (
+        "What are the main reasons why global housing prices have been increasing so quickly in major cities "
+        "over the last ten years, and what should first time buyers do about it?",
+        "What are the main reasons why global housing prices have been decreasing so quickly in major cities "
+        "over the last ten years, and what should first time buyers do about it?"
+    ),
+    (
+        "For a small software startup with twelve employees in Europe, what are the most important risks of "
+        "moving the whole team to fully remote work next year?",
+        "For a small software startup with twelve employees in Europe, what are the most important benefits of "
+        "moving the whole team to fully remote work next year?"
+    )
+]
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_EMBEDDING_MODEL", "")
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_DISK_PATH", "")
+
+
+def test_hashed_fallback_uses_the_strict_threshold(enabled):
+    cache = build_semantic_cache()
+    assert isinstance(cache.embed, HashedEmbedding)
+    assert cache.threshold == settings.SEMANTIC_CACHE_HASHED_THRESHOLD >= 0.98
+
+
+@pytest.mark.parametrize("stored, asked", OPPOSITES)
+def test_hashed_fallback_does_not_serve_opposite_questions(enabled, stored, asked):
+    cache = build_semantic_cache()
+    assert cache.store(stored, SCORED)
+    assert cache.lookup(asked) is None
+    assert cache.lookup(stored.upper() + "  ") == SCORED
+
+
+def test_semantic_threshold_would_serve_them():
+    # Why the fallback needs its own threshold
+    cache = SemanticCache(threshold=settings.SEMANTIC_CACHE_THRESHOLD)
+    stored, asked = OPPOSITES[0]
+    cache.store(stored, SCORED)
+    assert cache.lookup(asked) == SCORED
+
+
+def test_low_scored_answers_are_not_stored():
+    cache = SemanticCache()
+    assert not cache.store("What is SWOT analysis?", {"final_answer": "meh", "validator_score": "3"})
+    assert cache.lookup("What is SWOT analysis?") is None
+    assert cache.stats()["rejected"] == 1
+
+
+def test_shared_store_io_runs_off_the_event_loop(tmp_path):
+    shared = SemanticCacheStore(str(tmp_path / "semantic.sqlite"), ttl_seconds=60)
+    writer = SemanticCache(shared=shared, sync_interval=0)
+    reader = SemanticCache(shared=shared, sync_interval=0)
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def record(method):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return method(*args, **kwargs)
+        return wrapper
+
+    shared.append = record(shared.append)
+    shared.since = record(shared.since)
+
+    async def run():
+        assert await writer.astore("What is SWOT analysis?", SCORED)
+        return await reader.alookup("What is SWOT analysis?")
+
+    assert asyncio.run(run()) == SCORED
+    assert reader.stats()["synced"] == 1
+    assert threads and loop_thread not in threads
+
+
+def test_model_embeddings_run_off_the_event_loop():
+    hashed = HashedEmbedding()
+    threads = []
+
+    class ModelEmbedding:
+        """Stand-in for a CPU-heavy sentence-transformers embedding"""
+        dim = hashed.dim
+
+        def __call__(self, text):
+            threads.append(threading.get_ident())
+            return hashed(text)
+
+    cache = SemanticCache(embed=ModelEmbedding())
+    loop_thread = threading.get_ident()
+
+    async def run():
+        await cache.astore("What is SWOT analysis?", SCORED)
+        return await cache.alookup("What is SWOT analysis?")
+
+    assert asyncio.run(run()) == SCORED
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_async_methods_without_a_shared_store():
+    cache = SemanticCache()
+
+    async def run():
+        await cache.astore("What is SWOT analysis?", SCORED)
+        return await cache.alookup("what is swot analysis")
+
+    assert asyncio.run(run()) == SCORED
@@ -0,0 +1,93 @@
+import json
+import math
+import os
+import subprocess
+import sys
+
+import pytest
+
+import serve
+from config.settings import settings
+from src.utils.admission import build_admission_controller
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    """Clean serve.py variables (restored after the test) and no .env file"""
+    for name in ("WORKERS", *serve.SHARED_STATE_DEFAULTS):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(serve, "load_dotenv", lambda: None)
+    monkeypatch.setattr(serve, "available_cores", lambda: 6)
+    return monkeypatch
+
+
+def test_workers_default_to_the_available_cores(environment):
+    serve.configure_environment(0)
+    assert os.environ["WORKERS"] == "6"
+
+
+def test_workers_argument_wins_over_the_environment(environment):
+    environment.setenv("WORKERS", "2")
+    serve.configure_environment(0)
+    assert os.environ["WORKERS"] == "2"
+
+    serve.configure_environment(3)
+    assert os.environ["WORKERS"] == "3"
+
+
+def test_shared_sqlite_stores_are_the_default(environment):
+    serve.configure_environment(0)
+    assert {name: os.environ[name] for name in serve.SHARED_STATE_DEFAULTS} == serve.SHARED_STATE_DEFAULTS
+    assert os.environ["CHECKPOINTER_BACKEND"] == "sqlite"
+
+
+def test_environment_and_dotenv_values_win_over_the_defaults(environment):
+    environment.setenv("SEARCH_CACHE_DISK_PATH", "/tmp/search.sqlite")
+    environment.setattr(serve, "load_dotenv", lambda: os.environ.setdefault("CHECKPOINTER_BACKEND", "memory"))
+    serve.configure_environment(0)
+
+    assert os.environ["CHECKPOINTER_BACKEND"] == "memory"
+    assert os.environ["SEARCH_CACHE_DISK_PATH"] == "/tmp/search.sqlite"
+    assert os.environ["SEMANTIC_CACHE_DISK_PATH"] == serve.SHARED_STATE_DEFAULTS["SEMANTIC_CACHE_DISK_PATH"]
+
+
+@pytest.mark.parametrize("workers", [1, 4, 64])
+def test_each_worker_gets_an_equal_share_of_the_admission_limits(monkeypatch, workers):
+    monkeypatch.setattr(settings, "GROQ_MAX_CONCURRENCY", 16)
+    monkeypatch.setattr(settings, "GROQ_REQUESTS_PER_MINUTE", 120)
+    monkeypatch.setattr(settings, "GROQ_TOKENS_PER_MINUTE", 60000)
+    monkeypatch.setattr(settings, "TAVILY_MAX_CONCURRENCY", 8)
+    monkeypatch.setattr(settings, "TAVILY_REQUESTS_PER_MINUTE", 60)
+
+    limiters = build_admission_controller(workers).limiters
+    groq, tavily = limiters["groq"], limiters["tavily"]
+
+    # At least one slot each, so a worker never starves
+    assert groq.max_concurrency == max(1, math.ceil(16 / workers))
+    assert tavily.max_concurrency == max(1, math.ceil(8 / workers))
+    assert groq.requests.capacity == pytest.approx(120 / workers)
+    assert groq.tokens.capacity == pytest.approx(60000 / workers)
+    assert tavily.requests.capacity == pytest.approx(60 / workers)
+
+
+def test_workers_read_the_derived_settings(environment, tmp_path):
+    serve.configure_environment(4)
+    environment.setenv("CHECKPOINT_DB_PATH", str(tmp_path / "checkpoints.sqlite"))
+    environment.setenv("GROQ_MAX_CONCURRENCY", "16")
+    # What a spawned worker sees after importing the app's settings
+    script = (
+        "import json\n"
+        "from config.settings import settings\n"
+        "from src.utils.admission import admission\n"
+        "settings.validate()\n"
+        "print(json.dumps({'workers': settings.WORKERS, 'checkpointer': settings.CHECKPOINTER_BACKEND,"
+        " 'groq': admission.limiters['groq'].max_concurrency}))\n"
+    )
+    env = {**os.environ, "LOG_LEVEL": "ERROR", "PYTHONPATH": BACKEND_DIR}
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=str(tmp_path), env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {"workers": 4, "checkpointer": "sqlite", "groq": 4}
@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables.config import var_child_runnable_config
+
+from benchmarks.fakes import FakeChatModel, Latency, install_fakes
+from src.agents.business_agent import BusinessAgent
+from src.agents.research_agent import ResearchAgent
+from src.agents.technical_agent import TechnicalAgent
+from src.graph.speculative import SpeculativeDispatcher, _estimate_prompt_tokens
+from src.graph.workflow import AgentWorkflow
+from src.routers.supervisor import SupervisorAgent
+from src.utils.deadline import REQUEST_DEADLINE_KEY
+from src.utils.log import request_id_var
+from src.utils.schemas import SupervisorResponse
+
+STATE = {
+    "question": "What is SWOT analysis?",
+    "messages": [HumanMessage(content="Earlier question"), AIMessage(content="Earlier answer " * 20)]
+}
+
+
+def _dispatcher(max_workers):
+    supervisor = SupervisorAgent(decision_log_path="")
+    supervisor.llm = FakeChatModel().with_structured_output(SupervisorResponse)
+    agents = {"business": BusinessAgent(), "research": ResearchAgent(), "technical": TechnicalAgent()}
+    # The question routes to business; the other branches are still waiting when it is classified
+    # (business outlasts classification, so a single worker cannot pick up a losing branch)
+    agents["business"].llm = FakeChatModel(latency=Latency(0.2))
+    for name in ("research", "technical"):
+        agents[name].llm = FakeChatModel(latency=Latency(5.0))
+    return SpeculativeDispatcher(supervisor, agents, max_workers=max_workers)
+
+
+def test_cancelled_branches_cost_the_same_on_both_paths():
+    # One worker: the losing sync branches are cancelled before they start
+    sync_dispatcher = _dispatcher(max_workers=1)
+    sync_update = sync_dispatcher.run(STATE)
+    async_dispatcher = _dispatcher(max_workers=1)
+    async_update = asyncio.run(async_dispatcher.arun(STATE))
+
+    assert sync_update["classifier_response"] == async_update["classifier_response"] == "business"
+    sync_stats = sync_dispatcher.stats.snapshot()
+    async_stats = async_dispatcher.stats.snapshot()
+    assert sync_stats["cancelled_branches"] == async_stats["cancelled_branches"] == 2
+
+    expected = sum(
+        _estimate_prompt_tokens(sync_dispatcher.agents[name], STATE) for name in ("research", "technical")
+    )
+    assert expected > 0
+    assert sync_stats["wasted_tokens"] == async_stats["wasted_tokens"] == expected
+
+
+def test_sync_classification_failure_cancels_queued_branches():
+    dispatcher = _dispatcher(max_workers=1)
+
+    def broken(state):
+        raise ValueError("supervisor down")
+
+    dispatcher.supervisor.classify = broken
+    with pytest.raises(ValueError, match="supervisor down"):
+        dispatcher.run(STATE)
+    # The first branch was already running; the queued ones never start
+    dispatcher._executor.shutdown(wait=True)
+    assert all(agent.llm.calls == 0 for name, agent in dispatcher.agents.items() if name != "business")
+
+
+def test_sync_branches_see_the_request_context_without_leaking_it():
+    dispatcher = _dispatcher(max_workers=1)
+    seen = []
+    process = dispatcher.agents["business"].process
+
+    def traced(state):
+        seen.append(request_id_var.get())
+        return process(state)
+
+    dispatcher.agents["business"].process = traced
+    token = request_id_var.set("req-1")
+    try:
+        dispatcher.run(STATE)
+    finally:
+        request_id_var.reset(token)
+
+    assert seen == ["req-1"]
+    # The branch's private callback config stays out of the pool thread
+    assert dispatcher._executor.submit(var_child_runnable_config.get).result() is None
+
+
+def _search(calls):
+    """(sync, async) search branch functions that record their outcome"""
+    def search(state):
+        calls.append("sync")
+        return {"web_search_content": "results"}
+
+    async def asearch(state):
+        try:
+            await asyncio.sleep(5.0)
+        except asyncio.CancelledError:
+            calls.append("cancelled")
+            raise
+        return {"web_search_content": "results"}
+
+    return search, asearch
+
+
+def test_failing_winner_cancels_the_search_branch():
+    dispatcher = _dispatcher(max_workers=4)
+    calls = []
+    dispatcher.search = _search(calls)
+
+    async def broken(state):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("agent down")
+
+    dispatcher.agents["business"].aprocess = broken
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+        with pytest.raises(RuntimeError, match="agent down"):
+            await dispatcher.arun(STATE)
+        # Checked before asyncio.run cancels whatever is left
+        return list(calls), unhandled
+
+    assert asyncio.run(run()) == (["cancelled"], [])
+
+
+def test_branches_extend_the_node_config():
+    dispatcher = _dispatcher(max_workers=4)
+    for name in ("research", "technical"):
+        dispatcher.agents[name].llm = FakeChatModel()
+    seen = {}
+
+    def traced(name, process):
+        def run(state):
+            seen[name] = var_child_runnable_config.get()
+            return process(state)
+        return run
+
+    for name, agent in dispatcher.agents.items():
+        agent.process = traced(name, agent.process)
+
+    parent_handler = BaseCallbackHandler()
+    token = var_child_runnable_config.set({
+        "callbacks": [parent_handler],
+        "tags": ["graph"],
+        "metadata": {"langgraph_node": "speculate"},
+        "configurable": {"thread_id": "thread-1"}
+    })
+    try:
+        dispatcher.run(STATE)
+    finally:
+        var_child_runnable_config.reset(token)
+
+    assert set(seen) == {"business", "research", "technical"}
+    for name, config in seen.items():
+        assert config["tags"] == ["graph"]
+        assert config["metadata"] == {"langgraph_node": "speculate", "speculative_branch": name}
+        assert config["configurable"].keys() == {"thread_id", REQUEST_DEADLINE_KEY}
+        assert config["callbacks"][0] is parent_handler and len(config["callbacks"]) == 2
+
+
+def test_only_the_winning_branch_is_token_streamed():
+    workflow = AgentWorkflow(mode="speculative")
+    install_fakes(workflow, Latency(0.05), Latency(), token_delay=0.001)
+    # Losing branches finish (and stream) before the question is classified
+    workflow.research_agent.llm = FakeChatModel(answer_words=3)
+    workflow.technical_agent.llm = FakeChatModel(answer_words=4)
+
+    async def stream():
+        return [event async for event in workflow.astream_tokens("What is SWOT analysis?", "thread-1")]
+
+    events = asyncio.run(stream())
+    tokens = "".join(event["content"] for event in events if event["event"] == "token" and event["node"] == "speculate")
+    update = next(event["update"] for event in events if event["event"] == "node_complete" and event["node"] == "speculate")
+
+    assert update["classifier_response"] == "business"
+    assert tokens == update["business_generate"]
+    assert all("branch" not in event for event in events)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from config.settings import settings
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+def test_importing_main_does_not_build_the_workflow():
+    # A fresh interpreter, so nothing earlier tests imported is cached
+    script = (
+        "import json, sys\n"
+        "import main\n"
+        "from api.routes import agent\n"
+        "print(json.dumps({'workflow': agent.workflow is None, 'graph': 'src.graph.workflow' in sys.modules}))\n"
+    )
+    env = {**os.environ, "LOG_LEVEL": "ERROR", "PYTHONPATH": BACKEND_DIR}
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {"workflow": True, "graph": False}
+
+
+def test_concurrent_first_calls_build_the_workflow_once(monkeypatch):
+    from api.routes import agent as agent_routes
+    from src.graph import workflow as workflow_module
+
+    built = []
+
+    class SlowWorkflow:
+        def __init__(self):
+            built.append(self)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(agent_routes, "workflow", None)
+    monkeypatch.setattr(workflow_module, "AgentWorkflow", SlowWorkflow)
+
+    start = threading.Barrier(8)
+    results = []
+
+    def first_call():
+        start.wait()
+        results.append(agent_routes.get_workflow())
+
+    threads = [threading.Thread(target=first_call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert len(results) == 8 and all(result is built[0] for result in results)
+
+
+def test_shutdown_waits_for_validations_before_closing_the_pools(monkeypatch):
+    import main
+
+    order = []
+
+    class Workflow:
+        async def wait_for_validations(self):
+            await asyncio.sleep(0.01)
+            order.append("validations")
+
+        def close_validation_pool(self):
+            order.append("validation pool")
+
+    async def aclose():
+        order.append("pools")
+
+    monkeypatch.setattr(main, "get_workflow", Workflow)
+    monkeypatch.setattr(main, "load_encoding", lambda: order.append("tokenizer"))
+    monkeypatch.setattr(main.llm_registry, "aclose", aclose)
+    # The real shutdown would stop the log writer for the rest of the session
+    monkeypatch.setattr(main, "shutdown_logging", lambda: order.append("logging"))
+    monkeypatch.setattr(settings, "WARMUP_CONNECTIONS", 0)
+
+    async def serve():
+        async with main.lifespan(main.app):
+            order.append("serving")
+
+    asyncio.run(serve())
+    assert order == ["tokenizer", "serving", "validations", "validation pool", "pools", "logging"]
+
+
+def test_slow_tokenizer_load_does_not_hold_up_startup(monkeypatch):
+    import main
+
+    loaded = threading.Event()
+
+    def load_encoding():
+        time.sleep(0.3)
+        loaded.set()
+
+    monkeypatch.setattr(main, "load_encoding", load_encoding)
+    monkeypatch.setattr(settings, "TOKENIZER_LOAD_TIMEOUT", 0.01)
+
+    async def start():
+        begin = time.perf_counter()
+        await main.load_tokenizer()
+        return time.perf_counter() - begin
+
+    assert asyncio.run(start()) < 0.2
+    # The load finishes in its thread and is picked up then
+    assert loaded.wait(2)
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+
+from benchmarks.fakes import Latency, install_fakes
+from src.graph.workflow import AgentWorkflow
+from src.utils import resilience as resilience_module
+from src.utils.resilience import _quiet, resilience
+from src.utils.streaming import ANSWER_STREAM_TAG, iter_stream_events
+
+ANSWER_NODES = ("business", "business_analyst")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from api.routes import agent as agent_routes
+    from main import app
+
+    workflow = AgentWorkflow()
+    fakes = install_fakes(workflow, Latency(0.02), Latency(), token_delay=0.001)
+    fakes["llm"].answer_words = 12
+    monkeypatch.setattr(agent_routes, "workflow", workflow)
+    return TestClient(app)
+
+
+def _stream(client, question="What is SWOT analysis?"):
+    """Events of a token-level /ask/stream response, in arrival order"""
+    response = client.post("/api/v1/ask/stream", json={"question": question, "stream_tokens": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+def _assert_tokens_rebuild_each_answer(events):
+    names = [event["event"] for event in events]
+    assert names[0] == "start" and names[-1] == "complete"
+    assert "error" not in names
+
+    completed = {event["data"]["node"]: event["data"] for event in events if event["event"] == "node_complete"}
+    assert {"supervisor", "web_search", "validator", *ANSWER_NODES} <= set(completed)
+
+    for node in ANSWER_NODES:
+        positions = [index for index, event in enumerate(events) if event["data"].get("node") == node]
+        kinds = [events[index]["event"] for index in positions]
+        # node_start, then every token, then node_complete
+        assert kinds[0] == "node_start" and kinds[-1] == "node_complete"
+        assert set(kinds[1:-1]) == {"token"}
+        tokens = "".join(events[index]["data"]["content"] for index in positions[1:-1])
+        # The fake model gives the draft and the synthesized answer the same text
+        assert tokens == completed["business_analyst"]["content"] != ""
+
+    # Routing and scoring calls are not streamed
+    assert {event["data"]["node"] for event in events if event["event"] == "token"} == set(ANSWER_NODES)
+
+
+def test_tokens_arrive_in_order_between_node_events(client):
+    _assert_tokens_rebuild_each_answer(_stream(client))
+
+
+def test_hedged_duplicates_are_kept_out_of_the_stream(client, monkeypatch):
+    # Hedge every answer call right away, so two identical requests stream at once
+    monkeypatch.setattr(resilience, "_hedge_delay", lambda node: 0.0 if node in ("agent", "synthesis") else None)
+    hedges = resilience.stats()["hedges"]
+
+    _assert_tokens_rebuild_each_answer(_stream(client, "How do we grow revenue?"))
+    assert resilience.stats()["hedges"] - hedges == 2
+
+
+def test_retried_answer_calls_are_still_streamed(client, monkeypatch):
+    # The first request of each answer call fails before any token is sent
+    invoke = resilience_module.aguarded_invoke
+    streamed = []
+
+    async def flaky_invoke(llm, messages, config=None):
+        if config and ANSWER_STREAM_TAG in config.get("tags", []):
+            streamed.append(config)
+            if len(streamed) % 2:
+                raise httpx.ConnectError("connection refused")
+        return await invoke(llm, messages, config)
+
+    monkeypatch.setattr(resilience_module, "aguarded_invoke", flaky_invoke)
+    monkeypatch.setattr(resilience, "base_delay", 0.001)
+    monkeypatch.setattr(resilience, "max_delay", 0.002)
+    retries = resilience.stats()["retries"]
+
+    _assert_tokens_rebuild_each_answer(_stream(client, "What is a good pricing strategy?"))
+    assert resilience.stats()["retries"] - retries == 2
+
+
+def test_quiet_config_drops_only_the_stream_tag():
+    config = {"tags": [ANSWER_STREAM_TAG, "agent"], "metadata": {"node": "business"}}
+    assert _quiet(config) == {"tags": ["agent"], "metadata": {"node": "business"}}
+    assert config["tags"] == [ANSWER_STREAM_TAG, "agent"]
+    assert _quiet({"tags": ["agent"]}) == {"tags": ["agent"]}
+    assert _quiet(None) is None
+
+
+def test_only_tagged_messages_become_token_events():
+    chunk = AIMessageChunk(content="Hello")
+    tagged = {"tags": [ANSWER_STREAM_TAG], "langgraph_node": "business"}
+
+    assert list(iter_stream_events("messages", (chunk, tagged))) == [
+        {"event": "token", "node": "business", "content": "Hello"}
+    ]
+    assert list(iter_stream_events("messages", (chunk, {"tags": [], "langgraph_node": "business"}))) == []
+    assert list(iter_stream_events("messages", (AIMessageChunk(content=""), tagged))) == []
+    assert list(iter_stream_events("tasks", {"name": "business", "input": {}})) == [
+        {"event": "node_start", "node": "business"}
+    ]
+    assert list(iter_stream_events("tasks", {"name": "business", "result": {}})) == []
+    assert list(iter_stream_events("updates", {"validator": None})) == [
+        {"event": "node_complete", "node": "validator", "update": {}}
+    ]
+
+
+@pytest.mark.parametrize("stream_tokens", [False, True])
+def test_deferred_stream_completes_before_the_validation_event(client, stream_tokens):
+    response = client.post(
+        "/api/v1/ask/stream",
+        json={"question": "What is SWOT analysis?", "defer_validation": True, "stream_tokens": stream_tokens}
+    )
+    assert response.status_code == 200
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    names = [event["event"] for event in events]
+
+    assert "error" not in names
+    assert names.count("complete") == names.count("validation") == 1
+    # The answer is complete before it is scored, and the score ends the stream
+    assert names.index("complete") < names.index("validation") == len(names) - 1
+    answered = next(
+        index for index, event in enumerate(events) if event["event"] == "node_complete" and event["data"].get("answer")
+    )
+    assert answered < names.index("complete")
+    assert events[answered]["data"]["score"] == "pending"
+    validation = events[-1]["data"]
+    assert validation["score"] not in ("", "pending")
+    assert validation["source"]
+
+
+def test_deferred_score_is_attached_to_the_thread_state(client):
+    thread_id = "deferred-state"
+    with client:
+        response = client.post(
+            "/api/v1/ask",
+            json={"question": "What is SWOT analysis?", "thread_id": thread_id, "defer_validation": True}
+        )
+        assert response.status_code == 200
+        assert response.json()["confidence_score"] == "pending"
+
+        # The score is attached by the background validation once it finishes
+        deadline = time.monotonic() + 5
+        while True:
+            state = client.get(f"/api/v1/state/{thread_id}").json()["state"]
+            if state.get("validator_score") != "pending" or time.monotonic() > deadline:
+                break
+            time.sleep(0.02)
+
+    assert state["validator_score"] not in ("", "pending")
+    assert state["validation_source"]
+
+
+def test_stream_in_flight_does_not_block_other_requests(monkeypatch):
+    from api.routes import agent as agent_routes
+    from main import app
+
+    calling = threading.Event()
+    started = []
+
+    class SignallingLatency(Latency):
+        def sample(self):
+            if not calling.is_set():
+                started.append(time.perf_counter())
+                calling.set()
+            return super().sample()
+
+    workflow = AgentWorkflow()
+    install_fakes(workflow, SignallingLatency(0.3), Latency(), token_delay=0.001)
+    monkeypatch.setattr(agent_routes, "workflow", workflow)
+
+    async def run():
+        # One event loop serves both requests, as in a uvicorn worker
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            async def health():
+                # Ask while the stream's first LLM call is in flight
+                while not calling.is_set():
+                    await asyncio.sleep(0.005)
+                response = await http.get("/health")
+                return response, time.perf_counter() - started[0]
+
+            return await asyncio.gather(
+                http.post("/api/v1/ask/stream", json={"question": "What is SWOT analysis?", "stream_tokens": True}),
+                health()
+            )
+
+    streamed, (healthy, health_seconds) = asyncio.run(run())
+
+    assert streamed.status_code == healthy.status_code == 200
+    assert '"event": "complete"' in streamed.text
+    # Answered without waiting for the 0.3 s LLM call
+    assert health_seconds < 0.15
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeChatModel, Latency, install_fakes
+from src.graph.workflow import AgentWorkflow
+from src.utils.schemas import ConfidenceScore
+from src.validators.heuristic import HeuristicScorer
+from src.validators.validator import PENDING_SCORE, ValidatorAgent
+
+QUESTION = "What drives customer retention in subscription businesses?"
+SEARCH = (
+    "Customer retention in subscription businesses is driven by onboarding, product value, "
+    "pricing and support quality. Churn falls when customers reach value early."
+)
+GROUNDED = (
+    "Customer retention in subscription businesses is driven by onboarding that shows value early, "
+    "a product customers keep using, fair pricing and responsive support quality, which together "
+    "reduce churn over the subscription lifetime."
+)
+
+
+def _validator(mode, sample_rate=0.1):
+    validator = ValidatorAgent(mode=mode, sample_rate=sample_rate)
+    llm = FakeChatModel()
+    validator.llm = llm.with_structured_output(ConfidenceScore)
+    return validator, llm
+
+
+def _state(answer=GROUNDED):
+    return {
+        "question": QUESTION,
+        "classifier_response": "business",
+        "business_analyst": answer,
+        "web_search_content": SEARCH
+    }
+
+
+# HeuristicScorer
+
+def test_grounded_answer_scores_above_an_ungrounded_one():
+    scorer = HeuristicScorer()
+    grounded = scorer.score(QUESTION, GROUNDED, SEARCH)
+    ungrounded = scorer.score(QUESTION, " ".join(f"filler{i}" for i in range(40)), SEARCH)
+
+    assert grounded >= 8
+    assert ungrounded <= 5
+    assert 0 <= ungrounded < grounded <= 10
+
+
+def test_empty_refusing_and_short_answers_score_low():
+    scorer = HeuristicScorer()
+
+    assert scorer.score(QUESTION, "", SEARCH) == 0
+    assert scorer.score(QUESTION, "   ", SEARCH) == 0
+    assert scorer.score(QUESTION, f"{GROUNDED} However, I do not know the answer.", SEARCH) == 2
+    # Same words, but below min_words
+    assert scorer.score(QUESTION, "Customer retention: onboarding.", SEARCH) < scorer.score(QUESTION, GROUNDED, SEARCH)
+
+
+def test_missing_search_results_do_not_penalise_the_answer():
+    scorer = HeuristicScorer()
+    assert scorer.score(QUESTION, GROUNDED, None) == scorer.score(QUESTION, GROUNDED, "")
+    assert 0 <= scorer.score("", GROUNDED, None) <= 10
+
+
+# Validation modes
+
+def test_heuristic_mode_never_calls_the_llm():
+    validator, llm = _validator("heuristic")
+
+    update = validator.validate(_state())
+    assert update["validation_source"] == "heuristic"
+    assert update["validator_score"] == str(HeuristicScorer().score(QUESTION, GROUNDED, SEARCH))
+    assert update["final_data"] == GROUNDED
+    assert asyncio.run(validator.avalidate(_state()))["validation_source"] == "heuristic"
+    assert llm.calls == 0
+    assert validator.counts == {"llm": 0, "heuristic": 2, "deferred": 0}
+
+
+@pytest.mark.parametrize("sample_rate, sources", [(0.0, {"heuristic"}), (1.0, {"llm"})])
+def test_sampled_mode_follows_the_sample_rate_bounds(sample_rate, sources):
+    validator, llm = _validator("sampled", sample_rate)
+
+    assert {validator.validate(_state())["validation_source"] for _ in range(10)} == sources
+    assert llm.calls == (10 if sources == {"llm"} else 0)
+
+
+def test_sampled_mode_scores_a_fraction_with_the_llm():
+    validator, llm = _validator("sampled", 0.3)
+    validator._rng.seed(7)
+
+    for _ in range(200):
+        validator.validate(_state())
+
+    assert validator.counts["llm"] == llm.calls
+    assert validator.counts["llm"] + validator.counts["heuristic"] == 200
+    assert 40 <= validator.counts["llm"] <= 80
+
+
+def test_async_mode_returns_a_pending_score():
+    validator, llm = _validator("async")
+
+    update = validator.validate(_state())
+    assert update["validator_score"] == update["validation_source"] == PENDING_SCORE
+    assert update["final_data"] == GROUNDED
+    # Search results stay for the heuristic fallback until the score is attached
+    assert "web_search_content" not in update
+    assert llm.calls == 0
+    assert validator.counts["deferred"] == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ValidatorAgent(mode="always")
+
+
+def _async_workflow():
+    workflow = AgentWorkflow()
+    install_fakes(workflow, Latency(), Latency())
+    workflow.validator.mode = "async"
+    return workflow
+
+
+def test_async_mode_attaches_the_score_after_an_async_run():
+    workflow = _async_workflow()
+
+    async def run():
+        result = await workflow.ainvoke("What is SWOT analysis?", "async-mode")
+        await workflow.wait_for_validations()
+        return result
+
+    assert asyncio.run(run())["validator_score"] == PENDING_SCORE
+    values = workflow.app.get_state(workflow._config("async-mode")).values
+    assert values["validator_score"] == "8"
+    assert values["validation_source"] == "llm"
+
+
+def test_closing_the_pool_finishes_the_validations_of_sync_runs():
+    workflow = _async_workflow()
+
+    assert workflow.invoke("What is SWOT analysis?", "sync-async-mode")["validator_score"] == PENDING_SCORE
+    workflow.close_validation_pool()
+
+    values = workflow.app.get_state(workflow._config("sync-async-mode")).values
+    assert values["validator_score"] == "8"
+    assert values["validation_source"] == "llm"
+    assert workflow._validation_executor is None
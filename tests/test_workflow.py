@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeChatModel, Latency, install_fakes
+from src.graph.workflow import AgentWorkflow
+from src.utils.checkpointer import SQLiteCheckpointer
+from src.utils.history import ANSWER, QUESTION
+
+
+def _workflow(path):
+    workflow = AgentWorkflow(checkpointer=SQLiteCheckpointer(path, thread_ttl_seconds=0))
+    install_fakes(workflow)
+    return workflow
+
+
+def _kinds(messages):
+    return [message.additional_kwargs.get("message_kind") for message in messages]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite")
+
+
+def test_multi_turn_thread_through_compiled_graph(db_path):
+    workflow = _workflow(db_path)
+    first = workflow.invoke("What is SWOT analysis?", thread_id="thread-1")
+    second = workflow.invoke("How do I apply it to a startup?", thread_id="thread-1")
+
+    assert first["final_data"] and second["final_data"]
+    assert second["classifier_response"] == "business"
+    messages = workflow.get_state("thread-1").values["messages"]
+    questions = [message.content for message in messages if message.additional_kwargs.get("message_kind") == QUESTION]
+    assert questions == ["What is SWOT analysis?", "How do I apply it to a startup?"]
+    assert _kinds(messages).count(ANSWER) == 2
+    assert workflow.get_state("thread-2").values == {}
+
+
+def test_thread_survives_restart(db_path):
+    _workflow(db_path).invoke("What is SWOT analysis?", thread_id="thread-1")
+
+    restarted = _workflow(db_path)
+    restarted.invoke("Explain Porter's five forces", thread_id="thread-1")
+    messages = restarted.get_state("thread-1").values["messages"]
+    assert _kinds(messages).count(QUESTION) == 2
+    assert len(restarted.get_state_history("thread-1", limit=100)) > 1
+
+
+def test_async_path_shares_the_thread(db_path):
+    workflow = _workflow(db_path)
+
+    async def run():
+        await workflow.ainvoke("What is SWOT analysis?", thread_id="thread-1")
+        return await workflow.ainvoke("How do I debug a memory leak in Python?", thread_id="thread-1")
+
+    result = asyncio.run(run())
+    assert result["classifier_response"] == "technical"
+    assert _kinds(workflow.get_state("thread-1").values["messages"]).count(QUESTION) == 2
+
+
+def test_retention_keeps_one_checkpoint_per_earlier_turn(db_path):
+    workflow = AgentWorkflow(checkpointer=SQLiteCheckpointer(db_path, max_turns_per_thread=2, thread_ttl_seconds=0))
+    install_fakes(workflow)
+    questions = ["What is SWOT analysis?", "How do I apply it to a startup?", "What about pricing?"]
+    for question in questions:
+        workflow.invoke(question, thread_id="thread-1")
+
+    history = workflow.get_state_history("thread-1", limit=100)
+    latest = workflow.get_state("thread-1").values
+    # The current turn keeps every step (its input checkpoint still holds the
+    # previous question), the turn before it only its final state
+    assert [snapshot.values["question"] for snapshot in history] == [questions[2]] * (len(history) - 2) + [questions[1]] * 2
+    assert history[-1].next == () and history[-1].values["final_data"]
+    assert len(history) > 3
+    # The conversation itself lives in the latest checkpoint
+    assert [message.content for message in latest["messages"] if message.additional_kwargs.get("message_kind") == QUESTION] == questions
+
+
+def test_search_results_are_not_kept_in_the_final_checkpoint(db_path):
+    workflow = _workflow(db_path)
+    result = workflow.invoke("What is SWOT analysis?", thread_id="thread-1")
+
+    assert result["final_data"]
+    assert workflow.get_state("thread-1").values.get("web_search_content") is None
+    # Synthesis still had them, in the intermediate checkpoints
+    history = workflow.get_state_history("thread-1", limit=100)
+    assert any(snapshot.values.get("web_search_content") for snapshot in history)
+
+
+def test_deferred_score_clears_search_results_when_attached(db_path):
+    workflow = _workflow(db_path)
+
+    async def run():
+        result = await workflow.ainvoke("What is SWOT analysis?", thread_id="thread-1", defer_validation=True)
+        pending = workflow.get_state("thread-1").values
+        await asyncio.gather(*workflow._validation_tasks)
+        return result, pending
+
+    result, pending = asyncio.run(run())
+    assert result["validator_score"] == "pending"
+    assert pending.get("web_search_content")
+    values = workflow.get_state("thread-1").values
+    assert values["validator_score"] != "pending"
+    assert values.get("web_search_content") is None
+
+
+@pytest.mark.parametrize("agent_seconds, search_seconds", [(0.3, 0.15), (0.15, 0.3)])
+def test_analyst_joins_the_concurrent_agent_and_search_branches(db_path, agent_seconds, search_seconds):
+    workflow = AgentWorkflow(checkpointer=SQLiteCheckpointer(db_path, thread_ttl_seconds=0), parallel_search=True)
+    fakes = install_fakes(workflow, Latency(), Latency(search_seconds))
+    workflow.business_agent.llm = FakeChatModel(latency=Latency(agent_seconds))
+    spans = {}
+
+    def timed(name, call):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                spans[name] = (start, time.perf_counter())
+        return wrapper
+
+    def build_prompt(question, agent_content, web_search_content, messages):
+        spans["analyst"] = time.perf_counter()
+        spans["analyst_inputs"] = (agent_content, web_search_content)
+        return original_build_prompt(question, agent_content, web_search_content, messages)
+
+    fakes["tavily"].ainvoke = timed("search", fakes["tavily"].ainvoke)
+    workflow.business_agent.ainvoke_llm = timed("agent", workflow.business_agent.ainvoke_llm)
+    original_build_prompt = workflow.business_synthesis.build_prompt
+    workflow.business_synthesis.build_prompt = build_prompt
+
+    start = time.perf_counter()
+    result = asyncio.run(workflow.ainvoke("What is SWOT analysis?", thread_id="thread-1"))
+    elapsed = time.perf_counter() - start
+
+    assert result["final_data"]
+    (agent_start, agent_end), (search_start, search_end) = spans["agent"], spans["search"]
+    # The branches overlap, and the analyst starts once the slower one is done
+    assert search_start < agent_end and agent_start < search_end
+    assert spans["analyst"] >= max(agent_end, search_end)
+    agent_content, web_search_content = spans["analyst_inputs"]
+    assert agent_content.startswith("Answer to") and "Search result 0" in web_search_content
+    # Latency is the slower branch, not the sum of both
+    slower = max(agent_seconds, search_seconds)
+    assert slower <= elapsed < agent_seconds + search_seconds